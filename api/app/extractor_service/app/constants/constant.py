@@ -1 +1,8 @@
-FILETYPES = [".pdf", ".docx"]
\ No newline at end of file
+import os
+
+FILETYPES = [".pdf", ".docx"]
+
+# PDF parsing backend: "pdfplumber" (default) or "pymupdf" (faster, needs PyMuPDF).
+# Can be overridden per request with the `backend` form field.
+PDF_BACKENDS = ["pdfplumber", "pymupdf"]
+PDF_BACKEND = os.getenv("PDF_BACKEND", "pdfplumber")
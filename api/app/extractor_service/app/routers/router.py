@@ -1,11 +1,12 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
 from app.service.reader_strategy import Reader
 from app.middleware.security import verify_bearer_token
+from app.metrics import metrics_response
 from fastapi import Depends
 from fastapi.responses import JSONResponse
 import os
 from typing import List, Optional
-from app.constants.constant import FILETYPES
+from app.constants.constant import FILETYPES, PDF_BACKENDS
 
 def success_response(data):
     return {
@@ -31,6 +32,14 @@ def is_valid_filetype(filename: str, allowed_types: List[str]) -> bool:
     _, ext = os.path.splitext(filename.lower())
     return ext in allowed_types
 
+def invalid_backend_response(backend: Optional[str]):
+    if backend is not None and backend not in PDF_BACKENDS:
+        return error_response(
+            code=400,
+            message=f"Unsupported PDF backend. Allowed backends are: {', '.join(PDF_BACKENDS)}"
+        )
+    return None
+
 router = APIRouter()
 
 
@@ -39,6 +48,11 @@ async def root():
     return {"message-info": "server is up"}
 
 
+@router.get("/metrics")
+async def metrics():
+    return metrics_response()
+
+
 @router.get("/test-integration", dependencies=[Depends(verify_bearer_token)])
 async def test_integration():
     return {"message": "Integration tests passed"}
@@ -52,13 +66,17 @@ async def extract_text(
     max_words: Optional[int] = Form(None, description="Stop extraction after this many words (per page boundary)"),
     multicolumn: Optional[bool] = Form(False, description="Reorder text column-by-column for multi-column layouts"),
     strip_footers: Optional[bool] = Form(False, description="Remove text in the bottom 6% of each page"),
+    backend: Optional[str] = Form(None, description="PDF backend: pdfplumber or pymupdf (default: PDF_BACKEND env var)"),
 ):
     if not is_valid_filetype(file.filename, FILETYPES):
         return error_response(
             code=415,
             message=f"Unsupported file type. Allowed types are: {', '.join(FILETYPES)}"
         )
-    reader = Reader(file)
+    backend_error = invalid_backend_response(backend)
+    if backend_error:
+        return backend_error
+    reader = Reader(file, backend)
     result = reader.get_text(
         normalization=normalization,
         ocr=ocr,
@@ -81,14 +99,18 @@ async def extract_text_with_tags(
     file: UploadFile = File(...),
     normalization: Optional[bool] = Form(True, description="Apply text normalization"),
     ocr: Optional[bool] = Form(True, description="Apply text extraction from images with ocr"),
-    max_words: Optional[int] = Form(None, description="Stop extraction after this many words (per page boundary)")
+    max_words: Optional[int] = Form(None, description="Stop extraction after this many words (per page boundary)"),
+    backend: Optional[str] = Form(None, description="PDF backend: pdfplumber or pymupdf (default: PDF_BACKEND env var)"),
 ):
     if not is_valid_filetype(file.filename, FILETYPES):
         return error_response(
             code=415,
             message=f"Unsupported file type. Allowed types are: {', '.join(FILETYPES)}"
         )
-    reader = Reader(file)
+    backend_error = invalid_backend_response(backend)
+    if backend_error:
+        return backend_error
+    reader = Reader(file, backend)
     result = reader.get_text_with_tags(normalization=normalization, ocr=ocr, max_words=max_words)
 
     if not result["success"]:
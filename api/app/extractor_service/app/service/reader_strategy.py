@@ -1,21 +1,25 @@
 
 from app.service.utils.normalization_and_parse import has_permit_extension,get_ext,normalice_text
-from app.constants.constant import FILETYPES
+from app.constants.constant import FILETYPES, PDF_BACKEND
 from app.errors.error import INPUT_ERRORS as IN_E
 import tempfile
 from app.service.strategies.pdf_reader_strategy import PdfReader
+from app.service.strategies.pymupdf_reader_strategy import PyMuPdfReader, PYMUPDF_AVAILABLE
 from app.service.strategies.word_reader_strategy import DocxReader
-from app.logging_config import logging
+from app.logging_config import logging, payload
+from app.metrics import observe_stage
 from typing import Any,Callable
 import shutil
 
+logger = logging.getLogger(__name__)
+
 
 class Reader:
-    def __init__(self, file: Any):
+    def __init__(self, file: Any, backend: str = None):
         self.file = file
         self.error = self._permit_extension(file)
         self.ext = get_ext(file.filename)
-        self.strategy = self._select_strategy(file)
+        self.strategy = self._select_strategy(file, backend or PDF_BACKEND)
 
 
     @staticmethod
@@ -28,9 +32,13 @@ class Reader:
         return None
 
     @staticmethod
-    def _select_strategy(file):
+    def _select_strategy(file, backend: str = "pdfplumber"):
         ext = get_ext(file.filename).lower()
         if ext == "pdf":
+            if backend == "pymupdf":
+                if PYMUPDF_AVAILABLE:
+                    return PyMuPdfReader()
+                logger.warning("PyMuPDF not available, falling back to pdfplumber. Install with: pip install PyMuPDF")
             return PdfReader()
         elif ext == "docx":
             return DocxReader()
@@ -38,7 +46,8 @@ class Reader:
             raise ValueError(f"No strategy for extension: {ext}")
 
 
-    def extract(self, strategy_method: Callable[[str], str], normalization: bool = True, ocr: bool = False) -> str:
+    def extract(self, strategy_method: Callable[[str], str], normalization: bool = True, ocr: bool = False,
+                ocr_report: list = None) -> str:
         if self.error:
             return {
                 "success": False,
@@ -50,19 +59,21 @@ class Reader:
             temp_file_path = temp_file.name
 
         try:
-            logging.info(f"Extracting text using {strategy_method.__name__} from {temp_file_path}")
+            logger.info("Extracting text using %s from %s", strategy_method.__name__, temp_file_path)
             text = strategy_method(temp_file_path, ocr)
-            logging.info(f"Extracted text: {text}")
+            logger.debug("Extracted text: %s", payload(text))
             if normalization:
-                text = normalice_text(text)
+                with observe_stage("normalization"):
+                    text = normalice_text(text)
+            data = {"text": text}
+            if ocr_report is not None:
+                data["ocr_pages"] = ocr_report
             return {
                 "success": True,
-                "data": {
-                    "text": text
-                }
+                "data": data
             }
         except Exception as e:
-            logging.error("Error extracting text: %s", e)
+            logger.error("Error extracting text: %s", e)
             return {
                 "success": False,
                 "error": {"message": IN_E["ERROR_EXTARCTING_TEXT"],"code": IN_E["CODE_ERROR_EXTARCTING_TEXT"]}}
@@ -81,30 +92,41 @@ class Reader:
             temp_file_path = temp_file.name
 
         try:
-            logging.info(f"Extracting text from {temp_file_path}")
+            logger.info("Extracting text from %s", temp_file_path)
+            ocr_report = [] if ocr and self.ext == "pdf" else None
             if self.ext == "pdf":
                 text, is_multicolumn = self.strategy.extract_text(
-                    temp_file_path, ocr, max_words, multicolumn, strip_footers
+                    temp_file_path, ocr, max_words, multicolumn, strip_footers, ocr_report
                 )
             else:
                 text = self.strategy.extract_text(temp_file_path, ocr, max_words)
                 is_multicolumn = False
 
             if normalization:
-                text = normalice_text(text)
+                with observe_stage("normalization"):
+                    text = normalice_text(text)
 
+            data = {"text": text, "is_multicolumn": is_multicolumn}
+            if ocr_report is not None:
+                data["ocr_pages"] = ocr_report
             return {
                 "success": True,
-                "data": {"text": text, "is_multicolumn": is_multicolumn}
+                "data": data
             }
         except Exception as e:
-            logging.error("Error extracting text: %s", e)
+            logger.error("Error extracting text: %s", e)
             return {
                 "success": False,
                 "error": {"message": IN_E["ERROR_EXTARCTING_TEXT"], "code": IN_E["CODE_ERROR_EXTARCTING_TEXT"]}
             }
 
     def get_text_with_tags(self, normalization: bool = True, ocr: bool = False, max_words: int = None):
+        if self.ext == "pdf":
+            ocr_report = [] if ocr else None
+            return self.extract(
+                lambda path, ocr: self.strategy.extract_text_with_xml_tags(path, ocr, max_words, ocr_report),
+                normalization, ocr, ocr_report
+            )
         return self.extract(
             lambda path, ocr: self.strategy.extract_text_with_xml_tags(path, ocr, max_words),
             normalization, ocr
@@ -1,24 +1,29 @@
 import pdfplumber
 from app.service.strategies.reader_strategy import ReaderStrategy
 from app.service.utils.multicolumn import detect_page_columns
+from app.service.utils.ocr_planner import plan_page_ocr, MAX_CID_RATIO
+from app.service.utils.ocr_engine import get_ocr_reader, ocr_image
+from app.metrics import observe_stage
 
-import subprocess
-import tempfile
-import glob
-import os
-from PIL import Image
-import numpy as np
 from collections import defaultdict
 from typing import Tuple
+from app.logging_config import logging
+
+logger = logging.getLogger(__name__)
 
 
 
 class PdfReader(ReaderStrategy):
     def __new__(cls):
-        if not hasattr(cls, 'instance'):
+        # cls.__dict__ (not hasattr) so subclasses get their own singleton
+        if 'instance' not in cls.__dict__:
             cls.instance = super(PdfReader, cls).__new__(cls)
         return cls.instance
 
+    def _open_pdf(self, pdf_path):
+        """Open the document. Subclasses return any object with the pdfplumber PDF/Page interface."""
+        return pdfplumber.open(pdf_path)
+
     def get_correct_tag(self,font_size,sizes):
         """this function returns the correct tag based on the font size"""
         if font_size >= sizes['h1']:
@@ -28,24 +33,21 @@ class PdfReader(ReaderStrategy):
         return "p"
 
 
-    def extract_text_with_xml_tags(self, pdf_path, ocr=True, max_words=None):
-        """Extract text with XML tags. If max_words is set, stops after that many words (per-page boundary)."""
+    def extract_text_with_xml_tags(self, pdf_path, ocr=True, max_words=None, ocr_report=None):
+        """Extract text with XML tags. If max_words is set, stops after that many words (per-page boundary).
+
+        With ocr=True each page is scored by plan_page_ocr and only pages (or image regions)
+        without a usable text layer are OCR'd; the per-page decisions are appended to ocr_report.
+        """
         sizes_dict = self.get_fontsizes(pdf_path)
-        print(sizes_dict)
+        logger.debug("Font size thresholds: %s", sizes_dict)
 
-        ocr_reader = None
+        ocr_reader = get_ocr_reader() if ocr else None
         processed_image_sizes = set()
 
-        if ocr:
-            try:
-                import easyocr
-                print("🔧 Initializing EasyOCR for image text extraction...")
-                ocr_reader = easyocr.Reader(['en', 'es'])
-            except ImportError:
-                print("❌ EasyOCR not available. Install with: pip install easyocr")
-                ocr = False
-
-        with pdfplumber.open(pdf_path) as pdf:
+        with observe_stage("pdf_open"):
+            pdf = self._open_pdf(pdf_path)
+        with pdf:
             try:
                 first_word = pdf.pages[0].extract_words()[0]
                 current_fontsize = round(float(first_word['height']))
@@ -59,8 +61,10 @@ class PdfReader(ReaderStrategy):
             words = 0
 
             for page_idx, page in enumerate(pdf.pages):
-                page_words = page.extract_words()
+                with observe_stage("word_extraction"):
+                    page_words = page.extract_words()
                 words += len(page_words)
+                page_start = (text_with_tags, list(current_text), current_tag, current_fontsize)
 
                 for obj in page_words:
                     font_size = round(float(obj['height']))
@@ -73,12 +77,17 @@ class PdfReader(ReaderStrategy):
                         text_with_tags += f"<{current_tag}>"
                     current_text.append(obj['text'])
 
-                if ocr and ocr_reader:
-                    ocr_text = self._extract_ocr_from_page(
-                        pdf_path, page_idx + 1, page, processed_image_sizes, ocr_reader
-                    )
-                    if ocr_text:
-                        text_with_tags += ocr_text
+                if ocr_reader:
+                    plan = plan_page_ocr(page, " ".join(w["text"] for w in page_words))
+                    if ocr_report is not None:
+                        ocr_report.append(plan)
+                    ocr_texts = self._ocr_page(page, plan, ocr_reader, processed_image_sizes)
+                    if ocr_texts and plan["cid_ratio"] > MAX_CID_RATIO:
+                        # same as _process_page_plain: drop the (cid:N) words, keep only the OCR text
+                        text_with_tags, current_text, current_tag, current_fontsize = page_start
+                        words += sum(len(t.split()) for t in ocr_texts) - len(page_words)
+                    for ocr_text in ocr_texts:
+                        text_with_tags += f"<img>{ocr_text}</img>"
 
                 if max_words and words >= max_words:
                     text_with_tags += " ".join(current_text)
@@ -89,116 +98,53 @@ class PdfReader(ReaderStrategy):
             text_with_tags += f"</{current_tag}>"
             return text_with_tags
 
-    def _extract_ocr_from_page(self, pdf_path, page_num, page, processed_sizes, ocr_reader):
-        """
-        Extract OCR text from images on a specific page
-        
-        Args:
-            pdf_path: Path to PDF file
-            page_num: Page number (1-indexed)
-            page: pdfplumber page object
-            processed_sizes: Set of already processed image sizes
-            ocr_reader: EasyOCR reader instance
-        
-        Returns:
-            String with OCR text wrapped in <img> tags
+    def _ocr_page(self, page, plan: dict, ocr_reader, processed_sizes: set = None) -> list:
         """
-        try:
-            # Extract images from this specific page using pdfimages
-            temp_dir = tempfile.mkdtemp(prefix="ocr_page_")
-            temp_prefix = os.path.join(temp_dir, "img")
-            
-            # Extract only from specific page
-            cmd = ["pdfimages", "-f", str(page_num), "-l", str(page_num), "-png", pdf_path, temp_prefix]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode != 0:
-                print(f"⚠️ pdfimages failed for page {page_num}: {result.stderr}")
-                return ""
-            
-            # Get extracted image files
-            image_files = glob.glob(f"{temp_prefix}-*.png")
-            if not image_files:
-                return ""
-            
-            image_files.sort()
-            page_width, page_height = page.width, page.height
-            ocr_texts = []
-            
-            for img_file in image_files:
-                try:
-                    with Image.open(img_file) as img:
-                        img_width, img_height = img.size
-                        size_key = (img_width, img_height)
-                        
-                        # Skip if already processed (duplicate detection)
-                        if size_key in processed_sizes:
-                            print(f"🔄 Skipping duplicate image {size_key}")
-                            continue
-                        
-                        # Skip if image is similar to page size (likely full page scan)
-                        if self._is_page_sized_image(img_width, img_height, page_width, page_height):
-                            print(f"📄 Skipping page-sized image {size_key}")
-                            continue
-                        
-                        # Process image with OCR
-                        print(f"🔍 Processing image {size_key} with EasyOCR...")
-                        img_array = np.array(img)
-                        results = ocr_reader.readtext(img_array)
-                        text = ' '.join([result[1] for result in results])
-                        
-                        if text.strip():
-                            ocr_texts.append(f"<img>{text.strip()}</img>")
-                            print(f"✅ Extracted: {text[:50]}...")
-                        
-                        # Mark this size as processed
-                        processed_sizes.add(size_key)
-                        
-                except Exception as e:
-                    print(f"❌ Error processing image {img_file}: {e}")
-                    continue
-            
-            # Cleanup
-            import shutil
-            shutil.rmtree(temp_dir)
-            
-            return ''.join(ocr_texts)
-            
-        except Exception as e:
-            print(f"❌ Error in OCR extraction for page {page_num}: {e}")
-            return ""
-    
-    def _is_page_sized_image(self, img_width, img_height, page_width, page_height, tolerance=0.8):
-        """
-        Check if image is similar to page size (likely a full page scan)
-        
-        Args:
-            img_width, img_height: Image dimensions in pixels
-            page_width, page_height: Page dimensions in points
-            tolerance: Similarity threshold (0.8 = 80% similar)
-        
-        Returns:
-            Boolean indicating if image is page-sized
+        Run the OCR decided by plan_page_ocr on one page.
+
+        Regions with the same size as one already OCR'd (logos, repeated headers)
+        are skipped. Returns the recognised texts, one per page or region.
         """
-        # Convert page dimensions to approximate pixel size (assuming ~150 DPI)
-        page_width_px = page_width * 150 / 72  # Convert points to pixels
-        page_height_px = page_height * 150 / 72
-        
-        # Check if image is similar to page size
-        width_ratio = min(img_width / page_width_px, page_width_px / img_width)
-        height_ratio = min(img_height / page_height_px, page_height_px / img_height)
-        
-        return width_ratio >= tolerance and height_ratio >= tolerance
-            
+        if plan["action"] == "full_page":
+            targets = [page]
+        elif plan["action"] == "regions":
+            targets = []
+            for bbox in plan["regions"]:
+                size_key = (round(bbox[2] - bbox[0]), round(bbox[3] - bbox[1]))
+                if processed_sizes is not None:
+                    if size_key in processed_sizes:
+                        logger.debug("Skipping duplicate image %s", size_key)
+                        continue
+                    processed_sizes.add(size_key)
+                targets.append(page.crop(bbox))
+        else:
+            return []
+
+        texts = []
+        for target in targets:
+            try:
+                image = target.to_image(resolution=plan["dpi"]).original
+                text = ocr_image(ocr_reader, image)
+            except Exception as e:
+                logger.warning("OCR failed on page %s: %s", plan["page"], e)
+                continue
+            if text:
+                texts.append(text)
+        return texts
+
     def get_fontsizes(self,pdf_path):
         fontsizes = []
         count = 0
-        with pdfplumber.open(pdf_path) as pdf:
+        with observe_stage("pdf_open"):
+            pdf = self._open_pdf(pdf_path)
+        with pdf:
             for page in pdf.pages:
                 count+=1
                 if count > 5:
                     break
-                for obj in page.extract_words():
+                with observe_stage("word_extraction"):
+                    page_words = page.extract_words()
+                for obj in page_words:
                     if round(float(obj["height"])) not in fontsizes and obj["height"] < 40:
                         fontsizes.append(round((float(obj["height"]))))
             fontsizes.sort()
@@ -281,79 +227,85 @@ class PdfReader(ReaderStrategy):
         n_cols = page_det["columns"]
         split_x = page_det["method_b"].get("split_x")
 
-        if n_cols > 1:
-            text = self._extract_words_column_ordered(page, split_x, n_cols, strip_footers)
-        else:
-            if strip_footers:
-                words = [w for w in page.extract_words() if w["bottom"] < page.height * 0.94]
-                line_map: dict[int, list] = defaultdict(list)
-                for w in words:
-                    y_key = round(w["top"] / 2) * 2
-                    line_map[y_key].append(w)
-                lines = []
-                for y_key in sorted(line_map):
-                    lw = sorted(line_map[y_key], key=lambda w: w["x0"])
-                    lines.append(" ".join(w["text"] for w in lw))
-                text = "\n".join(lines)
+        with observe_stage("word_extraction"):
+            if n_cols > 1:
+                text = self._extract_words_column_ordered(page, split_x, n_cols, strip_footers)
             else:
-                text = page.extract_text() or ""
+                if strip_footers:
+                    words = [w for w in page.extract_words() if w["bottom"] < page.height * 0.94]
+                    line_map: dict[int, list] = defaultdict(list)
+                    for w in words:
+                        y_key = round(w["top"] / 2) * 2
+                        line_map[y_key].append(w)
+                    lines = []
+                    for y_key in sorted(line_map):
+                        lw = sorted(line_map[y_key], key=lambda w: w["x0"])
+                        lines.append(" ".join(w["text"] for w in lw))
+                    text = "\n".join(lines)
+                else:
+                    text = page.extract_text() or ""
 
         word_count = len(text.split()) if text else 0
         return ([text.strip()] if text.strip() else []), word_count
 
-    def _process_page_plain(self, page, ocr_reader=None):
+    def _process_page_plain(self, page, ocr_reader=None, ocr_report=None, processed_sizes=None):
         """
-        Extract plain text from one page, optionally with OCR.
+        Extract plain text from one page, OCR'ing only what plan_page_ocr decides.
         Returns (chunks, word_count) where chunks is a list of text strings.
         """
         chunks = []
-        text = page.extract_text()
+        with observe_stage("word_extraction"):
+            text = page.extract_text()
         word_count = len(text.split()) if text else 0
         if text:
             chunks.append(text.strip())
 
         if ocr_reader:
-            try:
-                page_image = page.to_image(resolution=300).original
-                results = ocr_reader.readtext(page_image, detail=0)
-                ocr_text = "\n".join(results)
-                if ocr_text.strip():
-                    chunks.append(ocr_text.strip())
-            except Exception as e:
-                print(f"OCR failed on page: {e}")
+            plan = plan_page_ocr(page, text)
+            if ocr_report is not None:
+                ocr_report.append(plan)
+            ocr_texts = self._ocr_page(page, plan, ocr_reader, processed_sizes)
+            if ocr_texts and plan["cid_ratio"] > MAX_CID_RATIO:
+                # the (cid:N) text layer is garbage; the rendered page is what the reader sees
+                chunks = []
+                word_count = 0
+            chunks.extend(ocr_texts)
+            if not word_count:
+                # scanned pages count towards max_words through their OCR text
+                word_count = sum(len(t.split()) for t in ocr_texts)
 
         return chunks, word_count
 
     def extract_text(self, pdf_path: str, ocr: bool = False, max_words: int = None,
-                     multicolumn: bool = False, strip_footers: bool = False) -> Tuple[str, bool]:
+                     multicolumn: bool = False, strip_footers: bool = False,
+                     ocr_report: list = None) -> Tuple[str, bool]:
         """Extract plain text. Returns (text, is_multicolumn).
 
         multicolumn=True: reorder words column-by-column per page (left col first, then right).
         strip_footers=True: skip text in the bottom 6% of each page.
         is_multicolumn is computed from per-page detection on the first 5 content pages.
+        ocr=True: OCR only the pages/regions plan_page_ocr flags; decisions are appended to ocr_report.
         """
-        print("Extracting text from PDF...")
-        ocr_reader = None
-        if ocr and not multicolumn:
-            try:
-                import easyocr
-                print("🔧 Initializing EasyOCR...")
-                ocr_reader = easyocr.Reader(['en', 'es'])
-            except ImportError:
-                print("❌ EasyOCR not available. Install with: pip install easyocr")
+        logger.debug("Extracting text from %s", pdf_path)
+        ocr_reader = get_ocr_reader() if ocr and not multicolumn else None
+        processed_image_sizes = set()
 
         all_chunks = []
         total_words = 0
         multi_page_votes: list[bool] = []
 
-        with pdfplumber.open(pdf_path) as pdf:
+        with observe_stage("pdf_open"):
+            pdf = self._open_pdf(pdf_path)
+        with pdf:
             for page_idx, page in enumerate(pdf.pages):
                 page_det = None
 
                 # Always detect on first 5 pages to build the is_multicolumn vote.
                 if page_idx < 5:
-                    page_det = detect_page_columns(page)
-                    page_word_count = len(page.extract_words())
+                    with observe_stage("column_detection"):
+                        page_det = detect_page_columns(page)
+                    with observe_stage("word_extraction"):
+                        page_word_count = len(page.extract_words())
                     if page_word_count >= 25:
                         multi_page_votes.append(page_det["columns"] > 1)
 
@@ -361,10 +313,11 @@ class PdfReader(ReaderStrategy):
                     # For pages beyond the first 5 we still need per-page detection
                     # to decide whether that individual page is multi-column.
                     if page_det is None:
-                        page_det = detect_page_columns(page)
+                        with observe_stage("column_detection"):
+                            page_det = detect_page_columns(page)
                     chunks, wc = self._process_page_column_aware(page, page_det, strip_footers)
                 else:
-                    chunks, wc = self._process_page_plain(page, ocr_reader)
+                    chunks, wc = self._process_page_plain(page, ocr_reader, ocr_report, processed_image_sizes)
 
                 all_chunks.extend(chunks)
                 total_words += wc
@@ -0,0 +1,176 @@
+"""
+PyMuPDF (fitz) backend for PdfReader.
+
+PyMuPDF parses pages in C and is several times faster than pdfplumber
+(see extras/extractor_with_no_cid.py and validation/benchmark_pdf_backends.py).
+Instead of re-implementing the tag builder, column detection and OCR planning,
+this module exposes fitz pages through the small subset of the pdfplumber
+Page interface those rely on:
+
+    page.width / page.height / page.page_number
+    page.chars            -- dicts with text, x0, x1, top, bottom, size, fontname
+    page.images           -- dicts with x0, x1, top, bottom
+    page.extract_words()  -- dicts with text, x0, x1, top, bottom, height
+    page.extract_text()
+    page.crop(bbox).to_image(resolution=...).original / page.to_image(...)
+
+Char boxes follow pdfminer's convention (height == font size, bottom at the
+descender), so word heights -- and therefore the h1/h2/p font-size tags -- match
+what pdfplumber reports.
+"""
+
+from PIL import Image
+
+from app.service.strategies.pdf_reader_strategy import PdfReader
+
+try:
+    import fitz  # PyMuPDF
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+# Same defaults as pdfplumber's extract_words / extract_text
+X_TOLERANCE = 3
+Y_TOLERANCE = 3
+
+
+class _RenderedImage:
+    def __init__(self, original: Image.Image):
+        self.original = original
+
+
+class _FitzRegion:
+    def __init__(self, fitz_page, bbox):
+        self._fitz_page = fitz_page
+        self.bbox = bbox
+
+    def to_image(self, resolution: int = 72) -> _RenderedImage:
+        clip = fitz.Rect(*self.bbox) if self.bbox else None
+        pix = self._fitz_page.get_pixmap(dpi=resolution, clip=clip, alpha=False)
+        return _RenderedImage(Image.frombytes("RGB", (pix.width, pix.height), pix.samples))
+
+
+class FitzPage:
+    """A fitz page seen through the pdfplumber Page attributes PdfReader uses."""
+
+    def __init__(self, fitz_page):
+        self._page = fitz_page
+        self.page_number = fitz_page.number + 1
+        self.width = float(fitz_page.rect.width)
+        self.height = float(fitz_page.rect.height)
+        self._chars = None
+        self._lines = None
+
+    @property
+    def chars(self) -> list:
+        if self._chars is None:
+            self._chars = self._load_chars()
+        return self._chars
+
+    @property
+    def images(self) -> list:
+        return [
+            {"x0": info["bbox"][0], "top": info["bbox"][1], "x1": info["bbox"][2], "bottom": info["bbox"][3]}
+            for info in self._page.get_image_info()
+        ]
+
+    def _load_chars(self) -> list:
+        raw = self._page.get_text("rawdict", flags=fitz.TEXT_PRESERVE_LIGATURES | fitz.TEXT_PRESERVE_WHITESPACE)
+        chars = []
+        for block in raw["blocks"]:
+            if block.get("type") != 0:
+                continue
+            for line in block["lines"]:
+                for span in line["spans"]:
+                    size = float(span["size"])
+                    descender = float(span.get("descender", -0.2))
+                    for char in span["chars"]:
+                        x0, _, x1, _ = char["bbox"]
+                        baseline = char["origin"][1]
+                        bottom = baseline - descender * size
+                        chars.append({
+                            "text": char["c"],
+                            "x0": float(x0),
+                            "x1": float(x1),
+                            "top": bottom - size,
+                            "bottom": bottom,
+                            "size": size,
+                            "fontname": span["font"],
+                        })
+        return chars
+
+    def _word_lines(self) -> list:
+        """Words grouped into lines top to bottom, left to right, as pdfplumber clusters them."""
+        if self._lines is not None:
+            return self._lines
+
+        words, current = [], []
+
+        def close_word():
+            if current:
+                words.append({
+                    "text": "".join(c["text"] for c in current),
+                    "x0": min(c["x0"] for c in current),
+                    "x1": max(c["x1"] for c in current),
+                    "top": min(c["top"] for c in current),
+                    "bottom": max(c["bottom"] for c in current),
+                    "upright": True,
+                })
+                words[-1]["height"] = words[-1]["bottom"] - words[-1]["top"]
+                current.clear()
+
+        for char in self.chars:
+            if char["text"].isspace():
+                close_word()
+                continue
+            if current:
+                previous = current[-1]
+                if (abs(char["top"] - previous["top"]) > Y_TOLERANCE
+                        or char["x0"] - previous["x1"] > X_TOLERANCE
+                        or char["x0"] < previous["x0"]):
+                    close_word()
+            current.append(char)
+        close_word()
+
+        lines = []
+        for word in sorted(words, key=lambda w: w["top"]):
+            if lines and word["top"] - lines[-1][0]["top"] <= Y_TOLERANCE:
+                lines[-1].append(word)
+            else:
+                lines.append([word])
+        self._lines = [sorted(line, key=lambda w: w["x0"]) for line in lines]
+        return self._lines
+
+    def extract_words(self) -> list:
+        return [word for line in self._word_lines() for word in line]
+
+    def extract_text(self) -> str:
+        return "\n".join(" ".join(w["text"] for w in line) for line in self._word_lines())
+
+    def crop(self, bbox) -> _FitzRegion:
+        return _FitzRegion(self._page, bbox)
+
+    def to_image(self, resolution: int = 72) -> _RenderedImage:
+        return _FitzRegion(self._page, None).to_image(resolution=resolution)
+
+
+class FitzDocument:
+    def __init__(self, pdf_path: str):
+        self._doc = fitz.open(pdf_path)
+        self.pages = [FitzPage(page) for page in self._doc]
+
+    def close(self):
+        self._doc.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PyMuPdfReader(PdfReader):
+    """PdfReader running on PyMuPDF. Tagging, column detection and OCR planning are inherited."""
+
+    def _open_pdf(self, pdf_path):
+        return FitzDocument(pdf_path)
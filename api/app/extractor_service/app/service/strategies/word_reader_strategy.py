@@ -5,6 +5,10 @@ import os
 from PIL import Image
 import numpy as np
 import io
+from app.logging_config import logging, payload
+from app.service.utils.ocr_engine import get_ocr_reader
+
+logger = logging.getLogger(__name__)
 
 
 class DocxReader(ReaderStrategy):
@@ -48,16 +52,16 @@ class DocxReader(ReaderStrategy):
 
                     # Skip if already processed (duplicate detection)
                     if size_key in processed_sizes:
-                        print(f"🔄 Skipping duplicate image {size_key}")
+                        logger.debug("Skipping duplicate image %s", size_key)
                         continue
 
                     # Skip very small images (likely icons or decorations)
                     if img_width < 100 or img_height < 100:
-                        print(f"⏭️ Skipping small image {size_key}")
+                        logger.debug("Skipping small image %s", size_key)
                         continue
 
                     # Process image with OCR
-                    print(f"🔍 Processing image {size_key} with EasyOCR...")
+                    logger.debug("Processing image %s with EasyOCR", size_key)
                     img_array = np.array(img.convert('RGB'))
                     results = ocr_reader.readtext(img_array)
                     text = ' '.join([result[1] for result in results])
@@ -67,13 +71,13 @@ class DocxReader(ReaderStrategy):
                             ocr_texts.append(f"<img>{text.strip()}</img>")
                         else:
                             ocr_texts.append(text.strip())
-                        print(f"✅ Extracted: {text[:50]}...")
+                        logger.debug("OCR extracted: %s", payload(text, 50))
 
                     # Mark this size as processed
                     processed_sizes.add(size_key)
 
                 except Exception as e:
-                    print(f"❌ Error extracting image: {e}")
+                    logger.warning("Error extracting image: %s", e)
                     continue
 
         return ocr_texts
@@ -115,15 +119,7 @@ class DocxReader(ReaderStrategy):
         doc = Document(docx_path)
 
         # Initialize OCR if enabled
-        ocr_reader = None
-        if ocr:
-            try:
-                import easyocr
-                print("🔧 Initializing EasyOCR for image text extraction...")
-                ocr_reader = easyocr.Reader(['en', 'es'])
-            except ImportError:
-                print("❌ EasyOCR not available. Install with: pip install easyocr")
-                ocr = False
+        ocr_reader = get_ocr_reader() if ocr else None
 
         text_with_tags = ""
         current_tag = "p"
@@ -174,17 +170,11 @@ class DocxReader(ReaderStrategy):
         lines = [para.text.strip() for para in doc.paragraphs if para.text.strip()]
 
         # Extract OCR text from images if enabled
-        if ocr:
-            try:
-                import easyocr
-                print("🔧 Initializing EasyOCR for image text extraction...")
-                ocr_reader = easyocr.Reader(['en', 'es'])
-
-                ocr_texts = self._extract_ocr_from_docx(docx_path, ocr_reader, wrap_tags=False)
-                if ocr_texts:
-                    lines.extend(ocr_texts)
-            except ImportError:
-                print("❌ EasyOCR not available. Install with: pip install easyocr")
+        ocr_reader = get_ocr_reader() if ocr else None
+        if ocr_reader:
+            ocr_texts = self._extract_ocr_from_docx(docx_path, ocr_reader, wrap_tags=False)
+            if ocr_texts:
+                lines.extend(ocr_texts)
 
         return "\n".join(lines)
 
@@ -0,0 +1,43 @@
+"""
+Process-wide EasyOCR reader.
+
+Loading the EasyOCR detection and recognition models takes seconds, so the
+reader is created once on first use and shared by every request and strategy.
+"""
+
+import threading
+
+import numpy as np
+
+from app.logging_config import logging
+from app.metrics import observe_stage
+
+logger = logging.getLogger(__name__)
+
+OCR_LANGUAGES = ['en', 'es']
+
+_reader = None
+_lock = threading.Lock()
+
+
+def get_ocr_reader():
+    """Returns the shared EasyOCR reader, or None if easyocr is not installed."""
+    global _reader
+    with _lock:
+        if _reader is None:
+            try:
+                import easyocr
+            except ImportError:
+                logger.warning("EasyOCR not available. Install with: pip install easyocr")
+                return None
+            logger.info("Initializing EasyOCR")
+            with observe_stage("ocr_init"):
+                _reader = easyocr.Reader(OCR_LANGUAGES)
+    return _reader
+
+
+def ocr_image(ocr_reader, image) -> str:
+    """OCR a PIL image and return the recognised lines joined by newlines."""
+    with observe_stage("ocr"):
+        results = ocr_reader.readtext(np.array(image.convert("RGB")), detail=0)
+    return "\n".join(results).strip()
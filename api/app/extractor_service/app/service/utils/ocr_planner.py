@@ -0,0 +1,113 @@
+"""
+Per-page OCR planning for PDF pages.
+
+Scores the text layer pdfplumber found on a page and decides whether OCR can
+add anything:
+  coverage  — fraction of the page area covered by character boxes
+  cid_ratio — share of the page text made of "(cid:N)" glyphs, the same measure
+              analyze_cid_corruption uses to filter the training dataset
+  regions   — embedded images (figures, scanned inserts) with no text on top of them
+
+Actions:
+  skip       — the text layer is usable and there is nothing without text to read
+  full_page  — no text layer (scan) or a corrupted one: render the whole page and OCR it
+  regions    — usable text layer plus images without text: OCR only those crops
+"""
+
+import re
+
+_CID_RE = re.compile(r"\(cid:\d+\)")
+
+MIN_TEXT_CHARS = 30           # below this a page is treated as having no text layer
+MAX_CID_RATIO = 0.20          # above this the text layer is considered corrupted
+MIN_REGION_AREA_RATIO = 0.02  # images smaller than 2% of the page (icons, logos, rules) are ignored
+MAX_CHARS_IN_REGION = 10      # an image with more chars than this on top already has a text layer
+
+FULL_PAGE_DPI = 300
+LARGE_PAGE_DPI = 200          # pages bigger than ~1.5x A4 would render to >15 MP at 300 DPI
+LARGE_PAGE_AREA = 1.5 * 595 * 842
+REGION_DPI = 200
+SMALL_REGION_DPI = 300        # small crops need more pixels per glyph
+SMALL_REGION_AREA_RATIO = 0.10
+
+
+def cid_ratio(text: str) -> float:
+    if not text:
+        return 0.0
+    cid_chars = sum(len(match) for match in _CID_RE.findall(text))
+    return cid_chars / len(text)
+
+
+def _chars_inside(chars: list, bbox: tuple) -> int:
+    x0, top, x1, bottom = bbox
+    return sum(
+        1 for c in chars
+        if x0 <= (c["x0"] + c["x1"]) / 2 <= x1 and top <= (c["top"] + c["bottom"]) / 2 <= bottom
+    )
+
+
+def _image_regions(page) -> list:
+    page_area = float(page.width * page.height) or 1.0
+    regions = []
+    for image in page.images:
+        bbox = (
+            max(float(image["x0"]), 0.0),
+            max(float(image["top"]), 0.0),
+            min(float(image["x1"]), float(page.width)),
+            min(float(image["bottom"]), float(page.height)),
+        )
+        area = (bbox[2] - bbox[0]) * (bbox[3] - bbox[1])
+        if bbox[2] <= bbox[0] or bbox[3] <= bbox[1] or area / page_area < MIN_REGION_AREA_RATIO:
+            continue
+        regions.append((bbox, area / page_area))
+    return regions
+
+
+def plan_page_ocr(page, text: str = None) -> dict:
+    """
+    Decide whether (and how) to OCR one pdfplumber page.
+
+    Args:
+        page: pdfplumber page (or any object with width, height, chars, images)
+        text: the page text already extracted, used for the (cid:) score; extracted if None
+
+    Returns:
+        dict with page, action, dpi, regions ([x0, top, x1, bottom] in PDF points),
+        chars, coverage, cid_ratio and a short reason
+    """
+    chars = page.chars
+    page_area = float(page.width * page.height) or 1.0
+    char_area = sum((c["x1"] - c["x0"]) * (c["bottom"] - c["top"]) for c in chars)
+    if text is None:
+        text = page.extract_text() or ""
+    corruption = cid_ratio(text)
+    regions = _image_regions(page)
+
+    plan = {
+        "page": getattr(page, "page_number", None),
+        "action": "skip",
+        "dpi": None,
+        "regions": [],
+        "chars": len(chars),
+        "coverage": round(min(char_area / page_area, 1.0), 4),
+        "cid_ratio": round(corruption, 4),
+        "reason": "text layer present",
+    }
+
+    if corruption > MAX_CID_RATIO or len(chars) < MIN_TEXT_CHARS:
+        if corruption <= MAX_CID_RATIO and not regions:
+            plan["reason"] = "no text layer and no images"
+            return plan
+        plan["action"] = "full_page"
+        plan["dpi"] = LARGE_PAGE_DPI if page_area > LARGE_PAGE_AREA else FULL_PAGE_DPI
+        plan["reason"] = "corrupted text layer (cid)" if corruption > MAX_CID_RATIO else "no text layer"
+        return plan
+
+    uncovered = [(bbox, ratio) for bbox, ratio in regions if _chars_inside(chars, bbox) <= MAX_CHARS_IN_REGION]
+    if uncovered:
+        plan["action"] = "regions"
+        plan["regions"] = [[round(v, 1) for v in bbox] for bbox, _ in uncovered]
+        small = all(ratio < SMALL_REGION_AREA_RATIO for _, ratio in uncovered)
+        plan["dpi"] = SMALL_REGION_DPI if small else REGION_DPI
+        plan["reason"] = "images without text layer"
+    return plan
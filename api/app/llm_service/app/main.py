@@ -1,5 +1,7 @@
 from fastapi import FastAPI
 from app.routers.router import router
+from app.metrics import metrics_middleware
+from app.tracing import tracing_middleware
 
 description = """
 Description:
@@ -15,6 +17,8 @@ app = FastAPI(
 )
 
 
+app.middleware("http")(metrics_middleware)
+app.middleware("http")(tracing_middleware)
 app.include_router(router)
 
 
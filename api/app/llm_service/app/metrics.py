@@ -0,0 +1,97 @@
+"""
+Prometheus metrics for the service.
+
+    REQUESTS_TOTAL     -- requests served, by method, route and status code
+    REQUESTS_IN_FLIGHT -- requests currently being processed
+    REQUEST_LATENCY    -- end-to-end request latency, by method and route
+    STAGE_LATENCY      -- latency of the internal pipeline stages
+    JSON_PARSE_PATH    -- which parse_json path turned the model output into a dict
+
+Stage timings are also recorded as spans of the current trace (app.tracing).
+
+Every service carries its own copy of this module (each one is built from its
+own Docker context), so metric names are kept identical across them and the
+Prometheus `job` label tells the services apart.
+"""
+import time
+from contextlib import contextmanager
+
+from fastapi import Request, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+from app.tracing import trace_span
+
+# Stages go from milliseconds (a classifier predict) to minutes (OCR, generation)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+REQUESTS_TOTAL = Counter(
+    "http_requests_total",
+    "HTTP requests served",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being processed",
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_LATENCY = Histogram(
+    "stage_duration_seconds",
+    "Latency of the internal pipeline stages",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+JSON_PARSE_PATH = Counter(
+    "llm_json_parse_total",
+    "Model outputs parsed, by the repair path that succeeded (or failed)",
+    ["path"],
+)
+
+
+@contextmanager
+def observe_stage(stage: str):
+    """Records the time spent inside the block under STAGE_LATENCY{stage=...}."""
+    start = time.perf_counter()
+    try:
+        with trace_span(stage):
+            yield
+    finally:
+        STAGE_LATENCY.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+def _route_template(request: Request) -> str:
+    # Use the route template (/debug/{id}) instead of the raw path to keep the label cardinality bounded
+    route = request.scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+async def metrics_middleware(request: Request, call_next):
+    if request.url.path == "/metrics":
+        return await call_next(request)
+
+    REQUESTS_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = _route_template(request)
+        REQUEST_LATENCY.labels(method=request.method, route=route).observe(time.perf_counter() - start)
+        REQUESTS_TOTAL.labels(method=request.method, route=route, status=str(status)).inc()
+        REQUESTS_IN_FLIGHT.dec()
+
+
+def metrics_response() -> Response:
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -2,8 +2,9 @@ from app.services.llms_extraction import ModelExtraction
 from app.errors.error import ROUTE_ERRORS as RO_E
 from fastapi import APIRouter,HTTPException
 from app.middleware.security import verify_bearer_token
+from app.metrics import metrics_response
 from fastapi import Depends, Body
-from app.logging_config import logging
+from app.logging_config import logging, payload
 from pydantic import BaseModel
 from fastapi.responses import JSONResponse
 
@@ -37,6 +38,11 @@ class LLMRequest(BaseModel):
 async def root():
     return {"message-info": "server is up"}
 
+
+@router.get("/metrics")
+async def metrics():
+    return metrics_response()
+
 @router.get("/test-integration", dependencies=[Depends(verify_bearer_token)])
 async def test_integration():
     return {"message": "Integration tests passed"}
@@ -55,7 +61,7 @@ async def consume_llm(req: LLMRequest = Body(..., media_type="application/json")
 
     logger.info("starting model extraction")
     response_ml, error = model_extraction.model_extraction(req.text)
-    logger.info(f"response model extraction: {response_ml}")
+    logger.debug("response model extraction: %s", payload(response_ml))
 
     if error is not None:
         return error_response(
@@ -1,5 +1,6 @@
 import torch
 from app.logging_config import logging
+from app.metrics import observe_stage
 from ollama import Client
 from app.services.model_managment import get_truncation
 from app.services.utils import parse_json,extract_text_from_ollama
@@ -32,19 +33,22 @@ class HuggingFaceStrategy(LLMStrategy):
 
     def generate_with_fallback(self,inputs, max_input, max_output):
         if "max_new_tokens" in self.model.generate.__code__.co_varnames:
-            self.logger.info(f"using max_new_tokens")
+            self.logger.debug("using max_new_tokens")
             return self.model.generate(**inputs, max_new_tokens=max_output)
         else:
-            self.logger.info(f"using max_length")
+            self.logger.debug("using max_length")
             return self.model.generate(**inputs, max_length=max_input + max_output)
 
     def generate(self, prompt: str) -> str:
-        inputs = self.tokenizer(prompt, return_tensors="pt", max_length=self.max_length_input, truncation=self.trunaction) 
-        inputs = {k: v.to(self.device) for k, v in inputs.items()}  
-        self.logger.info(f"generating with model")
-        outputs  = self.generate_with_fallback(inputs, self.max_length_input, self.max_length_output)
-        self.logger.info(f"decoding output of length: {len(outputs[0])}")
-        prediction = self.tokenizer.decode(outputs[0].cpu(), skip_special_tokens=self.special_tokens_treatment, errors=self.errors_treatment)
+        with observe_stage("tokenize"):
+            inputs = self.tokenizer(prompt, return_tensors="pt", max_length=self.max_length_input, truncation=self.trunaction) 
+            inputs = {k: v.to(self.device) for k, v in inputs.items()}  
+        self.logger.debug("generating with model")
+        with observe_stage("generate"):
+            outputs  = self.generate_with_fallback(inputs, self.max_length_input, self.max_length_output)
+        self.logger.debug("decoding output of length: %s", len(outputs[0]))
+        with observe_stage("decode"):
+            prediction = self.tokenizer.decode(outputs[0].cpu(), skip_special_tokens=self.special_tokens_treatment, errors=self.errors_treatment)
         return prediction
     
     def clean_json(self, prediction) -> Tuple[dict, Optional[int]]:
@@ -59,11 +63,12 @@ class OllamaStrategy(LLMStrategy):
         self.client = Client(host=clean_host)
 
     def generate(self, prompt: str) -> str:
-        response = self.client.generate(
-            model=self.model,
-            prompt=prompt,
-            stream=False
-        )
+        with observe_stage("generate"):
+            response = self.client.generate(
+                model=self.model,
+                prompt=prompt,
+                stream=False
+            )
         return response['response']
     
     def clean_json(self, prediction)-> Tuple[dict, Optional[int]]:
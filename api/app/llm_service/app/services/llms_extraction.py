@@ -4,7 +4,7 @@ from dotenv import load_dotenv
 from app.services.model_managment import get_model
 import re
 import os
-from app.logging_config import logging
+from app.logging_config import logging, payload
 from pathlib import Path
 from app.services.llm_library_strategy import HuggingFaceStrategy,OllamaStrategy
 from typing import Tuple, Optional
@@ -40,8 +40,8 @@ class ModelExtraction:
         try: 
             prediction = self.strategy.generate(final_prompt)
         except Exception as e:
-            logging.error(f"error extracting model: {e}")
+            self.logger.error("error extracting model: %s", e)
             return MD_E["ERROR_OPENING_MODEL"],MD_E["CODE_ERROR_OPENING_MODEL"]
-        print("prediction with no clean",prediction)
+        self.logger.debug("prediction with no clean: %s", payload(prediction))
         return  self.strategy.clean_json(prediction)
 
@@ -1,6 +1,10 @@
 import json
 from app.errors.error import MODEL_ERRORS as MD_E
+from app.metrics import JSON_PARSE_PATH
 import  re
+from app.logging_config import logging, payload
+
+logger = logging.getLogger(__name__)
 
 def normalice_latin_char(text):
         text = text.replace("\\r\\n", " ")
@@ -14,12 +18,14 @@ def normalice_latin_char(text):
 
 def extract_text_from_ollama(text):
     try:
-        print(text)
+        logger.debug("ollama raw output: %s", payload(text))
         dict = text.split("</think>")[1]
         dict = dict.strip()
         dict = json.loads(dict)
+        JSON_PARSE_PATH.labels(path="ollama").inc()
         return dict,None
     except Exception as e:
+        JSON_PARSE_PATH.labels(path="failed").inc()
         return MD_E["ERROR_PARSING_OUTPUT"],MD_E["CODE_ERROR_PARSING_OUTPUT"]
 
 
@@ -58,6 +64,7 @@ def _regex_repair(text: str):
 def parse_json(prediction):
     try:
         prediction_json = json.loads(prediction)
+        JSON_PARSE_PATH.labels(path="direct").inc()
     except json.JSONDecodeError:
         prediction = prediction.replace("'", '"')
         prediction = prediction.replace("\"[", "[")
@@ -67,11 +74,15 @@ def parse_json(prediction):
         cleaned_prediction = prediction.encode('latin1', 'replace').decode('utf-8', 'replace')
         try:
             prediction_json = json.loads(cleaned_prediction, strict=False)
+            JSON_PARSE_PATH.labels(path="cleaned").inc()
         except json.JSONDecodeError:
             try:
                 prediction_json = _regex_repair(cleaned_prediction)
                 if prediction_json is None:
+                    JSON_PARSE_PATH.labels(path="failed").inc()
                     return MD_E["ERROR_PARSING_OUTPUT"], MD_E["CODE_ERROR_PARSING_OUTPUT"]
+                JSON_PARSE_PATH.labels(path="regex_repair").inc()
             except Exception:
+                JSON_PARSE_PATH.labels(path="failed").inc()
                 return MD_E["ERROR_PARSING_OUTPUT"], MD_E["CODE_ERROR_PARSING_OUTPUT"]
     return prediction_json, None
\ No newline at end of file
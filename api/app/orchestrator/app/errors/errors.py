@@ -7,5 +7,7 @@ INPUT_ERRORS = {
 
 ROUTE_ERRORS = {
     "ERROR_NO_INPUT_DATA" : {'error' : 'No file part'},
-    "CODE_ERROR_NO_INPUT_DATA" : 400
+    "ERROR_TRACE_NOT_FOUND" : {'error' : 'trace not found (unknown id or already evicted)'},
+    "CODE_ERROR_NO_INPUT_DATA" : 400,
+    "CODE_ERROR_TRACE_NOT_FOUND" : 404
 }
\ No newline at end of file
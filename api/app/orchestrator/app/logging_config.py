@@ -1,11 +1,99 @@
+"""
+Logging setup for the service.
+
+    LOG_LEVEL          -- root level (default INFO)
+    LOG_LEVELS         -- per-module overrides, e.g. "app.service.strategies=DEBUG,app.routers=WARNING"
+    LOG_FORMAT         -- "text" (default) or "json" (one object per line, extra= fields included)
+    LOG_PAYLOAD_CHARS  -- how many characters of a payload() end up in a log line (default 300)
+
+Large values (extracted text, LLM prompts and responses) must be logged through
+payload() with %-style arguments, so nothing is formatted unless the level is
+enabled, and a disabled DEBUG line costs a level check:
+
+    logger.debug("Extracted text: %s", payload(text))
+"""
+import json
 import logging
+import os
 import sys
 
+from app.tracing import current_trace_id
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+LOG_PAYLOAD_CHARS = int(os.getenv("LOG_PAYLOAD_CHARS", "300"))
+
+# Attributes every LogRecord has; anything else on a record came from extra=
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "trace_id"}
+
+
+class _Payload:
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value, limit: int = None):
+        self.value = value
+        self.limit = LOG_PAYLOAD_CHARS if limit is None else limit
+
+    def __str__(self):
+        text = self.value if isinstance(self.value, str) else repr(self.value)
+        if len(text) <= self.limit:
+            return text
+        head = self.limit * 2 // 3
+        tail = self.limit - head
+        omitted = len(text) - head - tail
+        return f"{text[:head]} …[{omitted} chars omitted]… {text[-tail:] if tail else ''}"
+
+
+def payload(value, limit: int = None) -> _Payload:
+    """Wraps a large value so it is rendered lazily as a head/tail sample of at most LOG_PAYLOAD_CHARS characters."""
+    return _Payload(value, limit)
+
+
+class TraceIdFilter(logging.Filter):
+    """Stamps every record with the trace id of the request being served ("-" outside a request)."""
+
+    def filter(self, record):
+        record.trace_id = current_trace_id() or "-"
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "trace_id": getattr(record, "trace_id", "-"),
+            "location": f"{record.filename}:{record.lineno}",
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _apply_module_levels(spec: str):
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        name, level = item.split("=", 1)
+        logging.getLogger(name.strip()).setLevel(level.strip().upper())
+
+
+_handler = logging.StreamHandler(sys.stdout)
+_handler.addFilter(TraceIdFilter())
+if LOG_FORMAT == "json":
+    _handler.setFormatter(JsonFormatter(datefmt="%Y-%m-%d %H:%M:%S"))
+
 logging.basicConfig(
-    level=logging.INFO,
-    format="[%(levelname)s] %(asctime)s - %(filename)s:%(lineno)d - %(message)s",
-    handlers=[logging.StreamHandler(sys.stdout)],
+    level=LOG_LEVEL,
+    format="[%(levelname)s] %(asctime)s - [%(trace_id)s] %(filename)s:%(lineno)d - %(message)s",
+    handlers=[_handler],
     datefmt="%Y-%m-%d %H:%M:%S",
     force=True,
 )
-
+_apply_module_levels(LOG_LEVELS)
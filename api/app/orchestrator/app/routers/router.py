@@ -3,6 +3,8 @@ from app.errors.errors import ROUTE_ERRORS as RO_E
 from fastapi import APIRouter,HTTPException,UploadFile,Form,File
 from enum import Enum
 from app.middleware.security import verify_bearer_token
+from app.metrics import metrics_response
+from app.tracing import TRACE_STORE, waterfall
 from fastapi import Depends
 import os
 import requests
@@ -67,6 +69,22 @@ async def root():
     return {"message-info": "server is up"}
 
 
+@router.get("/metrics")
+async def metrics():
+    return metrics_response()
+
+
+
+@router.get("/debug/trace/{trace_id}", dependencies=[Depends(verify_bearer_token)])
+async def debug_trace(trace_id: str):
+    trace = TRACE_STORE.get(trace_id)
+    if trace is None:
+        return error_response(
+            code=RO_E["CODE_ERROR_TRACE_NOT_FOUND"],
+            message=RO_E["ERROR_TRACE_NOT_FOUND"]
+        )
+    return success_response(waterfall(trace))
+
 
 @router.post('/upload', dependencies=[Depends(verify_bearer_token)])
 async def upload_file(
@@ -0,0 +1,176 @@
+"""
+Reader for the compact model folders written by utils/ml_strategies/compact_artifacts.py
+(the training side; the API can't import the root utils/ package, keep both in sync).
+
+Vocabulary hashes, idf and linear weights are memory-mapped .npy files, so loading a
+model only parses two small JSON files and every worker shares the same page cache,
+instead of unpickling a Python dict with one string per term.
+"""
+import hashlib
+import json
+import re
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+
+
+def is_compact_folder(path) -> bool:
+    return Path(path).is_dir() and (Path(path) / "vectorizer.json").exists()
+
+
+_NGRAM_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def token_hash(token):
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _mix(x):
+    # splitmix64 finalizer (uint64 arithmetic wraps around)
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def ngram_hashes(token_hashes, n):
+    """Hash of every n-gram of a token sequence, from the hashes of its tokens."""
+    count = len(token_hashes) - n + 1
+    if count <= 0:
+        return np.empty(0, dtype=np.uint64)
+    hashes = np.full(count, n, dtype=np.uint64)
+    for i in range(n):
+        hashes = _mix((hashes * _NGRAM_MULTIPLIER) ^ token_hashes[i:i + count])
+    return hashes
+
+
+class CompactVectorizer:
+    """Same transform() as the exported TfidfVectorizer, over memory-mapped arrays."""
+
+    def __init__(self, folder):
+        folder = Path(folder)
+        with open(folder / "vectorizer.json", "r", encoding="utf-8") as f:
+            config = json.load(f)
+        self.n_features = config["n_features"]
+        self.lowercase = config["lowercase"]
+        self.token_re = re.compile(config["token_pattern"])
+        self.min_n, self.max_n = config["ngram_range"]
+        self.stop_words = frozenset(config["stop_words"]) if config["stop_words"] is not None else None
+        self.sublinear_tf = config["sublinear_tf"]
+        self.norm = config["norm"]
+        self.binary = config["binary"]
+        self.hashes = np.load(folder / "vocab_hashes.npy", mmap_mode="r")
+        self.columns = np.load(folder / "vocab_columns.npy", mmap_mode="r")
+        self.idf = np.load(folder / "idf.npy", mmap_mode="r")
+        self.terms = None
+        if config["has_terms"]:
+            self.terms = np.memmap(folder / "terms.bin", dtype=np.uint8, mode="r") if self.n_features else b""
+            self.term_offsets = np.load(folder / "term_offsets.npy", mmap_mode="r")
+
+    def _ngram_hashes(self, doc):
+        # same tokens and n-grams as sklearn's build_analyzer() for analyzer="word", hashed
+        tokens = self.token_re.findall(doc.lower() if self.lowercase else doc)
+        if self.stop_words is not None:
+            tokens = [w for w in tokens if w not in self.stop_words]
+        known = {}
+        hashes = np.fromiter(
+            (known[t] if t in known else known.setdefault(t, token_hash(t)) for t in tokens),
+            dtype=np.uint64, count=len(tokens),
+        )
+        return np.concatenate([ngram_hashes(hashes, n) for n in range(self.min_n, self.max_n + 1)])
+
+    def _lookup(self, hashes):
+        """Column of each hash, -1 when it is not in the vocabulary."""
+        if not len(self.hashes):
+            return np.full(len(hashes), -1)
+        positions = np.minimum(np.searchsorted(self.hashes, hashes), len(self.hashes) - 1)
+        return np.where(self.hashes[positions] == hashes, self.columns[positions], -1)
+
+    def transform(self, documents):
+        indptr, indices, data = [0], [], []
+        for doc in documents:
+            hashes, counts = np.unique(self._ngram_hashes(doc), return_counts=True)
+            columns = self._lookup(hashes)
+            values = counts.astype(np.float64)
+            keep = columns >= 0
+            columns, values = columns[keep], values[keep]
+            order = np.argsort(columns)
+            indices.append(columns[order])
+            data.append(values[order])
+            indptr.append(indptr[-1] + len(columns))
+        X = sp.csr_matrix(
+            (np.concatenate(data) if data else np.empty(0), np.concatenate(indices) if indices else np.empty(0, dtype=np.int64),
+             np.array(indptr)),
+            shape=(len(indptr) - 1, self.n_features),
+        )
+        if self.binary:
+            X.data[:] = 1
+        if self.sublinear_tf:
+            np.log(X.data, X.data)
+            X.data += 1
+        X.data *= self.idf[X.indices]
+        if self.norm is not None:
+            row = np.repeat(np.arange(X.shape[0]), np.diff(X.indptr))
+            norms = np.zeros(X.shape[0])
+            np.add.at(norms, row, np.abs(X.data) if self.norm == "l1" else X.data ** 2)
+            norms = norms if self.norm == "l1" else np.sqrt(norms)
+            X.data /= np.where(norms == 0, 1, norms)[row]
+        return X
+
+    def feature_names(self, columns):
+        """Terms of the given columns (needs an export with include_terms=True)."""
+        if self.terms is None:
+            raise ValueError("This vectorizer was exported without its terms")
+        return [bytes(self.terms[self.term_offsets[c]:self.term_offsets[c + 1]]).decode("utf-8") for c in columns]
+
+
+class CompactClassifier:
+    """Vectorizer + classifier exported by export_classifier; predict(documents) returns labels."""
+
+    def __init__(self, folder):
+        folder = Path(folder)
+        with open(folder / "model.json", "r", encoding="utf-8") as f:
+            model = json.load(f)
+        self.kind = model["kind"]
+        self.classes = np.array(model["classes"], dtype=object)
+        self.vectorizer = CompactVectorizer(folder)
+        if self.kind == "xgboost":
+            import xgboost as xgb
+            self.booster = xgb.Booster()
+            self.booster.load_model(str(folder / "booster.ubj"))
+        else:
+            self.coef_t = sp.csr_matrix(
+                (np.load(folder / "coef_data.npy", mmap_mode="r"), np.load(folder / "coef_indices.npy", mmap_mode="r"),
+                 np.load(folder / "coef_indptr.npy", mmap_mode="r")),
+                shape=(self.vectorizer.n_features, model["n_coef_rows"]), copy=False,
+            )
+            self.intercept = np.load(folder / "intercept.npy", mmap_mode="r")
+            if self.kind == "svc_ovo":
+                # libsvm's pair order: (0,1), (0,2), ..., (1,2), ...
+                n_classes = model["n_classes"]
+                self.pairs = np.array([(i, j) for i in range(n_classes) for j in range(i + 1, n_classes)])
+
+    def predict_encoded(self, X):
+        if self.kind == "xgboost":
+            import xgboost as xgb
+            scores = self.booster.predict(xgb.DMatrix(X))
+            if scores.ndim == 1:
+                return (scores > 0.5).astype(int)
+            return np.argmax(scores, axis=1)
+        decision = (X @ self.coef_t).toarray() + self.intercept
+        if self.kind == "svc_ovo" and len(self.classes) == 2:
+            # sklearn flips the sign of binary SVCs: libsvm's "> 0 votes class 0" becomes "< 0"
+            return (decision[:, 0] >= 0).astype(int)
+        if self.kind == "svc_ovo":
+            # decision > 0 votes for the first class of the pair; ties go to the lowest class
+            winners = np.where(decision > 0, self.pairs[:, 0], self.pairs[:, 1])
+            votes = np.stack([np.bincount(row, minlength=len(self.classes)) for row in winners])
+            return np.argmax(votes, axis=1)
+        if decision.shape[1] == 1:
+            return (decision[:, 0] > 0).astype(int)
+        return np.argmax(decision, axis=1)
+
+    def predict(self, documents):
+        return self.classes[self.predict_encoded(self.vectorizer.transform(documents))]
@@ -1,40 +1,61 @@
 import joblib
 from app.logging_config import logging
+from app.metrics import observe_stage
+from app.service.compact_model import CompactClassifier, is_compact_folder
 from pathlib import Path
 
 class TypeIdentifier:
-    def __init__(self, path_clf: str, path_vectorizer: str, path_label_encoder: str):
+    def __init__(self, path_clf: str, path_vectorizer: str, path_label_encoder: str, compact_dir: str = None):
         base_dir = Path(__file__).resolve().parent.parent  # llega a `orchestrator/`
+        self.logger = logging.getLogger(__name__)
+        # compact export (utils/ml_strategies/compact_artifacts.py) when present: memory-mapped, no unpickling
+        self.compact = None
+        if compact_dir and is_compact_folder(base_dir / compact_dir):
+            self.compact = CompactClassifier(base_dir / compact_dir)
+            self.logger.info("type identifier loaded from compact model %s", compact_dir)
+            return
         self.clf = joblib.load(base_dir / path_clf)
         self.vectorizer = joblib.load(base_dir / path_vectorizer)
         self.label_encoder = joblib.load(base_dir / path_label_encoder)
-        self.logger = logging.getLogger(__name__)
 
     def predecir_tipo_documento(self, texto: str) -> str:
-        logging.info(f"loading tyoe identifier model")
-        vector = self.vectorizer.transform([texto])
-        logging.info(f"predicting type of document")
-        prediccion = self.clf.predict(vector)
-        result = self.label_encoder.inverse_transform(prediccion)[0]
-        logging.info(f"type of document: {result}")
+        self.logger.debug("vectorizing text for type identifier")
+        with observe_stage("type_vectorize"):
+            vector = (self.compact.vectorizer if self.compact else self.vectorizer).transform([texto])
+        self.logger.debug("predicting type of document")
+        with observe_stage("type_predict"):
+            if self.compact:
+                result = self.compact.classes[self.compact.predict_encoded(vector)][0]
+            else:
+                result = self.label_encoder.inverse_transform(self.clf.predict(vector))[0]
+        self.logger.info("type of document: %s", result)
         return result
 
 
 class SubjectIdentifier:
-    def __init__(self, path_classifier: str, path_vectorizer: str, path_label_encoder: str):
+    def __init__(self, path_classifier: str, path_vectorizer: str, path_label_encoder: str, compact_dir: str = None):
         base_dir = Path(__file__).resolve().parent.parent
+        self.logger = logging.getLogger(__name__)
+        self.compact = None
+        if compact_dir and is_compact_folder(base_dir / compact_dir):
+            self.compact = CompactClassifier(base_dir / compact_dir)
+            self.logger.info("subject identifier loaded from compact model %s", compact_dir)
+            return
         self.classifier = joblib.load(base_dir / path_classifier)
         self.vectorizer = joblib.load(base_dir / path_vectorizer)
         self.label_encoder = joblib.load(base_dir / path_label_encoder)
-        self.logger = logging.getLogger(__name__)
 
     def predecir_subject(self, texto: str) -> str:
-        logging.info(f"loading subject identifier model")
-        vector = self.vectorizer.transform([texto])
-        logging.info(f"predicting subject")
-        prediccion = self.classifier.predict(vector)
-        subject = self.label_encoder.inverse_transform(prediccion)
-        logging.info(f"subject: {subject[0]}")
+        self.logger.debug("vectorizing text for subject identifier")
+        with observe_stage("subject_vectorize"):
+            vector = (self.compact.vectorizer if self.compact else self.vectorizer).transform([texto])
+        self.logger.debug("predicting subject")
+        with observe_stage("subject_predict"):
+            if self.compact:
+                subject = self.compact.classes[self.compact.predict_encoded(vector)]
+            else:
+                subject = self.label_encoder.inverse_transform(self.classifier.predict(vector))
+        self.logger.info("subject: %s", subject[0])
         return subject[0]
 
 
@@ -1,11 +1,14 @@
 from dotenv import load_dotenv
 import os
 from fastapi import UploadFile
-from app.logging_config import logging
+from app.logging_config import logging, payload
+from app.metrics import observe_stage
+from app.tracing import inject_headers, absorb_remote_spans
 import requests
 from app.service.indentifier import TypeIdentifier, SubjectIdentifier
 from app.service.strategies.type_strategy import LibroStrategy,TesisStrategy,ArticuloStrategy,ObjectConferenceStrategy,GeneralStrategy
 from app.service.pattern_extractors import extract_abstract, extract_keywords_regex, extract_keywords_tfidf, load_vectorizer
+from app.service.text_matcher import TextIndex
 import io
 from typing import Tuple, Optional, Union
 from app.constants.constant import PROMPT_DEEPANALYZE, MAX_WORDS_NO_TAGS, MAX_WORDS_WITH_TAGS
@@ -23,12 +26,14 @@ class Orchestrator:
         self.type_identifier = TypeIdentifier(
             path_clf=os.getenv("IDENTIFIER_PATH_MODEL"),
             path_vectorizer=os.getenv("IDENTIFIER_PATH_VECTORIZER"),
-            path_label_encoder=os.getenv("IDENTIFIER_PATH_LABEL_ENCODER")
+            path_label_encoder=os.getenv("IDENTIFIER_PATH_LABEL_ENCODER"),
+            compact_dir=os.getenv("IDENTIFIER_COMPACT_DIR")
         )
         self.subject_identifier = SubjectIdentifier(
             path_classifier=os.getenv("SUBJECT_IDENTIFIER_PATH_CLASSIFIER", "models/svm_classifier.pkl"),
             path_vectorizer=os.getenv("SUBJECT_IDENTIFIER_PATH_VECTORIZER", "models/svm_vectorizer.pkl"),
-            path_label_encoder=os.getenv("SUBJECT_IDENTIFIER_PATH_LABEL_ENCODER", "models/svm_label_encoder.pkl")
+            path_label_encoder=os.getenv("SUBJECT_IDENTIFIER_PATH_LABEL_ENCODER", "models/svm_label_encoder.pkl"),
+            compact_dir=os.getenv("SUBJECT_IDENTIFIER_COMPACT_DIR")
         )
 
         vectorizer_path = os.getenv("TFIDF_VECTORIZER_PATH", "app/models/tfidf_vectorizer.pkl")
@@ -247,19 +252,15 @@ class Orchestrator:
         """
         if not text:
             return metadata
+        index = TextIndex(text)
 
         # ISSN: check if exact value (e.g. "1234-5678") appears in text
-        if metadata.get("issn"):
-            if str(metadata["issn"]) not in text:
-                metadata["issn"] = None
+        if metadata.get("issn") and not index.contains_exact(metadata["issn"]):
+            metadata["issn"] = None
 
         # ISBN: compare both raw and digit-only forms (handles hyphenation differences)
-        if metadata.get("isbn"):
-            isbn_raw = str(metadata["isbn"])
-            isbn_digits = re.sub(r'[-\s]', '', isbn_raw)
-            text_digits = re.sub(r'[-\s]', '', text)
-            if isbn_raw not in text and isbn_digits not in text_digits:
-                metadata["isbn"] = None
+        if metadata.get("isbn") and not index.contains_identifier(metadata["isbn"]):
+            metadata["isbn"] = None
 
         return metadata
 
@@ -268,12 +269,14 @@ class Orchestrator:
         stream = io.BytesIO(file_bytes)
         payload = (filename, stream, content_type)
 
-        response_extractor = requests.post(
-            self.extractor_service_url + "/extract",
-            headers=self._get_headers(api_key=self.extractor_service_api_key),
-            files={"file": payload},
-            data={"normalization": normalization, "ocr": ocr, "max_words": MAX_WORDS_NO_TAGS}
-        )
+        with observe_stage("extractor_call"):
+            response_extractor = requests.post(
+                self.extractor_service_url + "/extract",
+                headers=inject_headers(self._get_headers(api_key=self.extractor_service_api_key)),
+                files={"file": payload},
+                data={"normalization": normalization, "ocr": ocr, "max_words": MAX_WORDS_NO_TAGS}
+            )
+            absorb_remote_spans(response_extractor)
 
         extractor_json = response_extractor.json()
         if response_extractor.status_code != 200:
@@ -292,18 +295,20 @@ class Orchestrator:
         stream = io.BytesIO(file_bytes)
         payload = (filename, stream, content_type)
 
-        response_extractor = requests.post(
-            self.extractor_service_url + "/extract",
-            headers=self._get_headers(api_key=self.extractor_service_api_key),
-            files={"file": payload},
-            data={
-                "normalization": normalization,
-                "ocr": False,
-                "max_words": MAX_WORDS_NO_TAGS,
-                "multicolumn": True,
-                "strip_footers": True,
-            }
-        )
+        with observe_stage("extractor_multicolumn_call"):
+            response_extractor = requests.post(
+                self.extractor_service_url + "/extract",
+                headers=inject_headers(self._get_headers(api_key=self.extractor_service_api_key)),
+                files={"file": payload},
+                data={
+                    "normalization": normalization,
+                    "ocr": False,
+                    "max_words": MAX_WORDS_NO_TAGS,
+                    "multicolumn": True,
+                    "strip_footers": True,
+                }
+            )
+            absorb_remote_spans(response_extractor)
 
         extractor_json = response_extractor.json()
         if response_extractor.status_code != 200:
@@ -324,11 +329,13 @@ class Orchestrator:
         input = f"""{PROMPT_DEEPANALYZE}{fields_str}[FIN METADATOS A VALIDAR]```
         [TEXTO]: {text} [FIN TEXTO]"""
 
-        response_llm = requests.post(
-            self.llm_deepanalyze_url + "/consume-llm",
-            headers=headers,
-            json={"text": input}
-        )
+        with observe_stage("deepanalyze_call"):
+            response_llm = requests.post(
+                self.llm_deepanalyze_url + "/consume-llm",
+                headers=inject_headers(headers),
+                json={"text": input}
+            )
+            absorb_remote_spans(response_llm)
 
         response_json = response_llm.json()
 
@@ -385,12 +392,14 @@ class Orchestrator:
             stream2 = io.BytesIO(file_bytes)
             payload2 = (filename, stream2, content_type)
 
-            response_extractor_with_tags = requests.post(
-                self.extractor_service_url + "/extract-with-tags",
-                headers=self._get_headers(api_key=self.extractor_service_api_key),
-                files={"file": payload2},
-                data={"normalization": normalization, "ocr": ocr, "max_words": MAX_WORDS_WITH_TAGS}
-            )
+            with observe_stage("extractor_tags_call"):
+                response_extractor_with_tags = requests.post(
+                    self.extractor_service_url + "/extract-with-tags",
+                    headers=inject_headers(self._get_headers(api_key=self.extractor_service_api_key)),
+                    files={"file": payload2},
+                    data={"normalization": normalization, "ocr": ocr, "max_words": MAX_WORDS_WITH_TAGS}
+                )
+                absorb_remote_spans(response_extractor_with_tags)
 
             extractor_with_tags_json = response_extractor_with_tags.json()
             if response_extractor_with_tags.status_code != 200:
@@ -422,17 +431,18 @@ class Orchestrator:
             
             # Clean honorific titles from name fields before returning
             if error is None:
-                metadata = self._clean_metadata_honorifics(metadata)
-                metadata = self._deduplicate_person_fields(metadata)
-                metadata = self._normalize_person_fields(metadata)
-                metadata = self._validate_field_formats(metadata)
-                metadata = self._validate_identifiers_in_text(metadata, extracted_text_with_metadata)
+                with observe_stage("postprocess"):
+                    metadata = self._clean_metadata_honorifics(metadata)
+                    metadata = self._deduplicate_person_fields(metadata)
+                    metadata = self._normalize_person_fields(metadata)
+                    metadata = self._validate_field_formats(metadata)
+                    metadata = self._validate_identifiers_in_text(metadata, extracted_text_with_metadata)
 
                 # step 5: pattern-based abstract on column-ordered text (or plain if single-column);
                 # keywords always use plain_text (footer content helps type/subject models).
                 if not metadata.get("abstract"):
                     extracted_abstract = extract_abstract(abstract_text)
-                    self.logger.info(f"DEBUG abstract raw: {repr(extracted_abstract[:400]) if extracted_abstract else 'EMPTY'}")
+                    self.logger.debug("abstract raw: %s", payload(extracted_abstract or "EMPTY"))
                     if extracted_abstract:
                         metadata["abstract"] = extracted_abstract
 
@@ -440,10 +450,11 @@ class Orchestrator:
                     before = metadata["abstract"]
                     metadata["abstract"] = self._fix_hyphenation(metadata["abstract"])
                     if before != metadata["abstract"]:
-                        self.logger.info(f"DEBUG hyphenation changed abstract: {repr(before[:120])} → {repr(metadata['abstract'][:120])}")
+                        self.logger.debug("hyphenation changed abstract: %s → %s", payload(before, 120), payload(metadata["abstract"], 120))
 
-                kw_real      = extract_keywords_regex(plain_text)
-                kw_suggested = extract_keywords_tfidf(plain_text, self.vectorizer)
+                with observe_stage("keywords"):
+                    kw_real      = extract_keywords_regex(plain_text)
+                    kw_suggested = extract_keywords_tfidf(plain_text, self.vectorizer)
                 metadata["keywords"] = {"real": kw_real, "suggested": kw_suggested}
 
             return metadata, error
@@ -5,7 +5,7 @@ Strategies:
   extract_abstract(text)              — regex heading detection (strategy_b_regex)
   extract_keywords_regex(text)        — explicit 'Keywords:' section regex
   extract_keywords_tfidf(text, vec)   — PMI-vocabulary TF-IDF ranking
-  load_vectorizer(path)               — load pickled TfidfVectorizer
+  load_vectorizer(path)               — load compact (memory-mapped) or pickled TfidfVectorizer
 """
 
 import pickle
@@ -14,6 +14,8 @@ from collections import defaultdict, Counter
 from difflib import SequenceMatcher
 from pathlib import Path
 
+from app.service.compact_model import CompactVectorizer, is_compact_folder
+
 # ── Optional sklearn / nltk imports ──────────────────────────────────────────
 
 try:
@@ -312,8 +314,9 @@ def extract_keywords_tfidf(text: str, vectorizer) -> list:
     try:
         clean = _strip_urls(text)
         vec = vectorizer.transform([clean])
-        names = vectorizer.get_feature_names_out()
-        scores = vec.toarray()[0]
+        # only the document's own (nonzero) columns, in column order
+        columns = sorted(int(c) for c, v in zip(vec.indices, vec.data) if v > 0)
+        names = _feature_names(vectorizer, columns)
 
         words_in_doc = _TOK_RE.findall(clean.lower())
         raw_tf = Counter(words_in_doc)
@@ -330,7 +333,7 @@ def extract_keywords_tfidf(text: str, vectorizer) -> list:
             cnt = _raw_count(term)
             return cnt * _BIGRAM_BOOST if len(term.split()) == 2 else float(cnt)
 
-        present = [(names[i], _boosted_count(names[i])) for i in range(len(names)) if scores[i] > 0]
+        present = [(name, _boosted_count(name)) for name in names]
         ranked = [term for term, _ in sorted(present, key=lambda x: -x[1])]
 
         word_to_bigrams: dict = defaultdict(list)
@@ -373,10 +376,33 @@ def extract_keywords_tfidf(text: str, vectorizer) -> list:
         return []
 
 
+def _feature_names(vectorizer, columns: list) -> list:
+    if isinstance(vectorizer, CompactVectorizer):
+        return vectorizer.feature_names(columns)
+    # get_feature_names_out() rebuilds the whole array on every call
+    names = getattr(vectorizer, "_cached_feature_names", None)
+    if names is None:
+        names = vectorizer._cached_feature_names = vectorizer.get_feature_names_out()
+    return [names[c] for c in columns]
+
+
 def load_vectorizer(path: str):
-    """Load a pickled TfidfVectorizer. Returns None if path doesn't exist or load fails."""
+    """
+    Load the keyword TfidfVectorizer. A compact export (folder with vectorizer.json, see
+    compact_model.py) is preferred, either at path itself or next to the pickle with the
+    same name (tfidf_vectorizer.pkl -> tfidf_vectorizer/). Falls back to the pickle.
+    Returns None if nothing exists or loading fails.
+    """
     p = Path(path)
-    if not p.exists():
+    for folder in (p, p.with_suffix("")):
+        if is_compact_folder(folder):
+            try:
+                vectorizer = CompactVectorizer(folder)
+                if vectorizer.terms is not None:
+                    return vectorizer
+            except Exception:
+                pass
+    if not p.is_file():
         return None
     try:
         with open(p, "rb") as f:
@@ -1,7 +1,9 @@
 from abc import ABC, abstractmethod
 from dotenv import load_dotenv
 import os
-from app.logging_config import logging
+from app.logging_config import logging, payload
+from app.metrics import observe_stage
+from app.tracing import inject_headers, absorb_remote_spans
 import requests
 from typing import Tuple, Optional
 
@@ -18,11 +20,13 @@ class TypeStrategy(ABC):
             "Content-Type": "application/json"
         }
         self.logger.info(f"calling llm service url: {url}")
-        response_llm = requests.post(
-            url,
-            headers=headers,
-            json={"text": input}
-        )
+        with observe_stage("llm_call"):
+            response_llm = requests.post(
+                url,
+                headers=inject_headers(headers),
+                json={"text": input}
+            )
+            absorb_remote_spans(response_llm)
 
         response_json = response_llm.json()
 
@@ -30,14 +34,13 @@ class TypeStrategy(ABC):
             self.logger.error(f"LLM error: {response_json['error']}")
             return response_json, response_json["error"]["code"]
 
-        self.logger.info(f"response from llm service: {response_json}")
+        self.logger.debug("response from llm service: %s", payload(response_json))
         return response_json["data"], None
     
     def check_and_add_missing_keys(self, metadata: dict, keys: list) -> dict:
         for key in keys:
-            self.logger.info(f"checking key: {key}")
             if key not in metadata:
-                self.logger.info(f"adding key: {key}")
+                self.logger.info("adding missing key: %s", key)
                 metadata[key] = ""
         return metadata
     
@@ -49,7 +52,6 @@ class TypeStrategy(ABC):
             url=self.llm_service_url
         )
         if error is None:
-            self.logger.info(f"response from llm service: {response}")
             response = self.check_and_add_missing_keys(response, keys)
         return response, error
 
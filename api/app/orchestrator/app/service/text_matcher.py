@@ -0,0 +1,49 @@
+"""
+Per-document search index for checking metadata values against the document text.
+
+The text is normalized once per document (lowercased, plus a digits-only form built
+on first use for hyphenation-insensitive identifier checks) and every field check
+reuses it, instead of lowercasing or re-scanning the whole text once per field.
+
+Duplicate of utils/normalization/text_matcher.py (used by the dataset
+pipeline's exact-match validator), since the API can't import the root-level
+utils/ package.
+"""
+import re
+
+# A Creative Commons mention: "Creative Commons" (also inside creativecommons.org/licenses/... URLs)
+# or an abbreviation like CC BY / CC-BY-NC-SA. Only whether it matches is used, so no version parts.
+CREATIVE_COMMONS_RE = re.compile(r"creative\s*commons|cc[-\s]*by")
+_SEPARATORS_RE = re.compile(r"[-\s]")
+
+
+class TextIndex:
+
+    def __init__(self, text):
+        self.text = text or ""
+        self.lowered = self.text.lower()
+        self._digits = None
+
+    @property
+    def digits(self):
+        """The text without hyphens and whitespace (ISBN/ISSN written with or without separators)."""
+        if self._digits is None:
+            self._digits = _SEPARATORS_RE.sub("", self.text)
+        return self._digits
+
+    def contains(self, value):
+        """Case-insensitive substring check."""
+        return bool(value) and str(value).lower() in self.lowered
+
+    def contains_exact(self, value):
+        return bool(value) and str(value) in self.text
+
+    def contains_identifier(self, value):
+        """Exact value, or the value without separators in the text without separators."""
+        if not value:
+            return False
+        value = str(value)
+        return value in self.text or _SEPARATORS_RE.sub("", value) in self.digits
+
+    def has_creative_commons(self):
+        return CREATIVE_COMMONS_RE.search(self.lowered) is not None
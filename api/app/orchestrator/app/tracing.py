@@ -0,0 +1,213 @@
+"""
+Request tracing across the services.
+
+The trace context travels between services in the W3C `traceparent` header
+(`00-<trace_id>-<parent_span_id>-01`). Every service opens a root span for the
+request it serves, records a child span for each stage timed with
+`app.metrics.observe_stage`, and returns its spans in the `X-Trace-Spans`
+response header. The caller folds those spans into its own trace, so the
+orchestrator ends up holding the whole waterfall of an /upload.
+
+Repeated stages under the same parent (one `word_extraction` per page) are
+folded into a single span with a `count`, which keeps the header small.
+
+Finished traces are kept in a bounded in-memory store (TRACE_STORE_SIZE).
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional
+
+from fastapi import Request
+
+SERVICE_NAME = os.getenv("SERVICE_NAME", "orchestrator")
+TRACE_STORE_SIZE = int(os.getenv("TRACE_STORE_SIZE", "200"))
+
+TRACEPARENT_HEADER = "traceparent"
+TRACE_ID_HEADER = "X-Trace-Id"
+SPANS_HEADER = "X-Trace-Spans"
+
+# Probes and scrapes would only evict useful traces from the store
+UNTRACED_PATHS = {"/health", "/metrics"}
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def _new_trace_id() -> str:
+    return uuid.uuid4().hex
+
+
+def _new_span_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def parse_traceparent(value: Optional[str]):
+    """Returns (trace_id, parent_span_id) from a traceparent header, or (None, None) if invalid."""
+    if not value:
+        return None, None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None, None
+    return parts[1], parts[2]
+
+
+class Trace:
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def open_span(self, name: str, parent_id: Optional[str], fold: bool = False) -> dict:
+        with self._lock:
+            if fold:
+                for span in self.spans:
+                    if span["name"] == name and span["parent_id"] == parent_id and span["service"] == SERVICE_NAME:
+                        return span
+            span = {
+                "span_id": _new_span_id(),
+                "parent_id": parent_id,
+                "name": name,
+                "service": SERVICE_NAME,
+                "start": time.time(),
+                "duration_ms": 0.0,
+                "count": 0,
+                "attributes": {},
+            }
+            self.spans.append(span)
+            return span
+
+    def add_remote_spans(self, spans: list):
+        with self._lock:
+            self.spans.extend(spans)
+
+    def local_spans(self) -> list:
+        return [span for span in self.spans if span["service"] == SERVICE_NAME]
+
+
+class TraceStore:
+    """Keeps the last `max_size` finished traces, oldest evicted first."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._traces = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, trace: Trace):
+        with self._lock:
+            self._traces[trace.trace_id] = trace
+            self._traces.move_to_end(trace.trace_id)
+            while len(self._traces) > self.max_size:
+                self._traces.popitem(last=False)
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        with self._lock:
+            return self._traces.get(trace_id)
+
+
+TRACE_STORE = TraceStore(TRACE_STORE_SIZE)
+
+
+def current_trace_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.trace_id if trace else None
+
+
+@contextmanager
+def trace_span(name: str, fold: bool = True, **attributes):
+    """Records the block as a child span of the current one. No-op outside a traced request."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    span = trace.open_span(name, _current_span.get(), fold=fold)
+    span["attributes"].update(attributes)
+    token = _current_span.set(span["span_id"])
+    start = time.perf_counter()
+    try:
+        yield span
+    finally:
+        span["duration_ms"] += (time.perf_counter() - start) * 1000
+        span["count"] += 1
+        _current_span.reset(token)
+
+
+def inject_headers(headers: dict) -> dict:
+    """Adds the traceparent of the current span to the headers of an outgoing request."""
+    trace = _current_trace.get()
+    span_id = _current_span.get()
+    if trace is not None and span_id is not None:
+        headers[TRACEPARENT_HEADER] = f"00-{trace.trace_id}-{span_id}-01"
+    return headers
+
+
+def absorb_remote_spans(response):
+    """Folds the spans a downstream service returned in X-Trace-Spans into the current trace."""
+    trace = _current_trace.get()
+    raw = response.headers.get(SPANS_HEADER)
+    if trace is None or not raw:
+        return
+    try:
+        spans = json.loads(raw)
+    except ValueError:
+        return
+    trace.add_remote_spans([span for span in spans if isinstance(span, dict) and "span_id" in span])
+
+
+async def tracing_middleware(request: Request, call_next):
+    if request.url.path in UNTRACED_PATHS:
+        return await call_next(request)
+
+    trace_id, parent_id = parse_traceparent(request.headers.get(TRACEPARENT_HEADER))
+    trace = Trace(trace_id or _new_trace_id())
+    root = trace.open_span(f"{request.method} {request.url.path}", parent_id)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(root["span_id"])
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+        root["attributes"]["status"] = response.status_code
+    finally:
+        root["duration_ms"] = (time.perf_counter() - start) * 1000
+        root["count"] = 1
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        TRACE_STORE.add(trace)
+
+    response.headers[TRACE_ID_HEADER] = trace.trace_id
+    response.headers[SPANS_HEADER] = json.dumps(trace.local_spans(), separators=(",", ":"))
+    return response
+
+
+def waterfall(trace: Trace) -> dict:
+    """Orders the spans depth-first by start time, with offsets relative to the start of the trace."""
+    children = {}
+    span_ids = {span["span_id"] for span in trace.spans}
+    for span in trace.spans:
+        parent = span["parent_id"] if span["parent_id"] in span_ids else None
+        children.setdefault(parent, []).append(span)
+
+    trace_start = min((span["start"] for span in trace.spans), default=0.0)
+    rows = []
+
+    def visit(parent_id, depth):
+        for span in sorted(children.get(parent_id, []), key=lambda s: s["start"]):
+            rows.append({
+                "name": span["name"],
+                "service": span["service"],
+                "depth": depth,
+                "offset_ms": round((span["start"] - trace_start) * 1000, 1),
+                "duration_ms": round(span["duration_ms"], 1),
+                "count": span["count"],
+                "attributes": span["attributes"],
+            })
+            visit(span["span_id"], depth + 1)
+
+    visit(None, 0)
+    total = max((row["offset_ms"] + row["duration_ms"] for row in rows), default=0.0)
+    return {"trace_id": trace.trace_id, "duration_ms": round(total, 1), "spans": rows}
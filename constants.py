@@ -22,7 +22,8 @@ SUBJECT_MODEL_FOLDERS = {
     "embeddings": SUBJECT_MODEL_FOLDER / "embeddings",
     "embeddings_knn": SUBJECT_MODEL_FOLDER / "embeddings_knn",
     "neural": SUBJECT_MODEL_FOLDER / "neural",
-    "minilm": SUBJECT_MODEL_FOLDER / "minilm"
+    "minilm": SUBJECT_MODEL_FOLDER / "minilm",
+    "hashing": SUBJECT_MODEL_FOLDER / "hashing"
 }
 SUBJECT_MODEL_RESULTS_FOLDER = ROOT_DIR / "fine_tune_subject/model_results"
 
@@ -39,8 +40,11 @@ TYPE_MODEL_FOLDERS = {
     "embeddings_knn": TYPE_MODEL_FOLDER / "embeddings_knn",
     "neural": TYPE_MODEL_FOLDER / "neural",
     "minilm": TYPE_MODEL_FOLDER / "minilm",
+    "hashing": TYPE_MODEL_FOLDER / "hashing",
 }
 TYPE_MODEL_RESULTS_FOLDER = ROOT_DIR / "fine_tune_type/model_results"
+EMBEDDING_CACHE_FOLDER = DATA_FOLDER / "embeddings_cache"  # sentence-transformer embeddings shared by the strategies (utils/ml_strategies/embedding_store.py)
+TRAINING_WORKERS = None  # processes for "train all" / model comparison, 1 = sequential, None = one per strategy (capped at the CPUs)
 
 RESULT_FOLDER_VALIDATION = ROOT_DIR / "validation/result/"
 
@@ -60,11 +64,17 @@ OPENAI_REQUEST_LIMIT = {
     "tok_per_min": 200000,
 }
 OPENAI_MODEL = "gpt-5-mini"
+CLEAN_WORKERS = 8  # concurrent cleaning requests; the token-bucket limiter keeps them inside the limits above
+CLEAN_USE_BATCH = False  # submit the cleaning requests through the provider batch API (cheaper, no per-minute limits, up to 24h)
+CLEAN_BATCH_MAX_REQUESTS = 2000  # requests per batch input file (keeps files under the providers' upload size limits)
+CLEAN_BATCH_POLL_SECONDS = 60
 
 URL_SERVICES_EXTRACTION = "http://localhost:8000/upload"
 DATASET_SEDICI_URL_BASE = "https://sedici.unlp.edu.ar/oai/openaire?verb=ListRecords&resumptionToken=oai_dc////"
 DOWNLOAD_URL = "https://sedici.unlp.edu.ar"
 PDF_URL = DOWNLOAD_URL + "/bitstream/handle/"
+DOWNLOAD_WORKERS = 4  # parallel PDF downloads (utils/download/pdf_downloader.py)
+DOWNLOAD_REQUESTS_PER_SECOND = 2.0  # politeness limit per host, shared by all download workers
 GROBID_URL = "http://localhost:8070/api/processFulltextDocument"
 GROBID_SERVICE = "http://localhost:8070"
 GROBID_FOLDER = RESULT_FOLDER_VALIDATION / "GROBID"
@@ -81,6 +91,15 @@ DATASET_WITH_METADATA_AND_TEXT_DOC = "metadata_sedici_and_text_with_ocr.json" #i
 DATASET_TYPE = "dataset_type.json"
 CSV_SEDICI = "sedici.csv"
 CSV_SEDICI_FILTERED = "sedici_filtered_2019_2024.csv"
+CSV_CHUNK_ROWS = 50000  # rows per chunk when filtering the full SEDICI export (extract_data_from_csv_sedici.merge_data)
+
+# Text extraction stage (extract_text_make_dataset.extract_text)
+EXTRACTION_WORKERS = None  # worker processes, None = os.cpu_count()
+EXTRACTION_TIMEOUT_SECONDS = 600  # per document; slower PDFs are recorded as failed and skipped
+EXTRACTION_MAX_TASKS_PER_CHILD = 50  # recycle workers to bound pdfplumber/OCR memory growth
+EXTRACTION_FAILURES_FILENAME = "extraction_failures.json"  # in JSON_FOLDER
+EXACT_MATCH_WORKERS = None  # processes for exact_match_validator, None = os.cpu_count()
+PIPELINE_MANIFEST_FILENAME = "pipeline_manifest.json"  # in JSON_FOLDER, see pipeline_manifest.py
 
 
 # Model management constants for fine_tune_subject
@@ -108,6 +127,7 @@ LABEL_ENCODER_NAMES = {
 
 LENGTH_DATASET = 2000
 SAMPLES_PER_TYPE = 500  # For balanced dataset: 500 per type × 4 types = 2000 total
+MAX_DOCUMENT_CHARS = None  # streaming (--out-of-core) training: characters read per document, None = whole text
 PERCENTAGE_DATASET_FOR_STEPS = {"training":0.8,"validation":0.1,"test":0.1}
 
 CANT_TOKENS = 14000
@@ -180,9 +200,19 @@ BASE_MODEL_T5="google-t5/t5-base"
 
 MAX_TOKENS_INPUT= 2048
 MAX_TOKENS_OUTPUT= 512
+TOKENIZED_DATASET_FOLDER = DATA_FOLDER / "tokenized"  # cached tokenized datasets, one folder per cache key (fine_tunning/generate_tokens.py)
+TOKENIZE_NUM_PROC = None  # processes for the first tokenization, None = os.cpu_count()
+TOKENIZED_SHARD_SIZE = "500MB"  # max size of each saved Arrow shard
 LOG_DIR = ROOT_DIR /  "log"
 FINAL_MODEL_PATH =ROOT_DIR / "fine-tuned-model-With-Objeto-Conferencia"
 CHECKPOINT_MODEL_PATH = ROOT_DIR / "results"
+TRAIN_BATCH_SIZE = 2
+GRADIENT_ACCUMULATION_STEPS = 8  # effective batch = TRAIN_BATCH_SIZE * GRADIENT_ACCUMULATION_STEPS
+GRADIENT_CHECKPOINTING = True  # recompute activations in backward: less memory, ~30% more compute
+TRAIN_PRECISION = "auto"  # "auto", "bf16", "fp16" or "fp32"; auto = bf16 on GPUs/CPUs that support it
+TRAIN_SAVE_STEPS = 50  # optimizer steps between checkpoints in CHECKPOINT_MODEL_PATH
+TRAIN_SAVE_TOTAL_LIMIT = 2
+TRAIN_RESUME = True  # continue from the latest checkpoint of the same run configuration (see fine_tunning/trainer.py)
 
 
 PROMPT_CLEANER_METADATA = """
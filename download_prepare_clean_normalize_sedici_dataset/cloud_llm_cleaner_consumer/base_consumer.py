@@ -1,113 +1,212 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 import json
 import threading
 import time
-from constants import APROX_TOK_PER_SOL
+from constants import APROX_TOK_PER_SOL, TOKENS_LENGTH, PROMPT_CLEANER_METADATA, CLEAN_WORKERS, CLEAN_BATCH_MAX_REQUESTS, CLEAN_BATCH_POLL_SECONDS
 from utils.text_extraction.read_and_write_files import read_data_json, write_to_json
+from utils.text_extraction.jsonl_dataset import open_dataset
 from utils.colors.colors_terminal import Bcolors
+from download_prepare_clean_normalize_sedici_dataset.cloud_llm_cleaner_consumer.checkpoint_store import JsonlCheckpointStore
+from download_prepare_clean_normalize_sedici_dataset.cloud_llm_cleaner_consumer.rate_limiter import TokenBucketLimiter
+from download_prepare_clean_normalize_sedici_dataset.cloud_llm_cleaner_consumer.batch_client import COMPLETED, RUNNING
 
 
 class BaseCloudLLMConsumer(ABC):
 
-    def __init__(self, request_limits):
+    def __init__(self, request_limits, workers=CLEAN_WORKERS):
         self._running = True
-        self._lock = threading.Lock()
-        self._request_limits = request_limits.copy()
-        self._initial_limits = request_limits.copy()
+        self._workers = workers
+        self._limiter = TokenBucketLimiter(request_limits)
+        self._progress_lock = threading.Lock()
+        self._done = 0
 
     @abstractmethod
-    def consume_llm(self, metadata, text, max_retries=3):
-        """Send metadata + text to the cloud LLM and return the cleaned response string."""
+    def consume_llm(self, input):
+        """Send one prompt to the cloud LLM. Returns (response string, total tokens used). Raises on error."""
         pass
 
-    def _can_make_request(self):
-        return (
-            self._request_limits["req_per_min"] > 0
-            and self._request_limits["req_per_day"] > 0
-            and self._request_limits["tok_per_min"] >= APROX_TOK_PER_SOL
-        )
-
-    def _decrement_limits(self):
-        self._request_limits["req_per_min"] -= 1
-        self._request_limits["req_per_day"] -= 1
-        self._request_limits["tok_per_min"] -= APROX_TOK_PER_SOL
-        print(
-            f"{Bcolors.OKGREEN}Solicitud realizada: "
-            f"req_per_min={self._request_limits['req_per_min']}, "
-            f"req_per_day={self._request_limits['req_per_day']}, "
-            f"tok_per_min={self._request_limits['tok_per_min']}{Bcolors.ENDC}"
-        )
-
-    def _reset_limits_loop(self):
-        while self._running:
-            time.sleep(60)
-            with self._lock:
-                self._request_limits["req_per_min"] = self._initial_limits["req_per_min"]
-                self._request_limits["tok_per_min"] = self._initial_limits["tok_per_min"]
-                print(
-                    f"{Bcolors.OKBLUE}Request Limits: "
-                    f"req_per_min={self._initial_limits['req_per_min']}, "
-                    f"tok_per_min={self._initial_limits['tok_per_min']}{Bcolors.ENDC}"
-                )
-
-    def make_request(self, metadata, extracted_text):
-        while True:
-            while not self._can_make_request():
-                print(
-                    f"{Bcolors.WARNING}No se puede realizar la solicitud, esperando...{Bcolors.ENDC}",
-                    self._request_limits,
-                )
+    def batch_client(self):
+        """BatchClient for the provider's batch API, used by clean_metadata_batch."""
+        raise NotImplementedError(f"{type(self).__name__} has no batch mode")
+
+    def _rate_limit_delay(self, error, attempt):
+        """Seconds to pause every worker if error is a provider rate limit (429), None otherwise."""
+        return None
+
+    @staticmethod
+    def _build_input(metadata, text):
+        return f"""{PROMPT_CLEANER_METADATA}
+            - Metadata: {metadata}
+            - Text: {text}"""
+
+    @staticmethod
+    def _estimate_tokens(input):
+        return max(APROX_TOK_PER_SOL, len(input) // TOKENS_LENGTH)
+
+    def make_request(self, metadata, extracted_text, max_retries=3):
+        input = self._build_input(metadata, extracted_text)
+        estimate = self._estimate_tokens(input)
+        for attempt in range(max_retries):
+            if not self._limiter.acquire(estimate):
+                if self._running:
+                    print(f"{Bcolors.WARNING}Daily request limit reached, stopping. Run again to resume.{Bcolors.ENDC}")
+                self._running = False
+                return None
+            try:
+                response, used_tokens = self.consume_llm(input)
+                self._limiter.settle(estimate, used_tokens)
+                return response
+            except Exception as e:
+                self._limiter.settle(estimate, 0)
+                retry_delay = self._rate_limit_delay(e, attempt)
+                if retry_delay is not None:
+                    print(f"{Bcolors.WARNING}Rate limit hit. Pausing all workers {retry_delay:.0f}s (attempt {attempt + 1}/{max_retries}){Bcolors.ENDC}")
+                    self._limiter.pause(retry_delay)
+                    continue
+                if attempt == max_retries - 1:
+                    raise e
+                print(f"{Bcolors.WARNING}Error: {e}. Retrying in 5s (attempt {attempt + 1}/{max_retries}){Bcolors.ENDC}")
                 time.sleep(5)
-            response = self.consume_llm(metadata, extracted_text)
-            with self._lock:
-                self._decrement_limits()
-            return response
+        return None
 
-    def save_json(self, id, data, output_filename, extracted_text):
+    def save_json(self, id, data, store, extracted_text):
         try:
-            metadata = read_data_json(output_filename, "utf-8")
             data = data.strip()
             if data.startswith("```json") and data.endswith("```"):
                 data = data[7:-3].strip()
-            else:
-                print(data[7:-3].strip())
             data = json.loads(data)
-            metadata[id] = data
-            metadata[id]["original_text"] = extracted_text
-            write_to_json(output_filename, metadata, "utf-8")
+            data["original_text"] = extracted_text
+            store.append(id, data)
         except json.JSONDecodeError as e:
             print(f"{Bcolors.FAIL}Decode Error in JSON: {e}{Bcolors.ENDC}")
             print(data)
 
-    def get_metadata_to_process(self, metadatas_filename, final_json_filename):
-        new_metadatas = read_data_json(metadatas_filename, "utf-8")
-        if not (final_json_filename).exists():
-            return new_metadatas
-        final_metadatas = read_data_json(final_json_filename, "utf-8")
-        return {
-            k: v for k, v in new_metadatas.items() if k not in final_metadatas.keys()
-        }
+    def get_metadata_to_process(self, dataset, store):
+        """Ids of dataset not cleaned yet; their records stay on disk until they are sent."""
+        return [k for k in dataset if k not in store]
+
+    def _process_one(self, index, metadata, store, total):
+        if not self._running:
+            return
+        try:
+            extracted_text = metadata["original_text"]
+            dict_metadata = {k: v for k, v in metadata.items() if k not in ["original_text"]}
+            response = self.make_request(dict_metadata, extracted_text)
+            if response:
+                self.save_json(index, response, store, extracted_text)
+        except Exception as e:
+            print(f"cannot process the row {index} error: {e}")
+        with self._progress_lock:
+            self._done += 1
+            if self._done % 10 == 0 or self._done == total:
+                print(f"{Bcolors.OKGREEN}[{self._done}/{total}] remaining limits: {self._limiter.snapshot()}{Bcolors.ENDC}")
 
     def process_metadatas(self, metadatas_filename, final_json_filename):
+        store = JsonlCheckpointStore(final_json_filename)
         print(f"{Bcolors.OKGREEN}extracting metadatas{Bcolors.ENDC}")
-        metadatas = self.get_metadata_to_process(metadatas_filename, final_json_filename)
-        print(f"{Bcolors.OKGREEN}processing metadatas{Bcolors.ENDC}")
-        already_processed = read_data_json(final_json_filename, "utf-8")
-        metadatas_to_process = {k: v for k, v in metadatas.items() if k not in already_processed.keys()}
-        for index, metadata in metadatas_to_process.items():
-            try:
-                extracted_text = metadata["original_text"]
-                id = index
-                dict_metadata = {k: v for k, v in metadata.items() if k not in ["original_text"]}
-                response = self.make_request(dict_metadata, extracted_text)
-                if response:
-                    self.save_json(id, response, final_json_filename, extracted_text)
-            except Exception as e:
-                print(f"cannot process the row {index} error: {e}")
+        dataset = open_dataset(metadatas_filename)
+        pending = self.get_metadata_to_process(dataset, store)
+        total = len(pending)
+        print(f"{Bcolors.OKGREEN}processing {total} metadatas ({len(store)} already cleaned) with {self._workers} workers{Bcolors.ENDC}")
+        # at most two queued documents per worker, so only those records are in memory
+        slots = threading.BoundedSemaphore(self._workers * 2)
+        try:
+            with dataset, ThreadPoolExecutor(max_workers=self._workers) as executor:
+                try:
+                    for index in pending:
+                        slots.acquire()
+                        if not self._running:
+                            slots.release()
+                            break
+                        future = executor.submit(self._process_one, index, dataset[index], store, total)
+                        future.add_done_callback(lambda _: slots.release())
+                    executor.shutdown(wait=True)
+                except BaseException:
+                    # drop the queued documents; leaving the block only waits for the in-flight requests
+                    self._running = False
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+        except BaseException:
+            self._running = False
+            store.close()
+            raise
+        store.compact()
 
     def clean_metadata(self, metadata_filename, final_json_filename):
-        reset_thread = threading.Thread(target=self._reset_limits_loop)
-        reset_thread.daemon = True
-        reset_thread.start()
+        self._running = True
+        self._done = 0
         self.process_metadatas(metadata_filename, final_json_filename)
         self._running = False
+
+    def _submit_batches(self, client, dataset, pending, final_json_filename, state_filename):
+        batch_ids = []
+        for start in range(0, len(pending), CLEAN_BATCH_MAX_REQUESTS):
+            chunk = pending[start:start + CLEAN_BATCH_MAX_REQUESTS]
+            input_filename = final_json_filename.with_name(f"{final_json_filename.stem}.batch_input_{len(batch_ids)}.jsonl")
+            with open(input_filename, "w", encoding="utf-8") as f:
+                for index in chunk:
+                    metadata = dataset[index]
+                    dict_metadata = {k: v for k, v in metadata.items() if k not in ["original_text"]}
+                    input = self._build_input(dict_metadata, metadata["original_text"])
+                    f.write(json.dumps(client.request_line(index, input), ensure_ascii=False) + "\n")
+            batch_id = client.submit(input_filename)
+            input_filename.unlink()
+            print(f"{Bcolors.OKGREEN}Submitted batch {batch_id} with {len(chunk)} requests{Bcolors.ENDC}")
+            batch_ids.append(batch_id)
+            write_to_json(state_filename, {"batches": batch_ids}, "utf-8")
+        return batch_ids
+
+    def _ingest_batch(self, client, batch_id, dataset, store):
+        saved, failed, tokens = 0, 0, 0
+        for index, response, used_tokens, error in client.results(batch_id):
+            tokens += used_tokens
+            if index in store:
+                continue
+            if error or not response or index not in dataset:
+                print(f"{Bcolors.FAIL}cannot process the row {index} error: {error}{Bcolors.ENDC}")
+                failed += 1
+                continue
+            self.save_json(index, response, store, dataset[index]["original_text"])
+            saved += 1
+        print(f"{Bcolors.OKGREEN}Batch {batch_id}: {saved} saved, {failed} failed, {tokens} tokens{Bcolors.ENDC}")
+
+    def clean_metadata_batch(self, metadatas_filename, final_json_filename, poll_seconds=CLEAN_BATCH_POLL_SECONDS):
+        """
+        Clean every pending document through the provider's batch API instead of one request per document.
+
+        The submitted batch ids are kept in <final_json>.batch_state.json, so an interrupted run resumes
+        polling the same jobs instead of paying for them twice. Results go through the checkpoint store
+        and are compacted into final_json_filename once every batch is done; requests that failed stay
+        pending for the next run.
+        """
+        client = self.batch_client()
+        store = JsonlCheckpointStore(final_json_filename)
+        state_filename = store.final_json_filename.with_name(f"{store.final_json_filename.stem}.batch_state.json")
+        dataset = open_dataset(metadatas_filename)
+        pending = self.get_metadata_to_process(dataset, store)
+        try:
+            state = read_data_json(state_filename, "utf-8")
+            if state.get("batches"):
+                print(f"{Bcolors.OKBLUE}Resuming batches {state['batches']}{Bcolors.ENDC}")
+            elif pending:
+                print(f"{Bcolors.OKGREEN}submitting {len(pending)} metadatas in batch mode{Bcolors.ENDC}")
+                state = {"batches": self._submit_batches(client, dataset, pending, store.final_json_filename, state_filename)}
+
+            for batch_id in state.get("batches", []):
+                status = client.status(batch_id)
+                while status == RUNNING:
+                    print(f"{Bcolors.OKBLUE}Batch {batch_id} running, checking again in {poll_seconds}s{Bcolors.ENDC}")
+                    time.sleep(poll_seconds)
+                    status = client.status(batch_id)
+                if status != COMPLETED:
+                    print(f"{Bcolors.FAIL}Batch {batch_id} {status}, its documents stay pending{Bcolors.ENDC}")
+                    continue
+                self._ingest_batch(client, batch_id, dataset, store)
+        except BaseException:
+            store.close()
+            raise
+        finally:
+            dataset.close()
+        state_filename.unlink(missing_ok=True)
+        store.compact()
@@ -0,0 +1,151 @@
+"""
+Provider-agnostic batch submission for the cleaning step.
+
+A BatchClient turns cleaning prompts into the provider's JSONL batch format,
+uploads and submits the file, reports the job state and parses the output back
+into (id, response text, total tokens, error) tuples. BaseCloudLLMConsumer.clean_metadata_batch
+drives it; see batch_stub_server.py to run the OpenAI flow against a local stub.
+"""
+
+from abc import ABC, abstractmethod
+import json
+
+COMPLETED = "completed"
+FAILED = "failed"
+RUNNING = "running"
+
+SYSTEM_PROMPT = "You are an expert in metadata validation and text analysis. Return only valid JSON."
+
+
+class BatchClient(ABC):
+
+    @abstractmethod
+    def request_line(self, id, input) -> dict:
+        """One line of the batch input file for the prompt input, keyed by id."""
+        pass
+
+    @abstractmethod
+    def submit(self, input_filename) -> str:
+        """Upload the input file, create the batch job and return its id."""
+        pass
+
+    @abstractmethod
+    def status(self, batch_id) -> str:
+        """COMPLETED, FAILED or RUNNING."""
+        pass
+
+    @abstractmethod
+    def results(self, batch_id):
+        """Yield (id, response text or None, total tokens, error or None) for every request of a completed job."""
+        pass
+
+
+class OpenAIBatchClient(BatchClient):
+
+    def __init__(self, client, model):
+        self._client = client
+        self._model = model
+
+    def request_line(self, id, input):
+        return {
+            "custom_id": id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": self._model,
+                "messages": [
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": input},
+                ],
+            },
+        }
+
+    def submit(self, input_filename):
+        with open(input_filename, "rb") as f:
+            batch_file = self._client.files.create(file=f, purpose="batch")
+        batch = self._client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        return batch.id
+
+    def status(self, batch_id):
+        batch = self._client.batches.retrieve(batch_id)
+        if batch.status == "completed":
+            return COMPLETED
+        if batch.status in ("failed", "expired", "cancelled"):
+            return FAILED
+        return RUNNING
+
+    def results(self, batch_id):
+        batch = self._client.batches.retrieve(batch_id)
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self._client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                body = response.get("body") or {}
+                if record.get("error") or response.get("status_code") != 200:
+                    yield record["custom_id"], None, 0, record.get("error") or body.get("error")
+                    continue
+                yield (
+                    record["custom_id"],
+                    body["choices"][0]["message"]["content"],
+                    body.get("usage", {}).get("total_tokens", 0),
+                    None,
+                )
+
+
+class GeminiBatchClient(BatchClient):
+
+    def __init__(self, client, model):
+        self._client = client
+        self._model = model
+
+    def request_line(self, id, input):
+        return {"key": id, "request": {"contents": [{"role": "user", "parts": [{"text": input}]}]}}
+
+    def submit(self, input_filename):
+        from google.genai import types
+
+        uploaded = self._client.files.upload(
+            file=str(input_filename),
+            config=types.UploadFileConfig(display_name=input_filename.name, mime_type="jsonl"),
+        )
+        job = self._client.batches.create(
+            model=self._model,
+            src=uploaded.name,
+            config={"display_name": input_filename.stem},
+        )
+        return job.name
+
+    def status(self, batch_id):
+        state = self._client.batches.get(name=batch_id).state.name
+        if state == "JOB_STATE_SUCCEEDED":
+            return COMPLETED
+        if state in ("JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"):
+            return FAILED
+        return RUNNING
+
+    def results(self, batch_id):
+        job = self._client.batches.get(name=batch_id)
+        content = self._client.files.download(file=job.dest.file_name).decode("utf-8")
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("error") or "response" not in record:
+                yield record["key"], None, 0, record.get("error")
+                continue
+            response = record["response"]
+            parts = response["candidates"][0]["content"]["parts"]
+            yield (
+                record["key"],
+                "".join(part.get("text", "") for part in parts),
+                response.get("usageMetadata", {}).get("totalTokenCount", 0),
+                None,
+            )
@@ -0,0 +1,161 @@
+"""
+Local stub of the OpenAI Files + Batches API, to exercise the batch cleaning mode without a real account.
+
+Implements the four calls OpenAIBatchClient makes:
+  POST /v1/files                  -- multipart upload of the batch input file
+  POST /v1/batches                -- create a batch from an uploaded file
+  GET  /v1/batches/{id}           -- validating -> in_progress -> finalizing -> completed, one step per poll
+  GET  /v1/files/{id}/content     -- output (or error) file
+
+Each request is answered with a fenced JSON object echoing its custom_id, and
+--fail-every N makes every Nth request come back as an error.
+
+Usage:
+    python -m download_prepare_clean_normalize_sedici_dataset.cloud_llm_cleaner_consumer.batch_stub_server --port 8089
+
+    OPENAI_API_KEY=stub OPENAI_BASE_URL=http://localhost:8089/v1 \\
+        python -c "from download_prepare_clean_normalize_sedici_dataset.cloud_llm_cleaner_consumer.openai_consumer import OpenaiConsumer; ..."
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from email import policy
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BATCH_STEPS = ["validating", "in_progress", "finalizing", "completed"]
+
+
+class StubState:
+
+    def __init__(self, fail_every=0):
+        self.fail_every = fail_every
+        self.files = {}
+        self.batches = {}
+        self.lock = threading.Lock()
+
+    def add_file(self, content: bytes, filename: str, purpose: str) -> dict:
+        file_id = f"file-{uuid.uuid4().hex[:12]}"
+        self.files[file_id] = content
+        return {
+            "id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+            "filename": filename, "purpose": purpose, "status": "processed",
+        }
+
+    def _answer(self, index, line):
+        request = json.loads(line)
+        if self.fail_every and (index + 1) % self.fail_every == 0:
+            return None, {
+                "id": f"batch_req_{index}", "custom_id": request["custom_id"], "response": None,
+                "error": {"code": "stub_error", "message": "failure injected by the stub server"},
+            }
+        content = "```json\n" + json.dumps({"stub": True, "custom_id": request["custom_id"]}) + "\n```"
+        prompt_tokens = sum(len(m["content"]) for m in request["body"]["messages"]) // 4
+        return {
+            "id": f"batch_req_{index}", "custom_id": request["custom_id"], "error": None,
+            "response": {"status_code": 200, "request_id": uuid.uuid4().hex, "body": {
+                "id": f"chatcmpl-{index}", "object": "chat.completion", "model": request["body"]["model"],
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 20, "total_tokens": prompt_tokens + 20},
+            }},
+        }, None
+
+    def create_batch(self, body: dict) -> dict:
+        batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+        self.batches[batch_id] = {
+            "id": batch_id, "object": "batch", "endpoint": body["endpoint"],
+            "input_file_id": body["input_file_id"], "completion_window": body["completion_window"],
+            "status": BATCH_STEPS[0], "created_at": int(time.time()),
+            "output_file_id": None, "error_file_id": None, "errors": None,
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+        }
+        return self.batches[batch_id]
+
+    def poll_batch(self, batch_id: str) -> dict:
+        batch = self.batches[batch_id]
+        step = BATCH_STEPS.index(batch["status"])
+        if step < len(BATCH_STEPS) - 1:
+            batch["status"] = BATCH_STEPS[step + 1]
+            if batch["status"] == "completed":
+                self._complete(batch)
+        return batch
+
+    def _complete(self, batch: dict):
+        outputs, errors = [], []
+        lines = [l for l in self.files[batch["input_file_id"]].decode("utf-8").splitlines() if l.strip()]
+        for index, line in enumerate(lines):
+            output, error = self._answer(index, line)
+            (outputs if output else errors).append(json.dumps(output or error))
+        batch["output_file_id"] = self.add_file("\n".join(outputs).encode("utf-8"), "output.jsonl", "batch_output")["id"]
+        if errors:
+            batch["error_file_id"] = self.add_file("\n".join(errors).encode("utf-8"), "errors.jsonl", "batch_output")["id"]
+        batch["request_counts"] = {"total": len(lines), "completed": len(outputs), "failed": len(errors)}
+
+
+def make_handler(state: StubState):
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def _send_json(self, payload, code=200):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        def do_POST(self):
+            with state.lock:
+                if self.path == "/v1/files":
+                    raw = f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode("utf-8") + self._body()
+                    fields = {
+                        part.get_param("name", header="content-disposition"): part
+                        for part in BytesParser(policy=policy.HTTP).parsebytes(raw).iter_parts()
+                    }
+                    upload = fields["file"]
+                    purpose = fields["purpose"].get_payload(decode=True).decode("utf-8")
+                    return self._send_json(state.add_file(upload.get_payload(decode=True), upload.get_filename(), purpose))
+                if self.path == "/v1/batches":
+                    return self._send_json(state.create_batch(json.loads(self._body())))
+            self._send_json({"error": {"message": f"unknown path {self.path}"}}, 404)
+
+        def do_GET(self):
+            with state.lock:
+                match = re.fullmatch(r"/v1/batches/([\w-]+)", self.path)
+                if match and match.group(1) in state.batches:
+                    return self._send_json(state.poll_batch(match.group(1)))
+                match = re.fullmatch(r"/v1/files/([\w-]+)/content", self.path)
+                if match and match.group(1) in state.files:
+                    body = state.files[match.group(1)]
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/octet-stream")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    return self.wfile.write(body)
+            self._send_json({"error": {"message": f"unknown path {self.path}"}}, 404)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(port=8089, fail_every=0):
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(StubState(fail_every)))
+    print(f"Batch stub server listening on http://127.0.0.1:{server.server_port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stub of the OpenAI Files + Batches API")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--fail-every", type=int, default=0, help="answer every Nth request with an error")
+    args = parser.parse_args()
+    serve(args.port, args.fail_every)
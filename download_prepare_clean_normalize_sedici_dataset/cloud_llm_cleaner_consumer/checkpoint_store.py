@@ -0,0 +1,108 @@
+"""
+Append-only checkpoint for the cloud LLM cleaning run.
+
+Every cleaned document is appended as one JSON line to
+<final_json>.checkpoint.jsonl and fsynced, so a crash loses at most the line
+being written (a torn last line is dropped on the next load). The ids already
+processed are kept in memory, both from the checkpoint and from a final JSON
+left by a previous run, so resuming never re-reads the big dataset per document.
+
+compact() materializes the final JSON once at the end, streaming the previous
+final JSON and the checkpoint record by record into a temp file that is then
+renamed (so the previous final JSON is never half-written), and removes the
+checkpoint.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+from utils.text_extraction.jsonl_dataset import iter_json_keys, iter_json_records, write_json_records
+from utils.colors.colors_terminal import Bcolors
+
+
+class JsonlCheckpointStore:
+
+    def __init__(self, final_json_filename: Path):
+        self.final_json_filename = Path(final_json_filename)
+        self.checkpoint_filename = self.final_json_filename.with_name(self.final_json_filename.stem + ".checkpoint.jsonl")
+        self._lock = threading.Lock()
+        self._final_ids = set(iter_json_keys(self.final_json_filename))
+        self._checkpoint_ids = set()
+        self._load_checkpoint()
+        self._file = open(self.checkpoint_filename, "a", encoding="utf-8")
+
+    def _load_checkpoint(self):
+        if not self.checkpoint_filename.exists():
+            return
+        valid_bytes = 0
+        with open(self.checkpoint_filename, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise json.JSONDecodeError("missing newline", "", 0)
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"{Bcolors.WARNING}Dropping torn line at the end of {self.checkpoint_filename.name}{Bcolors.ENDC}")
+                    break
+                self._checkpoint_ids.add(record["id"])
+                valid_bytes += len(line)
+        if valid_bytes != self.checkpoint_filename.stat().st_size:
+            with open(self.checkpoint_filename, "r+b") as f:
+                f.truncate(valid_bytes)
+        print(f"{Bcolors.OKBLUE}Resuming from checkpoint: {len(self._checkpoint_ids)} documents already cleaned{Bcolors.ENDC}")
+
+    def __contains__(self, id) -> bool:
+        return id in self._checkpoint_ids or id in self._final_ids
+
+    def __len__(self) -> int:
+        return len(self._checkpoint_ids | self._final_ids)
+
+    def append(self, id, data: dict):
+        line = json.dumps({"id": id, "data": data}, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._checkpoint_ids.add(id)
+
+    def _iter_checkpoint(self):
+        with open(self.checkpoint_filename, "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                yield record["id"], record["data"]
+
+    def _merged_records(self):
+        """Final JSON records not superseded by the checkpoint, then the checkpoint (last line per id wins)."""
+        last_line = {}
+        for line_number, (id, _) in enumerate(self._iter_checkpoint()):
+            last_line[id] = line_number
+        for id, data in iter_json_records(self.final_json_filename):
+            if id not in last_line:
+                yield id, data
+        for line_number, (id, data) in enumerate(self._iter_checkpoint()):
+            if last_line[id] == line_number:
+                yield id, data
+
+    def compact(self):
+        """Merge the checkpoint into the final JSON and remove the checkpoint. Closes the store."""
+        with self._lock:
+            self._file.close()
+            if not self._checkpoint_ids:
+                self.checkpoint_filename.unlink(missing_ok=True)
+                return
+            tmp_filename = self.final_json_filename.with_name(self.final_json_filename.name + ".tmp")
+            write_json_records(tmp_filename, self._merged_records())
+            with open(tmp_filename, "rb+") as f:
+                os.fsync(f.fileno())
+            os.replace(tmp_filename, self.final_json_filename)
+            self.checkpoint_filename.unlink()
+            self._final_ids |= self._checkpoint_ids
+            self._checkpoint_ids = set()
+        print(f"{Bcolors.OKGREEN}Compacted {len(self._final_ids)} documents into {self.final_json_filename.name}{Bcolors.ENDC}")
+
+    def close(self):
+        """Close without compacting; the checkpoint is kept for the next run."""
+        with self._lock:
+            self._file.close()
@@ -1,11 +1,11 @@
 from google import genai
 import os
 import re
-import time
 from dotenv import load_dotenv
-from constants import PROMPT_CLEANER_METADATA, GENAI_REQUEST_LIMIT, GENAI_MODEL
+from constants import GENAI_REQUEST_LIMIT, GENAI_MODEL
 from utils.colors.colors_terminal import Bcolors
 from download_prepare_clean_normalize_sedici_dataset.cloud_llm_cleaner_consumer.base_consumer import BaseCloudLLMConsumer
+from download_prepare_clean_normalize_sedici_dataset.cloud_llm_cleaner_consumer.batch_client import GeminiBatchClient
 
 load_dotenv()
 
@@ -17,45 +17,29 @@ class GenaiConsumer(BaseCloudLLMConsumer):
         api_key = os.getenv("GOOGLE_API_KEY")
         self._client = genai.Client(api_key=api_key)
 
-    def consume_llm(self, metadata, text, max_retries=3):
-        input = f"""{PROMPT_CLEANER_METADATA}
-            - Metadata: {metadata}
-            - Text: {text}"""
-
-        for attempt in range(max_retries):
-            try:
-                response = self._client.models.generate_content(
-                    model=GENAI_MODEL,
-                    contents=input,
-                )
-                usage = response.usage_metadata
-                print(
-                    f"{Bcolors.OKBLUE}Tokens usados: prompt={usage.prompt_token_count}, "
-                    f"completion={usage.candidates_token_count}, total={usage.total_token_count}{Bcolors.ENDC}"
-                )
-                return response.text
-
-            except Exception as e:
-                error_str = str(e)
-
-                if "429" in error_str and "RESOURCE_EXHAUSTED" in error_str:
-                    retry_delay = self._extract_retry_delay(error_str)
-
-                    if retry_delay:
-                        print(f"{Bcolors.WARNING}Rate limit hit. Waiting {retry_delay}s + 1s buffer before retry (attempt {attempt + 1}/{max_retries}){Bcolors.ENDC}")
-                        time.sleep(retry_delay + 1)
-                        continue
-                    else:
-                        backoff_time = (2 ** attempt) * 30
-                        print(f"{Bcolors.WARNING}Rate limit hit, no retry delay found. Using exponential backoff: {backoff_time}s (attempt {attempt + 1}/{max_retries}){Bcolors.ENDC}")
-                        time.sleep(backoff_time)
-                        continue
-
-                if attempt == max_retries - 1:
-                    raise e
-                else:
-                    print(f"{Bcolors.WARNING}Error: {e}. Retrying in 5s (attempt {attempt + 1}/{max_retries}){Bcolors.ENDC}")
-                    time.sleep(5)
+    def consume_llm(self, input):
+        response = self._client.models.generate_content(
+            model=GENAI_MODEL,
+            contents=input,
+        )
+        usage = response.usage_metadata
+        print(
+            f"{Bcolors.OKBLUE}Tokens usados: prompt={usage.prompt_token_count}, "
+            f"completion={usage.candidates_token_count}, total={usage.total_token_count}{Bcolors.ENDC}"
+        )
+        return response.text, usage.total_token_count
+
+    def batch_client(self):
+        return GeminiBatchClient(self._client, GENAI_MODEL)
+
+    def _rate_limit_delay(self, error, attempt):
+        error_str = str(error)
+        if "429" in error_str and "RESOURCE_EXHAUSTED" in error_str:
+            retry_delay = self._extract_retry_delay(error_str)
+            if retry_delay:
+                return retry_delay + 1
+            return (2 ** attempt) * 30
+        return None
 
     def _extract_retry_delay(self, error_str):
         try:
@@ -0,0 +1,82 @@
+"""
+Token-bucket limiter shared by the cleaning workers.
+
+Three limits, taken from GENAI_REQUEST_LIMIT / OPENAI_REQUEST_LIMIT:
+  req_per_min  -- bucket of req_per_min requests, refilled continuously (req_per_min / 60 per second)
+  tok_per_min  -- bucket of tok_per_min tokens, refilled the same way
+  req_per_day  -- sliding 24h window of request timestamps
+
+acquire() reserves one request and an estimate of the tokens before the call
+and sleeps exactly until the buckets can cover it (no polling). settle() then
+corrects the token bucket with the real usage the provider reported, so long
+documents are charged what they cost and short ones give the headroom back.
+pause() is used when the provider answers 429 anyway: every worker waits.
+"""
+
+import threading
+import time
+from collections import deque
+
+DAY_SECONDS = 24 * 60 * 60
+
+
+class TokenBucketLimiter:
+
+    def __init__(self, request_limits: dict):
+        self.req_per_min = request_limits["req_per_min"]
+        self.tok_per_min = request_limits["tok_per_min"]
+        self.req_per_day = request_limits["req_per_day"]
+        self._requests = float(self.req_per_min)
+        self._tokens = float(self.tok_per_min)
+        self._day_window = deque()
+        self._paused_until = 0.0
+        self._last_refill = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._requests = min(self.req_per_min, self._requests + elapsed * self.req_per_min / 60)
+        self._tokens = min(self.tok_per_min, self._tokens + elapsed * self.tok_per_min / 60)
+        while self._day_window and now - self._day_window[0] >= DAY_SECONDS:
+            self._day_window.popleft()
+
+    def acquire(self, tokens: int) -> bool:
+        """Block until one request of ~tokens fits in every limit. Returns False once the daily cap is used up."""
+        tokens = min(tokens, self.tok_per_min)
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if len(self._day_window) >= self.req_per_day:
+                    return False
+                wait = max(
+                    self._paused_until - now,
+                    (1 - self._requests) * 60 / self.req_per_min,
+                    (tokens - self._tokens) * 60 / self.tok_per_min,
+                )
+                if wait <= 0:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    self._day_window.append(now)
+                    return True
+                self._cond.wait(wait)
+
+    def settle(self, reserved: int, used: int):
+        """Replace the reserved token estimate with the usage the provider reported."""
+        with self._cond:
+            self._tokens -= used - min(reserved, self.tok_per_min)
+            self._cond.notify_all()
+
+    def pause(self, seconds: float):
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                "req_per_min": int(self._requests),
+                "tok_per_min": int(self._tokens),
+                "req_per_day": self.req_per_day - len(self._day_window),
+            }
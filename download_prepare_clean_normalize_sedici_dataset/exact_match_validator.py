@@ -1,134 +1,115 @@
-import re
+import json
+import time
+from multiprocessing import Pool
 from utils.text_extraction.read_and_write_files import read_data_json, write_to_json
+from utils.normalization.text_matcher import TextIndex
+from constants import EXACT_MATCH_WORKERS
 
+EXACT_MATCH_FIELDS = ["rights", "rightsurl", "sedici.uri", "dc.uri"]
+POOL_MIN_DOCUMENTS = 200  # below this, a process pool costs more than it saves
 
-# Creative Commons pattern for rights validation
-cc_pattern = re.compile(
-    r"""
-    (                           
-        # Variante larga (Creative Commons ... versión)
-        (?:licencia\s*)?creative\s*commons
-        .*?(?:\b\d+\.\d+\b)?     # allow optional version
-
-    |   # Variante abreviada (CC BY, CC-BY-NC-SA, etc.)
-        cc[-\s]*by               # CC BY or CC-BY
-        (?:[-\s]?[a-z]+)*        # NC, SA, etc.
-        (?:\s*\d+\.\d+(?:\s*\w+)?)?  # version like 4.0, 3.0 Unported (optional)
-
-    |   # Variante con URL oficial
-        https?://creativecommons\.org/licenses/
-        [\w\-/]*
-        (?:/\d+\.\d+[^/\s]*)?    # version optional, may have suffix
-    )
-    """,
-    flags=re.IGNORECASE | re.VERBOSE
-)
-
-
-def validate_rights_field(value, text):
-    """Validate rights field using Creative Commons pattern."""
-    if value:
-        match = cc_pattern.search(text)
-        if match:
-            return True
-    return False
+
+def validate_rights_field(value, index):
+    """Validate rights field using the Creative Commons pattern."""
+    return bool(value) and index.has_creative_commons()
 
 
-def validate_field_in_text(key, value, text):
-    """Validate if a field value is present in the text."""
+def validate_field_in_text(key, value, index):
+    """Validate if a field value is present in the text (index: TextIndex of the document text)."""
     if key == "rights":
-        return validate_rights_field(value, text)
+        return validate_rights_field(value, index)
     elif key in ["dc.uri", "sedici.uri", "rightsurl"]:
-        if value:
-            try:
-                return value.lower() in text.lower()
-            except:
-                print(f"error in {key} value: {value}")
-                return False
-        return False
+        return index.contains(value)
     return False
 
 
-def apply_exact_match_validation(checked_filename, original_filename):
+def validate_document(original_record, text):
+    """
+    {field: validated value} for the exact-match fields present in original_record:
+    the original value if it is found in the text, None otherwise.
+    Rights and rightsurl are correlated - both get the same validation result.
+    """
+    index = TextIndex(text)
+    result = {}
+    if "rights" in original_record or "rightsurl" in original_record:
+        rights_original = original_record.get("rights")
+        rightsurl_original = original_record.get("rightsurl")
+        # If either validates, both are valid
+        rights_valid = (validate_field_in_text("rights", rights_original, index)
+                        or validate_field_in_text("rightsurl", rightsurl_original, index))
+        for field, original_value in (("rights", rights_original), ("rightsurl", rightsurl_original)):
+            if field in original_record:
+                result[field] = original_value if rights_valid else None
+
+    # Handle sedici.uri and dc.uri independently
+    for field in ["sedici.uri", "dc.uri"]:
+        original_value = original_record.get(field)
+        if original_value:
+            result[field] = original_value if validate_field_in_text(field, original_value, index) else None
+    return result
+
+
+def _validate_task(task):
+    doc_id, original_record, text = task
+    return doc_id, validate_document(original_record, text)
+
+
+def apply_exact_match_validation(checked_filename, original_filename, only_ids=None, workers=EXACT_MATCH_WORKERS):
     """
     Apply exact match validation using original data and update checked data.
     Validates original values against text and puts original value if valid, null if not.
     Rights and rightsurl are correlated - both get same validation result.
+    Documents are validated in a process pool (see validate_document) and a per-field report
+    is written next to checked_filename as <stem>.exact_match_report.json.
     
     Args:
         checked_filename: Path to the Gemini-checked metadata JSON file (will be updated)
         original_filename: Path to the original metadata JSON file
+        only_ids: validate only these documents (the others were validated in a previous run)
+        workers: pool processes (None = CPU count, 1 = no pool)
     """
-    exact_match_fields = ["rights", "rightsurl", "sedici.uri", "dc.uri"]
-    
-    # Read data
+    start = time.perf_counter()
     checked_data = read_data_json(checked_filename, "utf-8")
     original_data = read_data_json(original_filename, "utf-8")
-    
+
+    tasks = [
+        (doc_id, {f: original_data[doc_id][f] for f in EXACT_MATCH_FIELDS if f in original_data[doc_id]}, metadata.get("original_text", ""))
+        for doc_id, metadata in checked_data.items()
+        if doc_id in original_data and (only_ids is None or doc_id in only_ids)
+    ]
+    pool = None
+    if workers == 1 or len(tasks) < POOL_MIN_DOCUMENTS:
+        results = map(_validate_task, tasks)
+    else:
+        pool = Pool(processes=workers)
+        results = pool.imap_unordered(_validate_task, tasks, chunksize=16)
+
     # Track validation results
-    validation_stats = {field: {"ok": 0, "failed": 0} for field in exact_match_fields}
-    
-    # Process each document
-    for doc_id, metadata in checked_data.items():
-        if doc_id not in original_data:
-            continue
-            
-        original_record = original_data[doc_id]
-        text = metadata.get("original_text", "")
-        
-        # Handle rights and rightsurl together (correlated)
-        rights_valid = False
-        if "rights" in original_record or "rightsurl" in original_record:
-            # Check if either rights or rightsurl validates
-            rights_original = original_record.get("rights")
-            rightsurl_original = original_record.get("rightsurl")
-            
-            rights_check = validate_field_in_text("rights", rights_original, text) if rights_original else False
-            rightsurl_check = validate_field_in_text("rightsurl", rightsurl_original, text) if rightsurl_original else False
-            
-            # If either validates, both are valid
-            rights_valid = rights_check or rightsurl_check
-            
-            # Apply result to both fields
-            if "rights" in original_record:
-                if rights_valid:
-                    checked_data[doc_id]["rights"] = rights_original
-                    validation_stats["rights"]["ok"] += 1
-                else:
-                    checked_data[doc_id]["rights"] = None
-                    validation_stats["rights"]["failed"] += 1
-                    
-            if "rightsurl" in original_record:
-                if rights_valid:
-                    checked_data[doc_id]["rightsurl"] = rightsurl_original
-                    validation_stats["rightsurl"]["ok"] += 1
-                else:
-                    checked_data[doc_id]["rightsurl"] = None
-                    validation_stats["rightsurl"]["failed"] += 1
-        
-        # Handle sedici.uri and dc.uri independently
-        for field in ["sedici.uri", "dc.uri"]:
-            if field in original_record:
-                original_value = original_record[field]
-                
-                if original_value:
-                    is_valid = validate_field_in_text(field, original_value, text)
-                    
-                    if is_valid:
-                        checked_data[doc_id][field] = original_value
-                        validation_stats[field]["ok"] += 1
-                    else:
-                        checked_data[doc_id][field] = None
-                        validation_stats[field]["failed"] += 1
-    
+    validation_stats = {field: {"ok": 0, "failed": 0} for field in EXACT_MATCH_FIELDS}
+    try:
+        for doc_id, validated in results:
+            for field, value in validated.items():
+                checked_data[doc_id][field] = value
+                validation_stats[field]["ok" if value is not None else "failed"] += 1
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
     # Save updated checked data
     write_to_json(checked_filename, checked_data, "utf-8")
-    
-    # Print validation statistics
+
+    report = {"documents": len(tasks), "seconds": round(time.perf_counter() - start, 2), "fields": {}}
     print("Exact match validation results:")
     for field, stats in validation_stats.items():
         total = stats["ok"] + stats["failed"]
+        report["fields"][field] = {**stats, "checked": total, "missing": len(tasks) - total,
+                                   "failed_pct": round(stats["failed"] / total * 100, 1) if total else None}
         if total > 0:
             print(f"{field}: {stats['ok']} ok, {stats['failed']} set to null ({stats['failed']/total*100:.1f}% failed)")
-    
-    return validation_stats
\ No newline at end of file
+    report_filename = checked_filename.with_name(f"{checked_filename.stem}.exact_match_report.json")
+    with open(report_filename, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    print(f"{len(tasks)} documents validated in {report['seconds']}s, report saved to {report_filename.name}")
+
+    return validation_stats
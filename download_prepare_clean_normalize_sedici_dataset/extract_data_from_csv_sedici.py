@@ -1,29 +1,21 @@
+from pathlib import Path
 import pandas as pd
-from constants import COLUMNS_TYPES, SUBJECT_MAPPING, VALID_TYPES, LENGTH_DATASET, SAMPLES_PER_TYPE
+from constants import COLUMNS_TYPES, SUBJECT_MAPPING, VALID_TYPES, LENGTH_DATASET, SAMPLES_PER_TYPE, CSV_CHUNK_ROWS
+from utils.colors.colors_terminal import Bcolors
 
-pd.set_option('display.max_colwidth', None)
+try:
+    import pyarrow  # noqa: F401  (pandas Parquet engine)
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
 
-def combine_non_nulls(row, values):
-    non_nulls = [row[col] for col in values if pd.notna(row[col])]
-    if not non_nulls:
-        return None
-    return non_nulls[0] if len(non_nulls) == 1 else non_nulls
+pd.set_option('display.max_colwidth', None)
 
 def safe_split(value, delimiter, part=0):
     if isinstance(value, str) and delimiter in value:
         return value.split(delimiter)[part].strip()
     return value
 
-def transform_uri(uri):
-    if not isinstance(uri, str):
-        return None
-    try:
-        main_uri = uri.split("||")[0]  # Quedarse con la parte de sedici
-        return main_uri.split("handle/")[1].replace("/", "-")
-    except Exception as e:
-        print(f"uri mal formateado: {uri} - {e}")
-        return None
-    
 def transform_subject(subject):
     if not isinstance(subject, str):
         return None
@@ -34,80 +26,104 @@ def transform_subject(subject):
         print(f"subject mal formateado: {subject} - {e}")
         return None
 
-def transform_contributors(value):
-    if not isinstance(value, str):
-        return None
-    try:
-        elements = [safe_split(elem, "::") for elem in value.split("||")]
-        return elements[0] if len(elements) == 1 else elements
-    except Exception as e:
-        print(f"contributor mal formateado: {value} - {e}")
-        return None
-
-def transform_institutions(value):
-    if not isinstance(value, str):
-        return None
-    try:
-        elements = [safe_split(elem, "::") for elem in value.split("||")]
-        return ', '.join(elements) if elements else None
-    except Exception as e:
-        print(f"institution mal formateado: {value} - {e}")
-        return None
-
-def transform_degree(value):
-    return safe_split(value, "::") if pd.notna(value) else None
-
-def combine_title_subtitle(title, subtitle):
-    if pd.notna(title) and pd.notna(subtitle):
-        return f"{title}: {subtitle}"
-    elif pd.notna(title):
-        return title
-    elif pd.notna(subtitle):
-        return subtitle
-    else:
-        return None
-
-def merge_data(csv_filename, filtered_csv_filename):
-    df = pd.read_csv(csv_filename)
-
-    # Match columns from COLUMNS_TYPES
-    final_columns = {key: [col for col in df.columns if key in col] for key in COLUMNS_TYPES}
-    selected_cols = [col for cols in final_columns.values() for col in cols]
-    subset_df = df[selected_cols].copy()
-
-    # 🔥 ELIMINAR DUPLICADOS EN LAS COLUMNAS
-    subset_df = subset_df.loc[:, ~subset_df.columns.duplicated()]
-
-    # Merge multiple columns
+# Column-wise versions of the helpers above: each one takes and returns a whole Series (or DataFrame),
+# so merge_data never runs Python code per row.
+
+def split_part(series, delimiter, part=0):
+    """safe_split over a Series: strings containing delimiter are split and stripped, the rest is kept."""
+    has_delimiter = series.str.contains(delimiter, regex=False, na=False)
+    return series.where(~has_delimiter, series.str.split(delimiter, regex=False).str[part].str.strip())
+
+def _unwrap_single(lists, index):
+    """Lists of one element become that element, empty/missing rows become None."""
+    lists = lists.reindex(index)
+    lists = lists.where(lists.str.len() != 1, lists.str[0])
+    return lists.astype(object).where(lists.notna(), None)
+
+def first_non_null(df, values):
+    """Per row, the value of the first column in values that is not null (column by column, no row-wise transpose)."""
+    merged = df[values[0]]
+    for col in values[1:]:
+        merged = merged.fillna(df[col])
+    return merged
+
+def combine_non_nulls(df, values):
+    """Per row, the non-null values of the columns in values: None, the single value, or a list."""
+    stacked = df[values].stack()
+    stacked = stacked[stacked.notna()]
+    return _unwrap_single(stacked.groupby(level=0, sort=False).agg(list), df.index)
+
+def transform_uri(uris):
+    ids = uris.str.split("||", regex=False).str[0].str.split("handle/", regex=False).str[1].str.replace("/", "-", regex=False)
+    malformed = uris.notna() & ids.isna()
+    if malformed.any():
+        print(f"uris mal formateados: {malformed.sum()} - {uris[malformed].head(5).tolist()}")
+    return ids
+
+def transform_subjects(subjects):
+    return split_part(split_part(subjects, "||"), "::").map(SUBJECT_MAPPING)
+
+def _split_elements(values):
+    elements = values.str.split("||", regex=False).explode()
+    return split_part(elements.dropna(), "::").groupby(level=0, sort=False)
+
+def transform_contributors(values):
+    return _unwrap_single(_split_elements(values).agg(list), values.index)
+
+def transform_institutions(values):
+    return _split_elements(values).agg(", ".join).reindex(values.index)
+
+def transform_degree(values):
+    return split_part(values, "::")
+
+def combine_title_subtitle(titles, subtitles):
+    combined = titles.where(subtitles.isna(), titles + ": " + subtitles)
+    return combined.fillna(subtitles)
+
+def _merge_chunk(chunk, final_columns):
+    """Merge the COLUMNS_TYPES columns of one CSV chunk and keep only the rows the dataset can use."""
     for key, values in final_columns.items():
         if not values:
             continue
         if COLUMNS_TYPES[key]['cant'] == "unique":
-            subset_df[key] = subset_df[values].ffill(axis=1).bfill(axis=1).iloc[:, 0]
-            subset_df[key] = subset_df[key].where(subset_df[key].notnull(), None)
+            chunk[key] = first_non_null(chunk, values)
         else:
-            subset_df[key] = subset_df.apply(lambda row: combine_non_nulls(row, values), axis=1)
-
-    extra_cols = [col for col in selected_cols if col not in COLUMNS_TYPES]
-    subset_df.drop(extra_cols, axis=1, inplace=True, errors='ignore')
+            chunk[key] = combine_non_nulls(chunk, values)
+
+    chunk = chunk[[key for key, values in final_columns.items() if values]]
+    chunk = chunk.loc[:, ~chunk.columns.duplicated()]
+
+    # format='mixed': parse each date on its own (SEDICI mixes 2020, 2020-05 and 2020-05-12), so the result
+    # does not depend on which chunk a row falls in. utc=True: some dates carry a zone (2022-11-01T00:00:00Z),
+    # and mixed with naive ones pandas would return objects without .dt; stored naive (UTC) as before
+    dates = pd.to_datetime(chunk['dc.date.issued'], errors='coerce', format='mixed', utc=True)
+    chunk['dc.date.issued'] = dates.dt.tz_localize(None)
+    return chunk[(chunk['dc.date.issued'].dt.year > 2018) & chunk['dc.type'].isin(VALID_TYPES)]
+
+def merge_data(csv_filename, filtered_csv_filename, chunk_rows=CSV_CHUNK_ROWS):
+    """
+    Filter and normalize the SEDICI export into filtered_csv_filename.
+    The export is read in chunks of chunk_rows rows with only the COLUMNS_TYPES columns (as strings),
+    so memory is bounded by one chunk plus the rows that pass the filters.
+    """
+    header = pd.read_csv(csv_filename, nrows=0).columns
 
-    # 🔥 DELETE DUPLICATED COLUMNS
-    subset_df = subset_df.loc[:, ~subset_df.columns.duplicated()]
-
-    subset_df['dc.date.issued'] = pd.to_datetime(subset_df['dc.date.issued'], errors='coerce')
-    subset_df = subset_df[subset_df['dc.date.issued'].dt.year > 2018]
+    # Match columns from COLUMNS_TYPES
+    final_columns = {key: [col for col in header if key in col] for key in COLUMNS_TYPES}
+    selected_cols = list(dict.fromkeys(col for cols in final_columns.values() for col in cols))
 
-    subset_df = subset_df[subset_df['dc.type'].isin(VALID_TYPES)]
+    chunks = pd.read_csv(csv_filename, usecols=selected_cols, dtype=str, chunksize=chunk_rows)
+    subset_df = pd.concat([_merge_chunk(chunk, final_columns) for chunk in chunks], ignore_index=True)
 
     subset_df["not_null_count"] = subset_df.notnull().sum(axis=1)
-    subset_df = subset_df.sort_values(by='not_null_count', ascending=False).drop(columns=['not_null_count'])
+    subset_df = subset_df.sort_values(by='not_null_count', ascending=False, kind='stable').drop(columns=['not_null_count'])
 
-    subset_df['id'] = subset_df['dc.identifier.uri'].apply(transform_uri)
+    subset_df['id'] = transform_uri(subset_df['dc.identifier.uri'])
 
     for degree_col in ["thesis.degree.name", "thesis.degree.grantor"]:
-        subset_df[degree_col] = subset_df[degree_col].apply(transform_degree)
+        subset_df[degree_col] = transform_degree(subset_df[degree_col])
 
-    subset_df['sedici.subject.materias'] = subset_df['sedici.subject.materias'].apply(transform_subject)
+    subset_df['sedici.subject.materias'] = transform_subjects(subset_df['sedici.subject.materias'])
 
     contributor_cols = [
         "sedici.contributor.compiler", "sedici.contributor.director",
@@ -115,28 +131,52 @@ def merge_data(csv_filename, filtered_csv_filename):
         "sedici.contributor.colaborator"
     ]
     for col in contributor_cols:
-        subset_df[col] = subset_df[col].apply(transform_contributors)
+        subset_df[col] = transform_contributors(subset_df[col])
 
     institution_cols = ["mods.originInfo.place", "sedici.institucionDesarrollo"]
     for col in institution_cols:
-        subset_df[col] = subset_df[col].apply(transform_institutions)
+        subset_df[col] = transform_institutions(subset_df[col])
 
-    subset_df["dc.subject"] = subset_df["dc.subject"].apply(lambda x: x.split("||") if isinstance(x, str) else None)
+    subset_df["dc.subject"] = subset_df["dc.subject"].str.split("||", regex=False)
 
     # Combine title and subtitle
-    subset_df['dc.title'] = subset_df.apply(lambda row: combine_title_subtitle(row['dc.title'], row.get('sedici.title.subtitle')), axis=1)
-    
-    # Remove subtitle column since it's now combined with title
     if 'sedici.title.subtitle' in subset_df.columns:
+        subset_df['dc.title'] = combine_title_subtitle(subset_df['dc.title'], subset_df['sedici.title.subtitle'])
+        # Remove subtitle column since it's now combined with title
         subset_df = subset_df.drop('sedici.title.subtitle', axis=1)
 
     print("guardando csv")
     subset_df.to_csv(filtered_csv_filename, index=False)
+    write_parquet_cache(filtered_csv_filename)
     print("terminado")
 
 
+def _parquet_filename(csv_filename):
+    return Path(csv_filename).with_suffix(".parquet")
+
+def write_parquet_cache(csv_filename):
+    """Store the filtered CSV, as read_csv parses it, next to it as Parquet (needs pyarrow)."""
+    if not PARQUET_AVAILABLE:
+        return
+    parquet_filename = _parquet_filename(csv_filename)
+    try:
+        pd.read_csv(csv_filename).to_parquet(parquet_filename, index=False)
+    except (TypeError, ValueError) as e:
+        # a column read_csv typed differently per chunk (str in one, float in another) has no Arrow type;
+        # read_filtered_csv then falls back to the CSV
+        parquet_filename.unlink(missing_ok=True)
+        print(f"{Bcolors.WARNING}Parquet cache skipped for {csv_filename}: {e}{Bcolors.ENDC}")
+
+def read_filtered_csv(csv_filename):
+    """read_csv(csv_filename), served from the Parquet cache when it is at least as new as the CSV."""
+    parquet_filename = _parquet_filename(csv_filename)
+    if PARQUET_AVAILABLE and parquet_filename.exists() and parquet_filename.stat().st_mtime >= Path(csv_filename).stat().st_mtime:
+        return pd.read_parquet(parquet_filename)
+    return pd.read_csv(csv_filename)
+
+
 def get_ids_from_csv(csv_file, samples_per_type=SAMPLES_PER_TYPE):
-    df = pd.read_csv(csv_file)
+    df = read_filtered_csv(csv_file)
     
     # Remove duplicates and filter by valid ids
     df = df.dropna(subset=["id"]).drop_duplicates(subset=["id"])
@@ -1,37 +1,209 @@
+import multiprocessing
 import os
-from utils.text_extraction.pdf_reader import PdfReader
+import sys
+import time
+from collections import deque
+from multiprocessing.connection import wait
+from utils.text_extraction.pdf_reader import PdfReader, get_ocr_reader
 from utils.text_extraction.read_and_write_files import write_to_text,read_data_json,read_data_txt,detect_encoding,write_to_json
-from multiprocessing import Pool
-from constants import TXT_FOLDER,PDF_FOLDER,COLUMNS_TYPES
+from constants import TXT_FOLDER,PDF_FOLDER,JSON_FOLDER,COLUMNS_TYPES,EXTRACTION_WORKERS,EXTRACTION_TIMEOUT_SECONDS,EXTRACTION_MAX_TASKS_PER_CHILD,EXTRACTION_FAILURES_FILENAME
 from utils.colors.colors_terminal import Bcolors
-import pandas as pd
+from download_prepare_clean_normalize_sedici_dataset.extract_data_from_csv_sedici import read_filtered_csv
+
+
+def _limit_threads():
+    """One OCR/BLAS thread per worker process, otherwise N workers x N threads oversubscribe the CPU."""
+    # numpy was imported (and its BLAS pool created) before the fork, so the env vars only reach
+    # libraries loaded from here on; threadpoolctl and torch.set_num_threads cover the rest
+    os.environ["OMP_NUM_THREADS"] = "1"
+    os.environ["MKL_NUM_THREADS"] = "1"
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(1)
+    except ImportError:
+        pass
+    try:
+        get_ocr_reader()  # loads torch through EasyOCR before the first document, outside its timeout
+    except Exception as e:
+        print(f"{Bcolors.WARNING}OCR reader not initialized: {e}{Bcolors.ENDC}")
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(1)
+
+
+def _worker_main(conn):
+    """Extract the documents the parent sends through conn, one at a time, until it sends None."""
+    _limit_threads()
+    conn.send(None)
+    while True:
+        task = conn.recv()
+        if task is None:
+            return
+        conn.send(process_pdf_data(*task))
+
+
+class _ExtractionWorker:
+    """A worker process the parent can kill when its document runs past the timeout."""
+
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.task = None
+        self.started = None
+        self.tasks_done = 0
+
+    def send(self, task):
+        self.task = task
+        self.started = time.perf_counter()
+        self.conn.send(task)
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
 
-def process_pdf_data_wrapper(args):
-    return process_pdf_data(*args)
 
 def process_pdf_data(pdf_path, pdf_id):
-    print(pdf_id)
+    """Extract one PDF into TXT_FOLDER. Returns a status dict instead of raising, so one bad PDF never stops the run."""
+    start = time.perf_counter()
     try:
         pdfreader = PdfReader()
         text = pdfreader.extract_text_with_xml_tags(pdf_path,ocr=True)
         txt_filename=TXT_FOLDER / f"{pdf_id}.txt"
         write_to_text(txt_filename,text)
+        return {"id": pdf_id, "ok": True, "seconds": time.perf_counter() - start, "chars": len(text)}
     except Exception as e:
-        print(f"{Bcolors.FAIL}error processing pdf{pdf_id} with error {e}{Bcolors.ENDC}")
+        return {"id": pdf_id, "ok": False, "seconds": time.perf_counter() - start, "error": f"{type(e).__name__}: {e}"}
+
+
+def _print_progress(done, total, failed, start):
+    elapsed = time.perf_counter() - start
+    rate = done / elapsed if elapsed else 0.0
+    eta = (total - done) / rate if rate else 0.0
+    print(f"{Bcolors.OKBLUE}[{done}/{total}] {rate:.2f} docs/s, {failed} failed, elapsed {elapsed:.0f}s, eta {eta:.0f}s{Bcolors.ENDC}")
+
+
+def _run_extraction(tasks, workers, timeout, max_tasks_per_child):
+    """
+    Yield the result of every task, extracted by `workers` processes.
+
+    The parent hands out one document at a time and times it itself: a worker still busy after
+    `timeout` seconds (stuck inside pdfminer or torch, where no signal gets through) or that dies
+    is killed and replaced, and its document is reported as failed.
+    """
+    context = multiprocessing.get_context()
+    pending = deque(tasks)
+    pool = [_ExtractionWorker(context) for _ in range(min(workers, len(pending)))]
+    try:
+        while pool:
+            for worker in pool:
+                if worker.ready and worker.task is None and pending:
+                    worker.send(pending.popleft())
+            ready = wait([worker.conn for worker in pool], timeout=1)
+            now = time.perf_counter()
+            for i, worker in enumerate(pool):
+                result, replace = None, False
+                if worker.conn in ready:
+                    try:
+                        message = worker.conn.recv()
+                    except EOFError:
+                        replace = True
+                        worker.kill()
+                        if worker.task:
+                            result = {"id": worker.task[1], "ok": False, "seconds": now - worker.started,
+                                      "error": f"worker died (exit code {worker.process.exitcode})"}
+                    else:
+                        if message is None:
+                            worker.ready = True
+                        else:
+                            result = message
+                            worker.task = None
+                            worker.tasks_done += 1
+                            if max_tasks_per_child and worker.tasks_done >= max_tasks_per_child:
+                                worker.stop()
+                                replace = True
+                elif worker.task and timeout and now - worker.started > timeout:
+                    result = {"id": worker.task[1], "ok": False, "seconds": now - worker.started,
+                              "error": f"timeout after {timeout}s"}
+                    worker.kill()
+                    replace = True
+                if replace:
+                    pool[i] = _ExtractionWorker(context) if pending else None
+                if result is not None:
+                    yield result
+            pool = [worker for worker in pool if worker is not None]
+            if not pending:
+                for worker in pool:
+                    if worker.task is None:
+                        worker.stop()
+                pool = [worker for worker in pool if worker.task is not None]
+    finally:
+        for worker in pool:
+            worker.kill()
 
-def extract_text(selected_ids=None):
+
+def extract_text(selected_ids=None, workers=EXTRACTION_WORKERS, timeout=EXTRACTION_TIMEOUT_SECONDS,
+                 max_tasks_per_child=EXTRACTION_MAX_TASKS_PER_CHILD):
+    """
+    Extract every PDF without a .txt yet, in parallel.
+
+    Args:
+        selected_ids: ids to extract (default: every PDF in PDF_FOLDER)
+        workers: worker processes (default: CPU count)
+        timeout: seconds per document before its worker is killed and the document recorded as failed
+        max_tasks_per_child: documents per worker before it is replaced (bounds pdfplumber/OCR memory growth)
+
+    Failures are written to EXTRACTION_FAILURES_FILENAME in JSON_FOLDER.
+    """
     text = [x.replace(".txt",".pdf") for x in os.listdir(TXT_FOLDER)]
     if selected_ids:
         pdf_paths = [(str(PDF_FOLDER / f"{id_val}.pdf"), id_val) for id_val in selected_ids if f"{id_val}.pdf" not in text and (PDF_FOLDER / f"{id_val}.pdf").exists()]
     else:
-        pdf_paths = [(os.path.join(PDF_FOLDER,x),x.replace(".pdf","")) for x in os.listdir(PDF_FOLDER) if x not in text]      
-    with Pool(2) as pool:
-        pool.map(process_pdf_data_wrapper, pdf_paths)
+        pdf_paths = [(os.path.join(PDF_FOLDER,x),x.replace(".pdf","")) for x in os.listdir(PDF_FOLDER) if x not in text]
+    if not pdf_paths:
+        print(f"{Bcolors.OKGREEN}All PDFs already extracted{Bcolors.ENDC}")
+        return
+
+    workers = workers or os.cpu_count() or 1
+    total = len(pdf_paths)
+    print(f"{Bcolors.OKGREEN}Extracting {total} PDFs with {workers} workers (timeout {timeout}s){Bcolors.ENDC}")
+
+    failures = {}
+    done = 0
+    start = time.perf_counter()
+    last_report = start
+    for result in _run_extraction(pdf_paths, workers, timeout, max_tasks_per_child):
+        done += 1
+        if not result["ok"]:
+            failures[result["id"]] = {"error": result["error"], "seconds": round(result["seconds"], 1)}
+            print(f"{Bcolors.FAIL}error processing pdf {result['id']}: {result['error']}{Bcolors.ENDC}")
+        now = time.perf_counter()
+        if now - last_report >= 10 or done == total:
+            _print_progress(done, total, len(failures), start)
+            last_report = now
+
+    elapsed = time.perf_counter() - start
+    print(f"{Bcolors.OKGREEN}Extracted {total - len(failures)}/{total} PDFs in {elapsed:.0f}s ({total / elapsed:.2f} docs/s){Bcolors.ENDC}")
+    failures_filename = JSON_FOLDER / EXTRACTION_FAILURES_FILENAME
+    if failures:
+        write_to_json(failures_filename, failures, "utf-8")
+        print(f"{Bcolors.WARNING}{len(failures)} failures written to {failures_filename}{Bcolors.ENDC}")
+    elif failures_filename.exists():
+        failures_filename.unlink()
     return
 
 
 def make_json_metadata(metadata_filename,csv_filename,selected_ids):
-    df = pd.read_csv(csv_filename)
+    df = read_filtered_csv(csv_filename)
     df = df[df['id'].isin(selected_ids)]
     rename_dict = {key: value["rename"] for key, value in COLUMNS_TYPES.items() if value.get("rename")}
     df = df.rename(columns=rename_dict)
@@ -41,12 +213,21 @@ def make_json_metadata(metadata_filename,csv_filename,selected_ids):
     dict_metadata = df.set_index('id').to_dict(orient='index')
     write_to_json(metadata_filename,dict_metadata,"utf-8")
 
-def add_text_input_to_dataset(metadata_filename, metadata_text_filename):
+def add_text_input_to_dataset(metadata_filename, metadata_text_filename, only_ids=None):
+    """
+    Join the metadata with the extracted texts into metadata_text_filename.
+    With only_ids, only those entries are (re)built; the rest of an existing output is kept as is
+    (minus ids that no longer have metadata or a text).
+    """
     enc = detect_encoding(metadata_filename)['encoding']
     dict_metadata = read_data_json(metadata_filename, enc)
-    texts = [x.replace(".txt", "") for x in os.listdir(TXT_FOLDER)]
+    texts = set(x.replace(".txt", "") for x in os.listdir(TXT_FOLDER))
     keys_to_iterate = [key for key in dict_metadata.keys() if key in texts]
     filtered_metadata = {}
+    if only_ids is not None and metadata_text_filename.exists():
+        previous = read_data_json(metadata_text_filename, "utf-8")
+        filtered_metadata = {k: v for k, v in previous.items() if k in dict_metadata and k in texts and k not in only_ids}
+        keys_to_iterate = [key for key in keys_to_iterate if key in only_ids]
     for k in keys_to_iterate:
         try:
             txt_filename = TXT_FOLDER / f"{k}.txt"
@@ -1,19 +1,57 @@
 from download_prepare_clean_normalize_sedici_dataset.cloud_llm_cleaner_consumer.genai_consumer import GenaiConsumer
 from download_prepare_clean_normalize_sedici_dataset.cloud_llm_cleaner_consumer.openai_consumer import OpenaiConsumer
-from download_prepare_clean_normalize_sedici_dataset.extract_text_make_dataset import extract_and_make_dataset
+from download_prepare_clean_normalize_sedici_dataset.extract_text_make_dataset import extract_text, make_json_metadata, add_text_input_to_dataset
 from download_prepare_clean_normalize_sedici_dataset.download_data import download_files
 from download_prepare_clean_normalize_sedici_dataset.extract_data_from_csv_sedici import merge_data,get_ids_from_csv
 from download_prepare_clean_normalize_sedici_dataset.exact_match_validator import apply_exact_match_validation
-from constants import CSV_FOLDER,PDF_FOLDER,JSON_FOLDER,TXT_FOLDER,CSV_SEDICI,CSV_SEDICI_FILTERED,DATASET_WITH_METADATA_AND_TEXT_DOC,DATASET_WITH_METADATA,DATASET_WITH_METADATA_AND_TEXT_DOC_CHECKED,DATASET_WITH_METADATA_AND_TEXT_DOC_CLEANED,CLEAN_PROVIDER_TO_USE
+from constants import CSV_FOLDER,PDF_FOLDER,JSON_FOLDER,TXT_FOLDER,CSV_SEDICI,CSV_SEDICI_FILTERED,DATASET_WITH_METADATA_AND_TEXT_DOC,DATASET_WITH_METADATA,DATASET_WITH_METADATA_AND_TEXT_DOC_CHECKED,DATASET_WITH_METADATA_AND_TEXT_DOC_CLEANED,CLEAN_PROVIDER_TO_USE,CLEAN_USE_BATCH,PIPELINE_MANIFEST_FILENAME
 import os
 from utils.colors.colors_terminal import Bcolors
 from download_prepare_clean_normalize_sedici_dataset.split_dataset_and_normalize_text import normalize_and_split_dataset, normalize_dataset_pre_llm
+from download_prepare_clean_normalize_sedici_dataset.pipeline_manifest import PipelineManifest, hash_value, hash_values
+from utils.download.pdf_downloader import pdf_url
+from utils.text_extraction.read_and_write_files import read_data_json
+from utils.text_extraction.jsonl_dataset import iter_json_records, write_json_records
 
 CLEAN_PROVIDERS = {
     "genai": GenaiConsumer,
     "openai": OpenaiConsumer,
 }
 
+
+def entry_hashes(filename):
+    """{id: hash of the entry} for a dataset JSON, empty if it does not exist yet."""
+    return {k: hash_value(v) for k, v in iter_json_records(filename)}
+
+
+def run_stage(manifest, stage, inputs, process, outputs, adopt=False, record_missing=False):
+    """
+    Run one pipeline stage over the documents whose input changed.
+
+    inputs: {id: input hash}. process(pending ids) runs the stage and outputs() returns {id: output hash}
+    afterwards; only the pending documents are (re)recorded, the rest keep the hashes of the run that
+    produced them. Documents without an output (a failed extraction, a document the LLM did not clean) are not
+    recorded unless record_missing, so the next run retries them. With adopt (an output from a run that
+    predates the manifest exists and the stage has no records yet) the existing output is recorded as is.
+    """
+    if adopt and not manifest.has_stage(stage):
+        print(f"{Bcolors.OKBLUE}[manifest] {stage}: adopting the existing output of {len(inputs)} documents{Bcolors.ENDC}")
+        pending, to_record = [], list(inputs)
+    else:
+        pending = manifest.changed(stage, inputs)
+        manifest.report(stage, pending, len(inputs))
+        to_record = pending
+    stale = [doc_id for doc_id, stages in manifest.documents.items() if stage in stages and doc_id not in inputs]
+    manifest.forget(stage, stale)
+    if pending or stale:
+        process(pending)
+    produced = outputs()
+    done = {doc_id: inputs[doc_id] for doc_id in to_record if record_missing or produced.get(doc_id) is not None}
+    manifest.record(stage, done, produced)
+    manifest.save()
+    return pending
+
+
 if __name__ == "__main__":
     csv_filename = CSV_FOLDER / CSV_SEDICI
     filtered_csv_filename = CSV_FOLDER / CSV_SEDICI_FILTERED
@@ -28,36 +66,102 @@ if __name__ == "__main__":
         print(f"{Bcolors.OKGREEN}merging csv{Bcolors.ENDC}")
         merge_data(csv_filename,filtered_csv_filename)
 
-    #download pdfs
-    if not (PDF_FOLDER).exists():
-        print(f"{Bcolors.OKGREEN}creating pdf folder{Bcolors.ENDC}")
-        os.makedirs(PDF_FOLDER)
+    for folder in (PDF_FOLDER, JSON_FOLDER, TXT_FOLDER):
+        if not (folder).exists():
+            print(f"{Bcolors.OKGREEN}creating {folder} folder{Bcolors.ENDC}")
+            os.makedirs(folder)
+
+    # every stage below only processes the documents whose input changed since the last run
+    manifest = PipelineManifest(JSON_FOLDER / PIPELINE_MANIFEST_FILENAME)
     ids = get_ids_from_csv(filtered_csv_filename)
-    if ids:
-        print(f"{Bcolors.OKGREEN}downloading pdfs{Bcolors.ENDC}")
-        download_files(ids)
+    manifest.prune(ids)
+
+    #download pdfs
+    print(f"{Bcolors.OKGREEN}downloading pdfs{Bcolors.ENDC}")
+    run_stage(
+        manifest, "download",
+        {doc_id: hash_value(pdf_url(doc_id)) for doc_id in ids},
+        download_files,
+        lambda: {doc_id: manifest.file_hash(PDF_FOLDER / f"{doc_id}.pdf") for doc_id in ids},
+    )
+
     #extract text from pdfs
-    if not (json_metadata_and_text_filename).exists():
-        if not (JSON_FOLDER).exists():
-            print(f"{Bcolors.OKGREEN}creating json folder{Bcolors.ENDC}")
-            os.makedirs(JSON_FOLDER)
-        if not (TXT_FOLDER).exists():
-            print(f"{Bcolors.OKGREEN}creating txt folder{Bcolors.ENDC}")
-            os.makedirs(TXT_FOLDER)
-        print(f"{Bcolors.OKGREEN}extracting text and making dataset{Bcolors.ENDC}")
-        extract_and_make_dataset(json_metadata_filename,json_metadata_and_text_filename,filtered_csv_filename,ids)
-    # pre-llm normalization: filter corrupted docs, normalice_text, remove_honorifics
-    print(f"{Bcolors.OKGREEN}pre-llm normalization{Bcolors.ENDC}")
-    normalize_dataset_pre_llm(json_metadata_and_text_filename, json_metadata_filename)
+    def reextract(pending):
+        for doc_id in pending:
+            (TXT_FOLDER / f"{doc_id}.txt").unlink(missing_ok=True)
+        if pending:
+            extract_text(pending)
+
+    ids_with_pdf = [doc_id for doc_id in ids if manifest.output("download", doc_id)]
+    print(f"{Bcolors.OKGREEN}extracting text{Bcolors.ENDC}")
+    run_stage(
+        manifest, "extract",
+        {doc_id: manifest.output("download", doc_id) for doc_id in ids_with_pdf},
+        reextract,
+        lambda: {doc_id: manifest.file_hash(TXT_FOLDER / f"{doc_id}.txt") for doc_id in ids_with_pdf},
+        adopt=any(TXT_FOLDER.iterdir()),
+    )
+
+    # join metadata and text + pre-llm normalization: filter corrupted docs, normalice_text, remove_honorifics
+    def normalize(pending):
+        add_text_input_to_dataset(json_metadata_filename,json_metadata_and_text_filename,pending)
+        normalize_dataset_pre_llm(json_metadata_and_text_filename, json_metadata_filename, pending)
+
+    print(f"{Bcolors.OKGREEN}making dataset and pre-llm normalization{Bcolors.ENDC}")
+    make_json_metadata(json_metadata_filename,filtered_csv_filename,ids_with_pdf)
+    metadata = read_data_json(json_metadata_filename,"utf-8")
+    run_stage(
+        manifest, "normalize",
+        {doc_id: hash_values(manifest.output("extract", doc_id), hash_value(entry))
+         for doc_id, entry in metadata.items() if manifest.output("extract", doc_id)},
+        normalize,
+        lambda: entry_hashes(json_metadata_and_text_filename),
+        adopt=json_metadata_and_text_filename.exists(),
+        record_missing=True,
+    )
+
     # clean metadata
-    if not (json_metadata_and_text_checked_filename).exists():
+    def clean(pending):
+        if json_metadata_and_text_cleaned_filename.exists():
+            tmp_filename = json_metadata_and_text_cleaned_filename.with_name(json_metadata_and_text_cleaned_filename.name + ".tmp")
+            keep = ((k, v) for k, v in iter_json_records(json_metadata_and_text_cleaned_filename) if k in clean_inputs and k not in pending)
+            write_json_records(tmp_filename,keep)
+            os.replace(tmp_filename,json_metadata_and_text_cleaned_filename)
+        if not pending:
+            return
         consumer_class = CLEAN_PROVIDERS[CLEAN_PROVIDER_TO_USE]
         consumer = consumer_class()
-        consumer.clean_metadata(json_metadata_and_text_filename,json_metadata_and_text_cleaned_filename)
+        if CLEAN_USE_BATCH:
+            consumer.clean_metadata_batch(json_metadata_and_text_filename,json_metadata_and_text_cleaned_filename)
+        else:
+            consumer.clean_metadata(json_metadata_and_text_filename,json_metadata_and_text_cleaned_filename)
+
+    clean_inputs = {doc_id: manifest.output("normalize", doc_id) for doc_id in metadata if manifest.output("normalize", doc_id)}
+    run_stage(
+        manifest, "clean", clean_inputs, clean,
+        lambda: entry_hashes(json_metadata_and_text_cleaned_filename),
+        adopt=json_metadata_and_text_cleaned_filename.exists(),
+    )
+
     # apply exact match validation
     print(f"{Bcolors.OKGREEN}applying exact match validation{Bcolors.ENDC}")
-    apply_exact_match_validation(json_metadata_and_text_cleaned_filename, json_metadata_and_text_filename)
-    # split dataset and normalize text
+    validated_ids = [doc_id for doc_id in clean_inputs if manifest.output("clean", doc_id)]
+    run_stage(
+        manifest, "validate",
+        {doc_id: hash_values(manifest.output("clean", doc_id), clean_inputs[doc_id]) for doc_id in validated_ids},
+        lambda pending: apply_exact_match_validation(json_metadata_and_text_cleaned_filename, json_metadata_and_text_filename, pending),
+        lambda: entry_hashes(json_metadata_and_text_cleaned_filename),
+        adopt=json_metadata_and_text_checked_filename.exists(),
+        record_missing=True,
+    )
+
+    # split dataset and normalize text (documents already in a split keep it)
     print(f"{Bcolors.OKGREEN}splitting dataset and normalizing text{Bcolors.ENDC}")
-    normalize_and_split_dataset(json_metadata_and_text_cleaned_filename,json_metadata_filename,json_metadata_and_text_checked_filename)
-   
\ No newline at end of file
+    run_stage(
+        manifest, "split",
+        {doc_id: manifest.output("validate", doc_id) for doc_id in validated_ids},
+        lambda pending: normalize_and_split_dataset(json_metadata_and_text_cleaned_filename,json_metadata_filename,json_metadata_and_text_checked_filename,pending),
+        lambda: {},
+        adopt=json_metadata_and_text_checked_filename.exists(),
+        record_missing=True,
+    )
@@ -0,0 +1,119 @@
+"""
+Per-document manifest for the incremental dataset pipeline.
+
+For every document and stage (download, extract, normalize, clean, validate,
+split) the manifest stores the stage version and the hash of the input the stage
+consumed, plus the hash of what it produced (the next stage's input). A stage
+only reprocesses documents whose input hash changed, that it has never seen, or
+that were produced by an older STAGE_VERSIONS entry; everything else is reused
+from the previous run's outputs.
+
+Bump a STAGE_VERSIONS entry when the logic of that stage changes so every
+document goes through it (and, through the changed output hashes, the stages
+after it) again.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from utils.colors.colors_terminal import Bcolors
+
+STAGE_VERSIONS = {
+    "download": 1,
+    "extract": 1,
+    "normalize": 1,
+    "clean": 1,
+    "validate": 1,
+    "split": 1,
+}
+
+HASH_CHARS = 16
+
+
+def hash_value(value) -> str:
+    """Stable hash of a JSON-serializable value (dict key order does not matter)."""
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:HASH_CHARS]
+
+
+def hash_values(*hashes) -> str:
+    return hashlib.sha256("|".join(h or "" for h in hashes).encode("utf-8")).hexdigest()[:HASH_CHARS]
+
+
+class PipelineManifest:
+
+    def __init__(self, filename: Path):
+        self.filename = Path(filename)
+        data = {}
+        if self.filename.exists():
+            with open(self.filename, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        self.documents = data.get("documents", {})
+        self.files = data.get("files", {})
+
+    def file_hash(self, path: Path):
+        """Content hash of a file, recomputed only when its size or mtime changed. None if missing."""
+        path = Path(path)
+        if not path.exists():
+            return None
+        stat = path.stat()
+        cached = self.files.get(path.name)
+        if cached and cached["size"] == stat.st_size and cached["mtime"] == stat.st_mtime:
+            return cached["hash"]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        file_hash = digest.hexdigest()[:HASH_CHARS]
+        self.files[path.name] = {"size": stat.st_size, "mtime": stat.st_mtime, "hash": file_hash}
+        return file_hash
+
+    def has_stage(self, stage: str) -> bool:
+        return any(stage in stages for stages in self.documents.values())
+
+    def changed(self, stage: str, inputs: dict) -> list:
+        """Ids in inputs ({id: input hash}) that the stage has to (re)process."""
+        version = STAGE_VERSIONS[stage]
+        pending = []
+        for doc_id, input_hash in inputs.items():
+            entry = self.documents.get(doc_id, {}).get(stage)
+            if not entry or entry["version"] != version or entry["input"] != input_hash:
+                pending.append(doc_id)
+        return pending
+
+    def record(self, stage: str, inputs: dict, outputs: dict = None):
+        """Mark the stage done for inputs ({id: input hash}); outputs ({id: output hash}) feed the next stage."""
+        version = STAGE_VERSIONS[stage]
+        outputs = outputs or {}
+        for doc_id, input_hash in inputs.items():
+            self.documents.setdefault(doc_id, {})[stage] = {
+                "version": version,
+                "input": input_hash,
+                "output": outputs.get(doc_id),
+            }
+
+    def output(self, stage: str, doc_id: str):
+        return self.documents.get(doc_id, {}).get(stage, {}).get("output")
+
+    def forget(self, stage: str, ids):
+        for doc_id in ids:
+            self.documents.get(doc_id, {}).pop(stage, None)
+
+    def prune(self, ids):
+        """Drop documents that left the dataset."""
+        keep = set(ids)
+        for doc_id in [d for d in self.documents if d not in keep]:
+            del self.documents[doc_id]
+
+    def save(self):
+        self.filename.parent.mkdir(parents=True, exist_ok=True)
+        tmp_filename = self.filename.with_name(self.filename.name + ".tmp")
+        with open(tmp_filename, "w", encoding="utf-8") as f:
+            json.dump({"stage_versions": STAGE_VERSIONS, "documents": self.documents, "files": self.files}, f)
+        os.replace(tmp_filename, self.filename)
+
+    def report(self, stage: str, pending: list, total: int):
+        reused = total - len(pending)
+        print(f"{Bcolors.OKBLUE}[manifest] {stage}: {len(pending)} to process, {reused} reused{Bcolors.ENDC}")
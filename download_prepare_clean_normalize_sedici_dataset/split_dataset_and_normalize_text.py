@@ -1,5 +1,6 @@
 from utils.normalization.normalice_data import normalice_text, get_corrects_keywords, remove_honorifics, amend_title_with_subtitle
 from utils.text_extraction.read_and_write_files import read_data_json,write_to_json
+from utils.text_extraction.jsonl_dataset import iter_json_keys
 from constants import PERCENTAGE_DATASET_FOR_STEPS
 from collections import defaultdict
 import random
@@ -225,20 +226,57 @@ def clean_metadata_nulls(metadata):
     return metadata, total_fields_removed
 
 
-def normalize_dataset_pre_llm(json_filename, original_json_filename):
+def normalize_dataset_pre_llm(json_filename, original_json_filename, only_ids=None):
+    """With only_ids, only those entries are normalized; the others are already normalized from a previous run."""
     data = read_data_json(json_filename, "utf-8")
     original_metadata = read_data_json(original_json_filename, "utf-8")
+    subset = data if only_ids is None else {k: v for k, v in data.items() if k in only_ids}
 
     # Filter heavily corrupted documents (>70% CID) and clean lightly corrupted ones
-    data, corruption_stats = filter_heavily_corrupted_documents(data, corruption_threshold=70.0)
+    subset, corruption_stats = filter_heavily_corrupted_documents(subset, corruption_threshold=70.0)
 
-    data = final_normalization_post_llm(data, original_metadata)
+    subset = final_normalization_post_llm(subset, original_metadata)
+    if only_ids is not None:
+        data = {k: v for k, v in data.items() if k not in only_ids}
+        data.update(subset)
+    else:
+        data = subset
     write_to_json(json_filename, data, "utf-8")
 
 
-def normalize_and_split_dataset(json_filename,original_json_filename,split_filename):
+def assign_to_splits(splits, new_items):
+    """
+    Add new_items ({id: item}) to an existing split without moving any document already in it:
+    each new document goes to the split furthest below its PERCENTAGE_DATASET_FOR_STEPS share for its type.
+    """
+    counts = defaultdict(lambda: defaultdict(int))
+    for split, samples in splits.items():
+        for sample in samples:
+            counts[sample.get("type", "unknown")][split] += 1
+    for id_ in sorted(new_items):
+        item = new_items[id_]
+        doc_type = item.get("type", "unknown")
+        type_total = sum(counts[doc_type].values()) + 1
+        split = max(
+            splits.keys(),
+            key=lambda name: PERCENTAGE_DATASET_FOR_STEPS[name] * type_total - counts[doc_type][name],
+        )
+        splits[split].append({**item, "id": id_})
+        counts[doc_type][split] += 1
+    print(f"Added {len(new_items)} documents - training: {len(splits['training'])}, test: {len(splits['test'])}, validation: {len(splits['validation'])}")
+    return splits
+
+
+def normalize_and_split_dataset(json_filename,original_json_filename,split_filename,only_ids=None):
+    """
+    With only_ids and an existing split_filename, only those documents are normalized and (re)assigned;
+    every other document keeps its split, so test/validation stay stable across incremental runs.
+    """
     data = read_data_json(json_filename,"utf-8")
     original_metadata = read_data_json(original_json_filename,"utf-8")
+    incremental = only_ids is not None and split_filename.exists()
+    if incremental:
+        data = {k: v for k, v in data.items() if k in only_ids}
 
     # Clean null/empty values before normalization
     data, removed_fields = clean_metadata_nulls(data)
@@ -247,4 +285,12 @@ def normalize_and_split_dataset(json_filename,original_json_filename,split_filen
     data, corruption_stats = filter_heavily_corrupted_documents(data, corruption_threshold=70.0)
 
     data = final_normalization_post_llm(data,original_metadata)
-    write_to_json(split_filename,split_dataset(data),"utf-8")
\ No newline at end of file
+    if not incremental:
+        write_to_json(split_filename,split_dataset(data),"utf-8")
+        return
+
+    all_ids = set(iter_json_keys(json_filename))
+    splits = read_data_json(split_filename,"utf-8")
+    for split in splits:
+        splits[split] = [s for s in splits[split] if s["id"] in all_ids and s["id"] not in only_ids]
+    write_to_json(split_filename,assign_to_splits(splits, data),"utf-8")
\ No newline at end of file
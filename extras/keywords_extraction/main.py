@@ -26,6 +26,7 @@ from collections import defaultdict
 sys.path.append(str(Path(__file__).parent.parent.parent))
 sys.path.append(str(Path(__file__).parent.parent))
 from constants import TXT_NO_TAGS_FOLDER, CSV_FOLDER
+from utils.ml_strategies.compact_artifacts import export_vectorizer
 from abstract_extraction.main import strategy_b_inline, strategy_a_standalone
 
 # ── Config ─────────────────────────────────────────────────────────────────────
@@ -39,6 +40,7 @@ TOP_N_TFIDF    = 10
 TOP_N_RAKE     = 10
 BIGRAM_BOOST   = 1.7  # multiplier applied to bigram raw-TF when ranking
 TFIDF_CACHE    = Path(__file__).parent / "tfidf_vectorizer.pkl"
+TFIDF_COMPACT  = Path(__file__).parent / "tfidf_vectorizer"  # memory-mapped copy for the orchestrator
 RESULTS_CSV    = Path(__file__).parent / "results.csv"
 MAX_TEXT_CHARS = 3000   # fallback chars fed to YAKE/KeyBERT when no abstract found
 
@@ -236,11 +238,22 @@ def _build_bigram_vocab(corpus_texts: list[str]) -> list[str]:
     ]
 
 
+def _export_compact(vectorizer: TfidfVectorizer) -> None:
+    """Flat-array copy (with the terms, for keyword names) that the orchestrator memory-maps."""
+    if (TFIDF_COMPACT / "vectorizer.json").exists() and \
+            (TFIDF_COMPACT / "vectorizer.json").stat().st_mtime >= TFIDF_CACHE.stat().st_mtime:
+        return
+    export_vectorizer(vectorizer, TFIDF_COMPACT, include_terms=True)
+    print(f"  Compact copy saved to {TFIDF_COMPACT.name}/")
+
+
 def build_or_load_tfidf() -> TfidfVectorizer:
     if TFIDF_CACHE.exists():
         print(f"  Loading cached TF-IDF vectorizer…")
         with open(TFIDF_CACHE, "rb") as f:
-            return pickle.load(f)
+            vectorizer = pickle.load(f)
+        _export_compact(vectorizer)
+        return vectorizer
 
     print("  Building PMI vocabulary + TF-IDF (first time, ~1 min)…")
     texts = [_strip_urls(p.read_text(encoding="utf-8", errors="ignore"))
@@ -269,6 +282,7 @@ def build_or_load_tfidf() -> TfidfVectorizer:
     with open(TFIDF_CACHE, "wb") as f:
         pickle.dump(vectorizer, f)
     print(f"  Saved to {TFIDF_CACHE.name}")
+    _export_compact(vectorizer)
     return vectorizer
 
 
@@ -14,7 +14,8 @@ from utils.ml_strategies.strategies import (
     EmbeddingsTrainingStrategy,
     EmbeddingsKNNTrainingStrategy,
     NeuralTorchTrainingStrategy,
-    MiniLMTrainingStrategy
+    MiniLMTrainingStrategy,
+    HashingTrainingStrategy
 )
 
 
@@ -35,7 +36,8 @@ class ModelComparator(_ModelComparator):
             'embeddings': EmbeddingsTrainingStrategy(),
             'embeddings_knn': EmbeddingsKNNTrainingStrategy(),
             'neural': NeuralTorchTrainingStrategy(),
-            'minilm': MiniLMTrainingStrategy()
+            'minilm': MiniLMTrainingStrategy(),
+            'hashing': HashingTrainingStrategy()
         }
         super().__init__(
             strategies=strategies,
@@ -57,7 +59,8 @@ def main():
         'embeddings': 'Embeddings + Centroid',
         'embeddings_knn': 'Embeddings + KNN',
         'neural': 'Neural Network (PyTorch)',
-        'minilm': 'all-MiniLM-L6-v2 (SVM)'
+        'minilm': 'all-MiniLM-L6-v2 (SVM)',
+        'hashing': 'Hashing + SGD'
     }
 
     print(f"\nAvailable models:")
@@ -8,13 +8,15 @@ Usage:
     python -m fine_tune_subject.train all             # Train all models + ranking
     python -m fine_tune_subject.train all --compare   # Train all + comparison charts
     python -m fine_tune_subject.train --compare-only  # Compare already-trained models (no training)
+    python -m fine_tune_subject.train all --workers 1  # Train one model after another instead of in parallel
+    python -m fine_tune_subject.train --out-of-core  # Train the incremental models on every labeled document, streamed from disk
 """
 import sys
 import argparse
 import numpy as np
-from constants import CSV_FOLDER, CSV_SUBJECTS, TXT_FOLDER
+from constants import CSV_FOLDER, CSV_SUBJECTS, TXT_FOLDER, SUBJECT_MODEL_RESULTS_FOLDER, TRAINING_WORKERS, MAX_DOCUMENT_CHARS
 from utils.colors.colors_terminal import Bcolors
-from utils.ml_strategies.data_loader import load_csv_labels, create_dataset
+from utils.ml_strategies.data_loader import load_csv_labels, create_dataset, create_dataset_ids, StreamingTextDataset
 from utils.ml_strategies.strategies import (
     SVMTrainingStrategy,
     XGBoostTrainingStrategy,
@@ -22,8 +24,10 @@ from utils.ml_strategies.strategies import (
     EmbeddingsTrainingStrategy,
     EmbeddingsKNNTrainingStrategy,
     NeuralTorchTrainingStrategy,
-    MiniLMTrainingStrategy
+    MiniLMTrainingStrategy,
+    HashingTrainingStrategy
 )
+from utils.ml_strategies.model_comparison_framework import split_test_data
 
 
 def get_available_strategies():
@@ -36,7 +40,8 @@ def get_available_strategies():
         'embeddings': EmbeddingsTrainingStrategy,
         'embeddings_knn': EmbeddingsKNNTrainingStrategy,
         'neural': NeuralTorchTrainingStrategy,
-        'minilm': MiniLMTrainingStrategy
+        'minilm': MiniLMTrainingStrategy,
+        'hashing': HashingTrainingStrategy
     }
 
 
@@ -127,8 +132,8 @@ def train_single_model(model_name):
         return None
 
 
-def train_all_models(run_compare=False):
-    """Train all available models and compare results"""
+def train_all_models(run_compare=False, workers=TRAINING_WORKERS):
+    """Train all available models and compare results (workers != 1 trains them in parallel processes)"""
     strategies = get_available_strategies()
     results = {}
 
@@ -141,53 +146,61 @@ def train_all_models(run_compare=False):
         print(f"{Bcolors.FAIL}No documents found!{Bcolors.ENDC}")
         return
 
-    # Train each model
-    for model_name, strategy_class in strategies.items():
+    if workers != 1:
+        from utils.ml_strategies.parallel_runner import run_strategies
+        outcomes = run_strategies({model_name: strategy_fn() for model_name, strategy_fn in strategies.items()},
+                                  SUBJECT_MODEL_RESULTS_FOLDER, workers=workers, documents=documents, labels=labels)
+        models_to_test = [model_name for model_name, outcome in outcomes.items() if 'error' not in outcome]
+    else:
+        # Train each model
+        for model_name, strategy_class in strategies.items():
+            print(f"\n{Bcolors.HEADER}{'='*60}{Bcolors.ENDC}")
+            print(f"{Bcolors.HEADER}Training {model_name.upper()}{Bcolors.ENDC}")
+            print(f"{Bcolors.HEADER}{'='*60}{Bcolors.ENDC}")
+
+            try:
+                strategy = strategy_class()
+                accuracy = strategy.train(documents, labels)
+                results[model_name] = {
+                    'accuracy': accuracy,
+                    'model_name': strategy.get_model_name(),
+                    'files': strategy.get_model_files()
+                }
+
+            except Exception as e:
+                print(f"{Bcolors.FAIL}Training {model_name} failed: {str(e)}{Bcolors.ENDC}")
+                results[model_name] = {
+                    'accuracy': None,
+                    'model_name': strategy_class().get_model_name(),
+                    'error': str(e)
+                }
+
+        # Print summary
         print(f"\n{Bcolors.HEADER}{'='*60}{Bcolors.ENDC}")
-        print(f"{Bcolors.HEADER}Training {model_name.upper()}{Bcolors.ENDC}")
+        print(f"{Bcolors.HEADER}TRAINING SUMMARY{Bcolors.ENDC}")
         print(f"{Bcolors.HEADER}{'='*60}{Bcolors.ENDC}")
 
-        try:
-            strategy = strategy_class()
-            accuracy = strategy.train(documents, labels)
-            results[model_name] = {
-                'accuracy': accuracy,
-                'model_name': strategy.get_model_name(),
-                'files': strategy.get_model_files()
-            }
-
-        except Exception as e:
-            print(f"{Bcolors.FAIL}Training {model_name} failed: {str(e)}{Bcolors.ENDC}")
-            results[model_name] = {
-                'accuracy': None,
-                'model_name': strategy_class().get_model_name(),
-                'error': str(e)
-            }
-
-    # Print summary
-    print(f"\n{Bcolors.HEADER}{'='*60}{Bcolors.ENDC}")
-    print(f"{Bcolors.HEADER}TRAINING SUMMARY{Bcolors.ENDC}")
-    print(f"{Bcolors.HEADER}{'='*60}{Bcolors.ENDC}")
+        successful_models = []
 
-    successful_models = []
+        for model_name, result in results.items():
+            if result['accuracy'] is not None:
+                print(f"{Bcolors.OKGREEN}{result['model_name']}: {result['accuracy']:.4f}{Bcolors.ENDC}")
+                successful_models.append((model_name, result['accuracy'], result['model_name']))
+            else:
+                print(f"{Bcolors.FAIL}{result['model_name']}: FAILED{Bcolors.ENDC}")
 
-    for model_name, result in results.items():
-        if result['accuracy'] is not None:
-            print(f"{Bcolors.OKGREEN}{result['model_name']}: {result['accuracy']:.4f}{Bcolors.ENDC}")
-            successful_models.append((model_name, result['accuracy'], result['model_name']))
-        else:
-            print(f"{Bcolors.FAIL}{result['model_name']}: FAILED{Bcolors.ENDC}")
+        if successful_models:
+            # Sort by accuracy
+            successful_models.sort(key=lambda x: x[1], reverse=True)
 
-    if successful_models:
-        # Sort by accuracy
-        successful_models.sort(key=lambda x: x[1], reverse=True)
+            print(f"\n{Bcolors.HEADER}RANKING (by accuracy):{Bcolors.ENDC}")
+            for i, (model_name, accuracy, display_name) in enumerate(successful_models, 1):
+                print(f"{i}. {display_name}: {accuracy:.4f}")
 
-        print(f"\n{Bcolors.HEADER}RANKING (by accuracy):{Bcolors.ENDC}")
-        for i, (model_name, accuracy, display_name) in enumerate(successful_models, 1):
-            print(f"{i}. {display_name}: {accuracy:.4f}")
+            best_model = successful_models[0]
+            print(f"\n{Bcolors.OKGREEN}Best Model: {best_model[2]} ({best_model[1]:.4f}){Bcolors.ENDC}")
 
-        best_model = successful_models[0]
-        print(f"\n{Bcolors.OKGREEN}Best Model: {best_model[2]} ({best_model[1]:.4f}){Bcolors.ENDC}")
+        models_to_test = [m[0] for m in successful_models]
 
     # Run comparison framework if requested
     if run_compare:
@@ -197,13 +210,42 @@ def train_all_models(run_compare=False):
         try:
             from fine_tune_subject.model_comparison_framework import ModelComparator
             comparator = ModelComparator()
-            models_to_test = [m[0] for m in successful_models]
-            comparator.run_comparison(models_to_test)
+            comparator.run_comparison(models_to_test, workers=workers)
         except Exception as e:
             print(f"{Bcolors.FAIL}Comparison failed: {e}{Bcolors.ENDC}")
 
 
-def run_comparison_only():
+def train_out_of_core(model_name=None):
+    """
+    Train the incremental strategies (or model_name) on every labeled subject document, streamed
+    from disk in batches instead of 200 per subject in memory. The comparison test split is
+    left out so the models can still be compared with the others; its ids come from the same
+    200-per-subject sample without holding the texts in memory.
+    """
+    strategies = {name: fn for name, fn in get_available_strategies().items()
+                  if fn().supports_incremental and model_name in (None, name)}
+    if not strategies:
+        print(f"{Bcolors.FAIL}No incremental strategy named {model_name}{Bcolors.ENDC}")
+        return
+
+    print(f"\n{Bcolors.HEADER}=== Loading Data ==={Bcolors.ENDC}")
+    subject_mapping = load_csv_labels(CSV_FOLDER / CSV_SUBJECTS, label_column='subject')
+    labels, document_ids = create_dataset_ids(subject_mapping, TXT_FOLDER, min_frequency=5, max_per_label=200, random_state=42)
+    exclude_ids = split_test_data(document_ids, labels)[1] if document_ids else []
+    dataset = StreamingTextDataset.from_csv(
+        CSV_FOLDER / CSV_SUBJECTS, TXT_FOLDER, label_column='subject',
+        min_frequency=5, max_per_label=None, exclude_ids=exclude_ids, max_chars=MAX_DOCUMENT_CHARS
+    )
+
+    for name, strategy_fn in strategies.items():
+        strategy = strategy_fn()
+        accuracy = strategy.train_incremental(dataset)
+        if accuracy is not None:
+            print(f"\n{Bcolors.OKGREEN}{strategy.get_model_name()} - test accuracy: {accuracy:.4f}{Bcolors.ENDC}")
+            print(f"Model files saved: {strategy.get_model_files()}")
+
+
+def run_comparison_only(workers=TRAINING_WORKERS):
     """Run comparison framework on already-trained models (no training)"""
     print(f"\n{Bcolors.HEADER}{'='*60}{Bcolors.ENDC}")
     print(f"{Bcolors.HEADER}MODEL COMPARISON (using saved models){Bcolors.ENDC}")
@@ -212,7 +254,7 @@ def run_comparison_only():
     from fine_tune_subject.model_comparison_framework import ModelComparator
     comparator = ModelComparator()
     all_models = list(get_available_strategies().keys())
-    comparator.run_comparison(all_models)
+    comparator.run_comparison(all_models, workers=workers)
 
 
 def interactive_mode():
@@ -253,11 +295,15 @@ def interactive_mode():
 def main():
     parser = argparse.ArgumentParser(description='Train subject classification models')
     parser.add_argument('model', nargs='?', default=None,
-                       help='Model to train (svm, svm_rbf, xgboost, random_forest, embeddings, embeddings_knn, neural, minilm, all)')
+                       help='Model to train (svm, svm_rbf, xgboost, random_forest, embeddings, embeddings_knn, neural, minilm, hashing, all)')
     parser.add_argument('--compare', action='store_true',
                        help='Run comparison framework after training all models')
     parser.add_argument('--compare-only', action='store_true',
                        help='Only compare already-trained models (no training)')
+    parser.add_argument('--workers', type=int, default=TRAINING_WORKERS,
+                       help='Processes for "all" and the comparison (1 = one model after another, default: one per model)')
+    parser.add_argument('--out-of-core', action='store_true',
+                       help='Stream every labeled document from disk to the incremental models (hashing) instead of the sampled dataset')
 
     args = parser.parse_args()
 
@@ -268,11 +314,13 @@ def main():
     np.random.seed(42)
 
     if args.compare_only:
-        run_comparison_only()
+        run_comparison_only(workers=args.workers)
+    elif args.out_of_core:
+        train_out_of_core(None if args.model in (None, 'all') else args.model)
     elif args.model is None:
         interactive_mode()
     elif args.model == 'all':
-        train_all_models(run_compare=args.compare)
+        train_all_models(run_compare=args.compare, workers=args.workers)
     else:
         train_single_model(args.model)
 
@@ -13,7 +13,8 @@ from utils.ml_strategies.strategies import (
     EmbeddingsTrainingStrategy,
     EmbeddingsKNNTrainingStrategy,
     NeuralTorchTrainingStrategy,
-    MiniLMTrainingStrategy
+    MiniLMTrainingStrategy,
+    HashingTrainingStrategy
 )
 
 
@@ -37,7 +38,8 @@ class TypeModelComparator(_ModelComparator):
             'embeddings': EmbeddingsTrainingStrategy(model_dir=TYPE_MODEL_FOLDERS['embeddings']),
             'embeddings_knn': EmbeddingsKNNTrainingStrategy(model_dir=TYPE_MODEL_FOLDERS['embeddings_knn']),
             'neural': NeuralTorchTrainingStrategy(model_dir=TYPE_MODEL_FOLDERS['neural']),
-            'minilm': MiniLMTrainingStrategy(model_dir=TYPE_MODEL_FOLDERS['minilm'])
+            'minilm': MiniLMTrainingStrategy(model_dir=TYPE_MODEL_FOLDERS['minilm']),
+            'hashing': HashingTrainingStrategy(model_dir=TYPE_MODEL_FOLDERS['hashing'])
         }
         super().__init__(
             strategies=strategies,
@@ -59,7 +61,8 @@ def main():
         'embeddings': 'Embeddings + Centroid',
         'embeddings_knn': 'Embeddings + KNN',
         'neural': 'Neural Network (PyTorch)',
-        'minilm': 'LaBSE (SVM)'
+        'minilm': 'LaBSE (SVM)',
+        'hashing': 'Hashing + SGD'
     }
 
     print(f"\nAvailable models:")
@@ -1,9 +1,21 @@
 from constants import MAX_TOKENS_INPUT,MAX_TOKENS_OUTPUT#, PROMPT
 from constants import PROMPT_ARTICULO,PROMPT_GENERAL,PROMPT_LIBRO,PROMPT_TESIS,PROMPT_OBJECTO_CONFERENCIA
 from constants import SCHEMA_ARTICULO,SCHEMA_GENERAL,SCHEMA_LIBRO,SCHEMA_TESIS,SCHEMA_OBJECTO_CONFERENCIA
+from constants import TOKENIZED_DATASET_FOLDER,TOKENIZE_NUM_PROC,TOKENIZED_SHARD_SIZE
+import hashlib
 import json
-from datasets import Dataset,DatasetDict
-import torch
+import os
+import shutil
+from pathlib import Path
+from datasets import Dataset,DatasetDict,load_from_disk
+from transformers import DataCollatorForSeq2Seq
+from utils.text_extraction.read_and_write_files import detect_encoding
+from fine_tunning.packing import pack_dataset
+
+# Bump when add_prompt_and_structure / add_schema_and_structure / preprocess_function change
+# the examples they build, so cached tokenized datasets are rebuilt.
+TOKENIZATION_VERSION = 1
+HASH_CHARS = 16
 
 
 def input_text_schema( text, schema, example=["","",""]):
@@ -92,46 +104,147 @@ def add_prompt_and_structure(dict_dataset):
     return DatasetDict(dataset_dict)
 
 
-def preprocess_function(examples,tokenizer,model_type="causal"):
+def preprocess_function(examples,tokenizer,model_type="causal",pad_to_max_length=False):
+    """
+    Tokenize without padding: every example keeps its own length and the collator
+    (see get_data_collator) pads each batch to its longest member. "length" is stored
+    for the length-grouped sampler.
+    pad_to_max_length=True restores the previous fixed-size padding (kept for benchmarks).
+    """
     inputs = examples['input']
     targets = examples['output']
-    model_inputs = tokenizer(inputs, max_length=MAX_TOKENS_INPUT, truncation=True, padding="max_length")
-    labels = tokenizer(targets, max_length=MAX_TOKENS_OUTPUT, truncation=True, padding="max_length")
+    input_padding = "max_length" if pad_to_max_length else False
+    model_inputs = tokenizer(inputs, max_length=MAX_TOKENS_INPUT, truncation=True, padding=input_padding)
+    labels = tokenizer(targets, max_length=MAX_TOKENS_OUTPUT, truncation=True, padding=input_padding)
     if model_type == "causal":
-        input_ids = torch.tensor(model_inputs["input_ids"])  # Convertir a tensor
-        label_ids = torch.tensor(labels["input_ids"])  # Convertir a tensor
-        attention_mask = torch.tensor(model_inputs["attention_mask"])  # Convertir a tensor
-        # 1️⃣ Concatenamos input_ids con label_ids
-        combined_input_ids = torch.cat([input_ids, label_ids], dim=-1)  # [1, 1536]
-
-        # 2️⃣ Extendemos la attention_mask
-        combined_attention_mask = torch.cat([attention_mask, torch.ones(label_ids.shape, dtype=torch.long)], dim=-1)
-
-        # 3️⃣ Creamos los labels con -100 en la parte de input
-        labels_padded = combined_input_ids.clone()
-        labels_padded[:, :input_ids.shape[1]] = -100  # Ignorar tokens de entrada en la pérdida
-        # Asignamos los valores correctos
-        model_inputs["input_ids"] = combined_input_ids
-        model_inputs["attention_mask"] = combined_attention_mask
-        model_inputs["labels"] = labels_padded   
+        # Concatenamos input_ids con label_ids; los labels ignoran (-100) la parte de input y el padding
+        input_ids, attention_mask, label_ids = [], [], []
+        for prompt_ids, prompt_mask, target_ids, target_mask in zip(model_inputs["input_ids"], model_inputs["attention_mask"], labels["input_ids"], labels["attention_mask"]):
+            input_ids.append(prompt_ids + target_ids)
+            attention_mask.append(prompt_mask + target_mask)
+            label_ids.append([-100] * len(prompt_ids) + [t if m else -100 for t, m in zip(target_ids, target_mask)])
+        model_inputs["input_ids"] = input_ids
+        model_inputs["attention_mask"] = attention_mask
+        model_inputs["labels"] = label_ids
     else:
-        model_inputs["labels"] = labels["input_ids"]
+        model_inputs["labels"] = [[t if m else -100 for t, m in zip(target_ids, target_mask)] for target_ids, target_mask in zip(labels["input_ids"], labels["attention_mask"])]
+    model_inputs["length"] = [sum(mask) for mask in model_inputs["attention_mask"]]
     return model_inputs
 
 
+def get_data_collator(tokenizer, model=None):
+    """Pads input_ids/attention_mask with the pad token and labels with -100, per batch."""
+    if tokenizer.pad_token is None:  # decoder-only tokenizers (LLaMA, Gemma...) may not define one
+        tokenizer.pad_token = tokenizer.eos_token
+    return DataCollatorForSeq2Seq(tokenizer, model=model, label_pad_token_id=-100, pad_to_multiple_of=8)
+
 
-def get_tokens(dict_dataset,tokenizer,type_of_model="prompt",model_type="causal"):
+def get_tokens(dict_dataset,tokenizer,type_of_model="prompt",model_type="causal",pad_to_max_length=False,num_proc=None,packing=False):
     if type_of_model == "prompt":
         datasets = add_prompt_and_structure(dict_dataset)
     else:
         datasets = add_schema_and_structure(dict_dataset)
-    dataset = datasets.map(preprocess_function, batched=True, fn_kwargs={"tokenizer" : tokenizer,"model_type":model_type})
-    print(f"len of labels : {len(dataset['training'][0]['labels'])}")
-    print(f"len of input_ids : {len(dataset['training'][0]['input_ids'])}")
-    print(f"len of attention_mask : {len(dataset['training'][0]['attention_mask'])}")
+    dataset = datasets.map(preprocess_function, batched=True, remove_columns=["input", "output"], num_proc=num_proc,
+                           fn_kwargs={"tokenizer" : tokenizer,"model_type":model_type,"pad_to_max_length":pad_to_max_length})
+    lengths = dataset["training"]["length"]
+    print(f"tokens per example (training): mean {sum(lengths) / len(lengths):.0f}, max {max(lengths)}")
+    if packing:
+        if model_type != "causal" or pad_to_max_length:
+            raise ValueError("packing is only supported for causal models without max_length padding")
+        dataset = pack_dataset(dataset, MAX_TOKENS_INPUT + MAX_TOKENS_OUTPUT)
     return dataset
 
 
+def dataset_file_hash(filename, cache_folder=TOKENIZED_DATASET_FOLDER):
+    """Content hash of the dataset JSON, recomputed only when its size or mtime changed."""
+    filename = Path(filename)
+    stat = filename.stat()
+    hashes_filename = Path(cache_folder) / "dataset_hashes.json"
+    hashes = {}
+    if hashes_filename.exists():
+        with open(hashes_filename, "r", encoding="utf-8") as f:
+            hashes = json.load(f)
+    cached = hashes.get(filename.name)
+    if cached and cached["size"] == stat.st_size and cached["mtime"] == stat.st_mtime:
+        return cached["hash"]
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    hashes[filename.name] = {"size": stat.st_size, "mtime": stat.st_mtime, "hash": digest.hexdigest()[:HASH_CHARS]}
+    hashes_filename.parent.mkdir(parents=True, exist_ok=True)
+    with open(hashes_filename, "w", encoding="utf-8") as f:
+        json.dump(hashes, f, indent=4)
+    return hashes[filename.name]["hash"]
+
+
+def tokenized_cache_key(dataset_hash,tokenizer,type_of_model="prompt",model_type="causal",pad_to_max_length=False,packing=False):
+    """
+    Everything the tokenized dataset depends on: the dataset content, the tokenizer
+    (name, vocabulary and special tokens), the prompts or schemas and the limits.
+    """
+    if type_of_model == "prompt":
+        templates = [PROMPT_GENERAL, PROMPT_ARTICULO, PROMPT_TESIS, PROMPT_OBJECTO_CONFERENCIA, PROMPT_LIBRO]
+    else:
+        templates = [SCHEMA_GENERAL, SCHEMA_ARTICULO, SCHEMA_TESIS, SCHEMA_OBJECTO_CONFERENCIA, SCHEMA_LIBRO]
+    vocab = sorted(tokenizer.get_vocab().items())
+    parts = {
+        "dataset": dataset_hash,
+        "tokenizer": tokenizer.name_or_path,
+        "vocab": hashlib.sha256(json.dumps(vocab, ensure_ascii=False).encode("utf-8")).hexdigest(),
+        "special_tokens": tokenizer.special_tokens_map,
+        "templates": hashlib.sha256("\n".join(templates).encode("utf-8")).hexdigest(),
+        "version": TOKENIZATION_VERSION,
+        "type_of_model": type_of_model,
+        "model_type": model_type,
+        "pad_to_max_length": pad_to_max_length,
+        "packing": packing,
+        "max_tokens": [MAX_TOKENS_INPUT, MAX_TOKENS_OUTPUT],
+    }
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:HASH_CHARS], parts
+
+
+def tokenized_dataset_key(dataset_filename,tokenizer,type_of_model="prompt",model_type="causal",pad_to_max_length=False,
+                          cache_folder=TOKENIZED_DATASET_FOLDER,packing=False):
+    """(key, parts) of the cache entry get_tokens_cached uses for these arguments."""
+    return tokenized_cache_key(dataset_file_hash(dataset_filename, cache_folder), tokenizer,
+                               type_of_model, model_type, pad_to_max_length, packing)
+
+
+def get_tokens_cached(dataset_filename,tokenizer,type_of_model="prompt",model_type="causal",pad_to_max_length=False,
+                      cache_folder=TOKENIZED_DATASET_FOLDER,num_proc=TOKENIZE_NUM_PROC,packing=False):
+    """
+    get_tokens backed by an on-disk cache: the first run tokenizes with num_proc processes
+    and saves the result as Arrow shards under cache_folder/<key>; later runs with the same
+    key memory-map those shards instead of reading the JSON and tokenizing again.
+    """
+    cache_folder = Path(cache_folder)
+    key, parts = tokenized_dataset_key(dataset_filename, tokenizer, type_of_model, model_type, pad_to_max_length,
+                                       cache_folder, packing)
+    folder = cache_folder / key
+    if (folder / "cache_key.json").exists():
+        print(f"Reusing tokenized dataset {folder}")
+        return load_from_disk(str(folder))
+
+    enc = detect_encoding(dataset_filename)["encoding"]
+    dict_dataset = read_data_json(dataset_filename, enc)
+    num_proc = num_proc or os.cpu_count()
+    dataset = get_tokens(dict_dataset, tokenizer, type_of_model, model_type, pad_to_max_length,
+                         num_proc=num_proc if num_proc > 1 else None, packing=packing)
+    del dict_dataset
+
+    tmp_folder = folder.with_name(folder.name + ".tmp")
+    shutil.rmtree(tmp_folder, ignore_errors=True)
+    dataset.save_to_disk(str(tmp_folder), max_shard_size=TOKENIZED_SHARD_SIZE)
+    with open(tmp_folder / "cache_key.json", "w", encoding="utf-8") as f:
+        json.dump(parts, f, indent=4, default=str)
+    shutil.rmtree(folder, ignore_errors=True)
+    os.replace(tmp_folder, folder)
+    print(f"Tokenized dataset saved to {folder}")
+    return load_from_disk(str(folder))
+
+
 def read_data_json(json_filename,enc):
     with open(json_filename, 'r', encoding=enc) as file:
         return json.load(file)
@@ -2,12 +2,12 @@ import torch
 import os
 import logging
 from constants import LOG_DIR,JSON_FOLDER,DATASET_WITH_METADATA_AND_TEXT_DOC_CHECKED,FINAL_MODEL_PATH
-from utils.text_extraction.read_and_write_files import read_data_json,detect_encoding,write_to_json
+from utils.text_extraction.read_and_write_files import write_to_json
 from fine_tunning.hugging_face_connection import get_dataset
 from huggingface_hub import login
 from dotenv import load_dotenv
-from fine_tunning.generate_tokens import get_tokens
-from fine_tunning.trainer import train
+from fine_tunning.generate_tokens import get_tokens_cached,tokenized_dataset_key
+from fine_tunning.trainer import train,get_device,get_precision
 from fine_tunning.model_managment import get_model,get_model_type
 
 
@@ -17,6 +17,7 @@ MODEL_SELECTED = "LED"
 QUANTIZATION = False
 PEFT = False
 TYPE_OF_MODEL_INPUT = "prompt"  # "prompt" or "schema"  NuExtract is "schema"   
+PACKING = False  # pack several examples per sequence (causal models only, see packing.py)
 
 #Loging config
 if not os.path.exists(LOG_DIR):
@@ -45,8 +46,8 @@ if not filename_dataset.exists():
 
 
 # Verify CPU/GPU
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-logger.info(f"Using device: {device}")
+device = get_device()
+logger.info(f"Using device: {device} ({get_precision(device)})")
 
 
 model = get_model(MODEL_SELECTED,quantized=QUANTIZATION, peft=PEFT)
@@ -57,22 +58,31 @@ if PEFT:
     logger.info(model.model.print_trainable_parameters())
 
 
-enc = detect_encoding(filename_dataset)["encoding"]
-dict_dataset =  read_data_json(filename_dataset,enc)
-
-tokenized_datasets = get_tokens(dict_dataset,model.tokenizer,type_of_model=TYPE_OF_MODEL_INPUT,model_type=model_type)
+# reuses data/sedici/tokenized/<key> when the dataset, tokenizer and prompts didn't change
+packing = PACKING and model_type == "causal"
+tokenized_datasets = get_tokens_cached(filename_dataset,model.tokenizer,type_of_model=TYPE_OF_MODEL_INPUT,model_type=model_type,packing=packing)
+# checkpoints are kept per configuration, so an interrupted run resumes and a different one starts fresh
+run_config = {
+    "model": MODEL_SELECTED,
+    "model_name": model.get_model_name(),
+    "quantization": QUANTIZATION,
+    "peft": PEFT,
+    "packing": packing,
+    "tokenized_dataset": tokenized_dataset_key(filename_dataset,model.tokenizer,type_of_model=TYPE_OF_MODEL_INPUT,model_type=model_type,packing=packing)[0],
+}
 
 
 logger.info("START FINETUNNING")
-torch.cuda.empty_cache()
+if device.type == "cuda":
+    torch.cuda.empty_cache()
 
 
-model = train(model,tokenized_datasets,MODEL_SELECTED,model_type)
+model = train(model,tokenized_datasets,MODEL_SELECTED,model_type,run_config,packing)
 logger.info("FINISH FINETUNNING")
 
 
 # Guardar el modelo afinado
-os.makedirs(FINAL_MODEL_PATH)
+os.makedirs(FINAL_MODEL_PATH, exist_ok=True)
 # Assuming `model` is your DataParallel model
 model_to_save = model.model.module if isinstance(model.model, torch.nn.DataParallel) else model.model
 
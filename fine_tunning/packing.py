@@ -0,0 +1,106 @@
+"""
+Sequence packing for causal models.
+
+preprocess_function builds one prompt+target sequence per example, most of them far
+shorter than MAX_TOKENS_INPUT + MAX_TOKENS_OUTPUT. pack_dataset concatenates several
+examples into each row (first-fit decreasing, so rows are as full as possible) and
+PackedDataCollator keeps them apart inside the row:
+
+- position_ids restart at 0 for every packed example
+- a block-diagonal causal 4D attention mask, so no token attends to another example
+- the labels of each example are kept as they were (-100 on its prompt), so the first
+  token of an example, which is always prompt, is never predicted from the previous one
+
+Only for decoder-only models: seq2seq models (LED, T5) have separate encoder/decoder
+sequences and are trained unpacked.
+"""
+import torch
+from datasets import Dataset, DatasetDict
+
+
+def first_fit_decreasing(lengths, capacity):
+    """Group example indices into bins whose total length is <= capacity."""
+    bins, space = [], []
+    for index in sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True):
+        length = min(lengths[index], capacity)
+        for b, free in enumerate(space):
+            if length <= free:
+                bins[b].append(index)
+                space[b] -= length
+                break
+        else:
+            bins.append([index])
+            space.append(capacity - length)
+    return bins
+
+
+def pack_split(dataset, max_length):
+    """Pack one tokenized split (input_ids, labels, length) into rows of at most max_length tokens."""
+    input_ids, labels, lengths = dataset["input_ids"], dataset["labels"], dataset["length"]
+    packed = {"input_ids": [], "labels": [], "position_ids": [], "length": []}
+    for indices in first_fit_decreasing(lengths, max_length):
+        row_ids, row_labels, row_positions = [], [], []
+        for i in indices:
+            # sequences come unpadded, so "length" real tokens are the whole sequence
+            row_ids += input_ids[i][:max_length]
+            row_labels += labels[i][:max_length]
+            row_positions += list(range(len(input_ids[i][:max_length])))
+        packed["input_ids"].append(row_ids)
+        packed["labels"].append(row_labels)
+        packed["position_ids"].append(row_positions)
+        packed["length"].append(len(row_ids))
+    return Dataset.from_dict(packed)
+
+
+def pack_dataset(dataset, max_length):
+    """Pack every split of a tokenized DatasetDict and print how full the packed rows are."""
+    packed = DatasetDict()
+    for split, split_dataset in dataset.items():
+        packed[split] = pack_split(split_dataset, max_length)
+        tokens = sum(packed[split]["length"])
+        rows = len(packed[split])
+        efficiency = tokens / (rows * max_length) if rows else 0
+        print(f"packing ({split}): {len(split_dataset)} examples -> {rows} rows of {max_length} tokens, "
+              f"{efficiency:.1%} of the row tokens are real tokens")
+    return packed
+
+
+class PackedDataCollator:
+    """
+    Pads packed rows to the longest row of the batch and builds the block-diagonal causal mask
+    from position_ids. mask_dtype must be the model's dtype (the mask is additive: 0 or -inf).
+    """
+
+    def __init__(self, tokenizer, mask_dtype=torch.float32, pad_to_multiple_of=8):
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        self.pad_token_id = tokenizer.pad_token_id
+        self.mask_dtype = mask_dtype
+        self.pad_to_multiple_of = pad_to_multiple_of
+
+    def __call__(self, features):
+        longest = max(len(f["input_ids"]) for f in features)
+        length = -(-longest // self.pad_to_multiple_of) * self.pad_to_multiple_of
+        input_ids = torch.full((len(features), length), self.pad_token_id, dtype=torch.long)
+        labels = torch.full((len(features), length), -100, dtype=torch.long)
+        position_ids = torch.zeros((len(features), length), dtype=torch.long)
+        for row, f in enumerate(features):
+            n = len(f["input_ids"])
+            input_ids[row, :n] = torch.tensor(f["input_ids"])
+            labels[row, :n] = torch.tensor(f["labels"])
+            position_ids[row, :n] = torch.tensor(f["position_ids"])
+        return {
+            "input_ids": input_ids,
+            "labels": labels,
+            "position_ids": position_ids,
+            "attention_mask": self.attention_mask(position_ids),
+        }
+
+    def attention_mask(self, position_ids):
+        # every position 0 starts a new example; padding (position 0 too) only sees itself
+        segments = (position_ids == 0).cumsum(-1)
+        same_segment = segments[:, :, None] == segments[:, None, :]
+        causal = torch.ones(position_ids.shape[1], position_ids.shape[1], dtype=torch.bool).tril()
+        allowed = (same_segment & causal)[:, None, :, :]
+        mask = torch.zeros(allowed.shape, dtype=self.mask_dtype)
+        return mask.masked_fill(~allowed, torch.finfo(self.mask_dtype).min)
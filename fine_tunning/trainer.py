@@ -1,9 +1,29 @@
-from transformers import Trainer, TrainingArguments,Seq2SeqTrainingArguments
+from transformers import Trainer, TrainingArguments,Seq2SeqTrainingArguments,TrainerCallback
+from transformers.trainer_utils import get_last_checkpoint
 from constants import LOG_DIR,CHECKPOINT_MODEL_PATH,MAX_TOKENS_OUTPUT
+from constants import TRAIN_BATCH_SIZE,GRADIENT_ACCUMULATION_STEPS,GRADIENT_CHECKPOINTING,TRAIN_PRECISION
+from constants import TRAIN_SAVE_STEPS,TRAIN_SAVE_TOTAL_LIMIT,TRAIN_RESUME
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import resource
+import shutil
+import time
+from pathlib import Path
 import torch
 from torch.utils.data import DataLoader
 from torch.optim import AdamW
-import torch.nn.functional as F
+from transformers.trainer_pt_utils import LengthGroupedSampler
+from fine_tunning.generate_tokens import get_data_collator
+from fine_tunning.packing import PackedDataCollator
+
+logger = logging.getLogger(__name__)
+
+# traditional_train checkpoints (model + optimizer state) live apart from the Trainer ones
+TRADITIONAL_CHECKPOINT_PATH = CHECKPOINT_MODEL_PATH / "traditional"
+RUN_CONFIG_FILENAME = "run_config.json"
 
 
 def parse_output(tokenizer,output):
@@ -12,121 +32,299 @@ def parse_output(tokenizer,output):
     return tokenizer(output_text, truncation=True, padding=True, return_tensors="pt", max_length=MAX_TOKENS_OUTPUT).input_ids
 
 
+def get_device():
+    if torch.cuda.is_available():
+        return torch.device("cuda")
+    if torch.backends.mps.is_available():
+        return torch.device("mps")
+    return torch.device("cpu")
+
 
-def collate_fn_custom(batch):
+def get_precision(device, precision=TRAIN_PRECISION):
     """
-    Collate function para agrupar batches de datos tokenizados.
-    Filtra solo las claves necesarias y convierte listas en tensores.
+    "bf16", "fp16" or "fp32". auto picks bf16 on GPUs that support it (fp16 on older ones)
+    and on CPUs with AVX512/AMX, where bf16 autocast runs natively; fp32 elsewhere.
     """
-    keys_to_keep = ["input_ids", "attention_mask", "labels"]  # Solo las claves necesarias
+    if precision != "auto":
+        return precision
+    if device.type == "cuda":
+        return "bf16" if torch.cuda.is_bf16_supported() else "fp16"
+    if device.type == "cpu" and torch.backends.cpu.get_cpu_capability() in ("AVX512", "AMX"):
+        return "bf16"
+    return "fp32"
+
+
+def autocast(device, precision):
+    if precision == "fp32":
+        return contextlib.nullcontext()
+    return torch.autocast(device.type, dtype=torch.bfloat16 if precision == "bf16" else torch.float16)
+
+
+def memory_usage_mb(device):
+    """Peak memory of the run: allocated GPU memory on CUDA, resident memory of the process otherwise."""
+    if device.type == "cuda":
+        return torch.cuda.max_memory_allocated() / 1024 / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def enable_gradient_checkpointing(model):
+    model.gradient_checkpointing_enable(gradient_checkpointing_kwargs={"use_reentrant": False})
+    model.config.use_cache = False  # the cache is useless while training and incompatible with checkpointing
+
+
+class ThroughputLogger:
+    """Samples/sec and memory since the previous report."""
+
+    def __init__(self, device):
+        self.device = device
+        self.last_time = time.perf_counter()
+        self.samples = 0
 
-    # Construir el batch asegurando que cada clave tenga tensores
-    batch_dict = {key: [d[key] for d in batch] for key in keys_to_keep}
-    batch_dict = {key: torch.tensor(value) for key, value in batch_dict.items()}
+    def add(self, samples):
+        self.samples += samples
 
-    return batch_dict
+    def report(self, step, loss=None):
+        now = time.perf_counter()
+        samples_per_second = self.samples / (now - self.last_time)
+        loss_text = f", loss {loss:.4f}" if loss is not None else ""
+        logger.info(f"step {step}{loss_text}: {samples_per_second:.2f} samples/s, peak memory {memory_usage_mb(self.device):.0f} MB")
+        self.last_time = now
+        self.samples = 0
 
 
-def traditional_train(model, tokenized_datasets, learning_rate=2e-5, epochs=3, batch_size=1):
+class ThroughputCallback(TrainerCallback):
+    """Logs samples/sec and memory every logging_steps (the Trainer only reports them at the end)."""
+
+    def __init__(self, device):
+        self.throughput = ThroughputLogger(device)
+
+    def on_step_end(self, args, state, control, **kwargs):
+        self.throughput.add(args.train_batch_size * args.gradient_accumulation_steps * args.world_size)
+
+    def on_log(self, args, state, control, logs=None, **kwargs):
+        if logs and "loss" in logs:
+            self.throughput.report(state.global_step, logs["loss"])
+
+
+def get_collator(model, model_type, packing=False):
+    if packing:
+        return PackedDataCollator(model.tokenizer, mask_dtype=model.model.dtype)
+    return get_data_collator(model.tokenizer, model.model if model_type == "seq2seq" else None)
+
+
+def latest_checkpoint(folder):
+    folder = str(folder)
+    return get_last_checkpoint(folder) if os.path.isdir(folder) else None
+
+
+def run_checkpoint_folder(base, run_config):
+    """
+    Checkpoint folder of one run configuration: base/run-<hash of run_config>, with run_config.json
+    inside. A run only ever resumes from (and rotates) the checkpoints of its own configuration.
+    """
+    run_config = json.loads(json.dumps(run_config, sort_keys=True, default=str))
+    digest = hashlib.sha256(json.dumps(run_config, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+    folder = Path(base) / f"run-{digest}"
+    config_filename = folder / RUN_CONFIG_FILENAME
+    if config_filename.exists():
+        with open(config_filename, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved != run_config:
+            raise RuntimeError(f"{folder} holds checkpoints of another configuration ({config_filename}); move it away to train this one")
+    else:
+        folder.mkdir(parents=True, exist_ok=True)
+        with open(config_filename, "w", encoding="utf-8") as f:
+            json.dump(run_config, f, indent=4)
+    return folder
+
+
+def resume_checkpoint(folder, resume):
+    """Latest checkpoint to continue from. Checkpoints are never deleted: without resume, existing ones are an error."""
+    checkpoint = latest_checkpoint(folder)
+    if checkpoint and not resume:
+        raise RuntimeError(f"{checkpoint} exists and resume is off; move {folder} away to train this configuration from scratch")
+    if checkpoint:
+        logger.info(f"resuming from {checkpoint}")
+    return checkpoint
+
+
+def save_training_checkpoint(folder, model, optimizer, scaler, step, epoch, batches_done, save_total_limit=TRAIN_SAVE_TOTAL_LIMIT):
+    """Write checkpoint-<step> (to a .tmp folder first, so a crash never leaves a half-written one) and keep the newest save_total_limit."""
+    checkpoint = folder / f"checkpoint-{step}"
+    tmp_checkpoint = folder / f"tmp-checkpoint-{step}"
+    shutil.rmtree(tmp_checkpoint, ignore_errors=True)
+    tmp_checkpoint.mkdir(parents=True)
+    torch.save({
+        "model": model.state_dict(),
+        "optimizer": optimizer.state_dict(),
+        "scaler": scaler.state_dict(),
+        "step": step,
+        "epoch": epoch,
+        "batches_done": batches_done,
+    }, tmp_checkpoint / "training_state.pt")
+    shutil.rmtree(checkpoint, ignore_errors=True)
+    os.replace(tmp_checkpoint, checkpoint)
+    checkpoints = sorted(folder.glob("checkpoint-*"), key=lambda path: int(path.name.split("-")[-1]))
+    for old in checkpoints[:-save_total_limit]:
+        shutil.rmtree(old, ignore_errors=True)
+    logger.info(f"checkpoint saved to {checkpoint}")
+
+
+def traditional_train(model, tokenized_datasets, run_config, learning_rate=2e-5, epochs=3, batch_size=TRAIN_BATCH_SIZE, model_type="causal",
+                      packing=False, gradient_accumulation_steps=GRADIENT_ACCUMULATION_STEPS,
+                      gradient_checkpointing=GRADIENT_CHECKPOINTING, precision=TRAIN_PRECISION, save_steps=TRAIN_SAVE_STEPS,
+                      resume=TRAIN_RESUME):
     """
     Entrenamiento manual sin `Trainer`.
+    Batches of similar length (LengthGroupedSampler) padded per batch by the same collator as trainer_train,
+    gradient accumulation, autocast in the selected precision and a checkpoint every save_steps optimizer
+    steps. Checkpoints go to the run_config folder under TRADITIONAL_CHECKPOINT_PATH (see run_checkpoint_folder);
+    with resume=True a run continues from the latest one there.
     """
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    device = get_device()
+    precision = get_precision(device, precision)
+    logger.info(f"traditional_train on {device} ({precision}), effective batch {batch_size * gradient_accumulation_steps}")
     model.model.to(device)
+    if gradient_checkpointing:
+        enable_gradient_checkpointing(model.model)
 
-    train_loader = DataLoader(
-        tokenized_datasets["training"],
-        batch_size=batch_size,
-        shuffle=True,
-        collate_fn=collate_fn_custom  # Usa la función personalizada
-    )
-
+    train_dataset = tokenized_datasets["training"]
+    collate_fn = get_collator(model, model_type, packing)
     optimizer = AdamW(model.model.parameters(), lr=learning_rate)
-    
-    for epoch in range(epochs):
+    scaler = torch.amp.GradScaler(device.type, enabled=precision == "fp16")
+
+    checkpoint_folder = run_checkpoint_folder(TRADITIONAL_CHECKPOINT_PATH, {
+        **run_config, "learning_rate": learning_rate, "epochs": epochs, "batch_size": batch_size,
+        "gradient_accumulation_steps": gradient_accumulation_steps,
+    })
+    step, start_epoch, skip_batches = 0, 0, 0
+    checkpoint = resume_checkpoint(checkpoint_folder, resume)
+    if checkpoint:
+        state = torch.load(os.path.join(checkpoint, "training_state.pt"), map_location=device)
+        model.model.load_state_dict(state["model"])
+        optimizer.load_state_dict(state["optimizer"])
+        scaler.load_state_dict(state["scaler"])
+        step, start_epoch, skip_batches = state["step"], state["epoch"], state["batches_done"]
+        logger.info(f"resuming at epoch {start_epoch + 1}, step {step}")
+
+    throughput = ThroughputLogger(device)
+    for epoch in range(start_epoch, epochs):
         print(f"Epoch {epoch+1}/{epochs}")
         model.model.train()
-        total_loss = 0
-        
-        for step, batch in enumerate(train_loader):
-            batch = {key: val.to(device) for key, val in batch.items()}
-            optimizer.zero_grad()
-            
-            input_ids = batch["input_ids"]
-            attention_mask = batch["attention_mask"]
-            outputs = model.model(input_ids=input_ids, attention_mask=attention_mask)
-            logits = outputs.logits  # Output sin procesar
-            labels = batch["labels"]  # Esto puede ser un tensor de tamaño [2048]
-            labels = labels.unsqueeze(0)
-            print(labels.shape)
-            print(logits.shape)
-
-            logits = logits.view(-1, logits.size(-1))  # Aplana la secuencia [batch_size * seq_len, vocab_size]
-            labels = labels.view(-1)  # Aplana las labels [batch_size * seq_len]
+        # the epoch seed makes the batch order reproducible, so a resumed epoch skips exactly the batches already seen
+        generator = torch.Generator().manual_seed(epoch)
+        train_loader = DataLoader(
+            train_dataset.remove_columns(["length"]),
+            batch_size=batch_size,
+            sampler=LengthGroupedSampler(batch_size, lengths=train_dataset["length"], generator=generator),
+            collate_fn=collate_fn
+        )
+        total_loss, batches = 0, 0
 
-            # Calcula la pérdida con CrossEntropyLoss
-            loss = F.cross_entropy(logits, labels, ignore_index=model.tokenizer.pad_token_id)
-            loss = F.cross_entropy(logits.permute(0, 2, 1), labels, ignore_index=model.tokenizer.pad_token_id)
+        for batch_index, batch in enumerate(train_loader):
+            if batch_index < skip_batches:
+                continue
+            batch = {key: val.to(device) for key, val in batch.items()}
 
-            loss.backward()
+            # labels are -100 on prompt and padding positions, so the model's own loss ignores them
+            with autocast(device, precision):
+                loss = model.model(**batch).loss
+            scaler.scale(loss / gradient_accumulation_steps).backward()
+            total_loss += loss.item()
+            batches += 1
+            throughput.add(batch["input_ids"].shape[0])
 
+            if (batch_index + 1) % gradient_accumulation_steps != 0 and batch_index + 1 != len(train_loader):
+                continue
             # Gradiente clipping
+            scaler.unscale_(optimizer)
             torch.nn.utils.clip_grad_norm_(model.model.parameters(), 1.0)
 
             # Optimizer step
-            optimizer.step()
-
-            total_loss += loss.item()
+            scaler.step(optimizer)
+            scaler.update()
+            optimizer.zero_grad()
+            step += 1
 
-            if step % 50 == 0:
-                print(f"Step {step}: Loss {loss.item()}")
+            if step % 10 == 0:
+                throughput.report(step, loss.item())
+            if save_steps and step % save_steps == 0:
+                save_training_checkpoint(checkpoint_folder, model.model, optimizer, scaler, step, epoch, batch_index + 1)
 
-        avg_loss = total_loss / len(train_loader)
+        skip_batches = 0
+        avg_loss = total_loss / max(batches, 1)
         print(f"Epoch {epoch+1} completed. Average Loss: {avg_loss:.4f}")
 
     print("Training complete.")
     return model
 
-def trainer_train(model,tokenized_datasets,model_type):
+def length_grouping_args():
+    """Batches of similar length (little padding per batch) using the "length" column from get_tokens.
+    transformers 5 replaced group_by_length=True with train_sampling_strategy="group_by_length"."""
+    if "train_sampling_strategy" in TrainingArguments.__dataclass_fields__:
+        return {"train_sampling_strategy": "group_by_length", "length_column_name": "length"}
+    return {"group_by_length": True, "length_column_name": "length"}
+
+def device_args(device, precision, gradient_checkpointing):
+    args = {
+        "use_cpu": device.type == "cpu",
+        "bf16": precision == "bf16",
+        "fp16": precision == "fp16",
+        "gradient_checkpointing": gradient_checkpointing,
+        "gradient_checkpointing_kwargs": {"use_reentrant": False} if gradient_checkpointing else None,
+    }
+    if "logging_dir" in TrainingArguments.__dataclass_fields__:  # removed in transformers 5
+        args["logging_dir"] = LOG_DIR
+    return args
+
+def trainer_train(model,tokenized_datasets,model_type,run_config,packing=False,resume=TRAIN_RESUME):
+    device = get_device()
+    precision = get_precision(device)
+    logger.info(f"Trainer on {device} ({precision}), effective batch {TRAIN_BATCH_SIZE * GRADIENT_ACCUMULATION_STEPS}")
+    if GRADIENT_CHECKPOINTING:
+        model.model.config.use_cache = False
+    checkpoint_folder = run_checkpoint_folder(CHECKPOINT_MODEL_PATH, {
+        **run_config, "batch_size": TRAIN_BATCH_SIZE, "gradient_accumulation_steps": GRADIENT_ACCUMULATION_STEPS,
+    })
     # Configurar los argumentos de entrenamiento
     common_args = dict(
-            output_dir= CHECKPOINT_MODEL_PATH,
+            output_dir= checkpoint_folder,
             eval_strategy="epoch",
-            logging_dir= LOG_DIR,            # Directorio de los registros
-            logging_steps=10,     
+            logging_steps=10,
             learning_rate=2e-5,
-            per_device_train_batch_size=2,
-            per_device_eval_batch_size=2,
+            per_device_train_batch_size=TRAIN_BATCH_SIZE,
+            per_device_eval_batch_size=TRAIN_BATCH_SIZE,
+            gradient_accumulation_steps=GRADIENT_ACCUMULATION_STEPS,
             num_train_epochs=3,
             weight_decay=0.01,
-            save_total_limit=2,
-            save_steps=50,
+            save_total_limit=TRAIN_SAVE_TOTAL_LIMIT,
+            save_steps=TRAIN_SAVE_STEPS,
             warmup_steps=100,
+            **length_grouping_args(),
+            **device_args(device, precision, GRADIENT_CHECKPOINTING),
 
         )
     if model_type == "causal":
         training_args = TrainingArguments(**common_args,)
     else:
         training_args = Seq2SeqTrainingArguments(**common_args,
-            predict_with_generate=True,                                    
+            predict_with_generate=True,
         )
+    # the Trainer moves the model to the device and spreads it over several GPUs by itself
     trainer = Trainer(
     model=model.model,
     args=training_args,
     train_dataset=tokenized_datasets["training"],
-    eval_dataset=tokenized_datasets["validation"])
-    #convert model tu gpu
-    model.model = model.model.to('cuda')
-    model.model = torch.nn.DataParallel(model.model)
-    # Habilitar la depuración en PyTorch
-    torch.autograd.set_detect_anomaly(True)
-    trainer.train()
+    eval_dataset=tokenized_datasets["validation"],
+    data_collator=get_collator(model, model_type, packing),
+    callbacks=[ThroughputCallback(device)])
+    trainer.train(resume_from_checkpoint=resume_checkpoint(checkpoint_folder, resume))
     return model
 
-  
 
-def train(model,tokenized_datasets,MODEL_SELECTED,model_type):
+
+def train(model,tokenized_datasets,MODEL_SELECTED,model_type,run_config,packing=False):
     # if MODEL_SELECTED == "NUEXTRACT":
-    #     return  traditional_train(model,tokenized_datasets)
+    #     return  traditional_train(model,tokenized_datasets,run_config)
     # else:
-    return  trainer_train(model,tokenized_datasets, model_type)
+    return  trainer_train(model,tokenized_datasets, model_type, run_config, packing)
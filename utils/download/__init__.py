@@ -1 +1 @@
-from .pdf_downloader import transform_id, download_pdf, download_batch
+from .pdf_downloader import transform_id, pdf_url, download_pdf, download_batch, HostRateLimiter
@@ -1,58 +1,179 @@
 """
 Shared PDF download utility.
-Robust download logic with timeout, retries, and rate-limit handling.
+Concurrent downloads over pooled sessions, with a per-host politeness limiter,
+adaptive backoff on 429/503, streamed writes to a .part file renamed atomically
+on completion, and Range-based resume of interrupted transfers.
 """
-import requests
+import os
+import threading
 import time
-from constants import PDF_URL
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from constants import PDF_URL, DOWNLOAD_WORKERS, DOWNLOAD_REQUESTS_PER_SECOND
 from utils.colors.colors_terminal import Bcolors
 
+CHUNK_SIZE = 64 * 1024
+TIMEOUT = (10, 60)           # connect, read (per chunk)
+MAX_BACKOFF_SECONDS = 300
+RETRYABLE_STATUS = (429, 503)
+
 
 def transform_id(doc_id):
     """Transform ID from handle format (10915-123) to path format (10915/123)"""
     return doc_id.replace("-", "/")
 
 
-def download_pdf(doc_id, pdf_folder):
+def pdf_url(doc_id, base_url=PDF_URL):
+    return f"{base_url}{transform_id(doc_id)}/Documento_completo.pdf?sequence=1&isAllowed=y"
+
+
+class HostRateLimiter:
+    """
+    Politeness limiter shared by all download threads: at most requests_per_second
+    request starts per host. A 429/503 pushes the host's next slot past Retry-After
+    and doubles its interval; every success shrinks the interval back toward the base.
+    """
+
+    def __init__(self, requests_per_second=DOWNLOAD_REQUESTS_PER_SECOND):
+        self.base_interval = 1.0 / requests_per_second
+        self._interval = {}
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self._interval.get(host, self.base_interval)
+        if slot > now:
+            time.sleep(slot - now)
+
+    def backoff(self, host, retry_after=None):
+        with self._lock:
+            interval = min(self._interval.get(host, self.base_interval) * 2, MAX_BACKOFF_SECONDS)
+            self._interval[host] = interval
+            delay = retry_after if retry_after is not None else interval
+            self._next_slot[host] = max(self._next_slot.get(host, 0), time.monotonic() + delay)
+        return delay
+
+    def success(self, host):
+        with self._lock:
+            interval = self._interval.get(host, self.base_interval)
+            self._interval[host] = max(self.base_interval, interval * 0.9)
+
+
+def _retry_after_seconds(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_thread_local = threading.local()
+
+
+def _session(pool_size=DOWNLOAD_WORKERS):
+    """One pooled session per download thread (keep-alive across files)."""
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _thread_local.session = session
+    return session
+
+
+def download_pdf(doc_id, pdf_folder, session=None, limiter=None, base_url=PDF_URL):
     """
     Download a single PDF. Returns True if done (success or permanent fail),
-    False if should retry (e.g. rate limited).
+    False if should retry (e.g. rate limited, connection dropped mid-transfer).
+    An interrupted transfer leaves <doc_id>.pdf.part behind and the retry resumes it with a Range request.
     """
-    transformed_id = transform_id(doc_id)
-    url = f"{PDF_URL}{transformed_id}/Documento_completo.pdf?sequence=1&isAllowed=y"
+    url = pdf_url(doc_id, base_url)
     file_path = pdf_folder / f"{doc_id}.pdf"
+    part_path = pdf_folder / f"{doc_id}.pdf.part"
 
     if file_path.exists():
         return True
 
-    try:
-        response = requests.get(url, timeout=30)
+    session = session or _session()
+    limiter = limiter or HostRateLimiter()
+    host = urlsplit(url).netloc
+    offset = part_path.stat().st_size if part_path.exists() else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
 
-        if response.status_code == 200:
-            with open(file_path, 'wb') as f:
-                f.write(response.content)
+    limiter.wait(host)
+    try:
+        with session.get(url, headers=headers, stream=True, timeout=TIMEOUT) as response:
+            if response.status_code in RETRYABLE_STATUS:
+                delay = limiter.backoff(host, _retry_after_seconds(response.headers.get("Retry-After")))
+                print(f"{Bcolors.WARNING}  {doc_id}: HTTP {response.status_code}, backing off {delay:.0f}s{Bcolors.ENDC}")
+                return False  # Retry
+            if response.status_code == 416:
+                if response.headers.get("Content-Range") == f"bytes */{offset}":
+                    os.replace(part_path, file_path)  # the .part was already complete
+                    return True
+                part_path.unlink(missing_ok=True)
+                return False  # stale .part, start over
+            if response.status_code not in (200, 206):
+                print(f"{Bcolors.FAIL}  {doc_id}: HTTP {response.status_code}{Bcolors.ENDC}")
+                return True  # Don't retry
+
+            mode = "ab" if response.status_code == 206 else "wb"
+            expected = response.headers.get("Content-Length")
+            written = 0
+            with open(part_path, mode) as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+                    written += len(chunk)
+            if expected is not None and written < int(expected):
+                return False  # truncated body, resume from the .part
+            os.replace(part_path, file_path)
+            limiter.success(host)
             return True
-        elif response.status_code == 429:
-            print(f"{Bcolors.WARNING}  Rate limited. Waiting 10s...{Bcolors.ENDC}")
-            time.sleep(10)
-            return False  # Retry
-        else:
-            print(f"{Bcolors.FAIL}  HTTP {response.status_code}{Bcolors.ENDC}")
-            return True  # Don't retry
 
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+            requests.exceptions.ChunkedEncodingError) as e:
+        print(f"{Bcolors.WARNING}  {doc_id}: {type(e).__name__}, will resume{Bcolors.ENDC}")
+        return False  # Retry, resuming from the .part
     except requests.exceptions.RequestException as e:
-        print(f"{Bcolors.FAIL}  Error: {e}{Bcolors.ENDC}")
+        print(f"{Bcolors.FAIL}  {doc_id}: Error: {e}{Bcolors.ENDC}")
         return True  # Don't retry
 
 
-def download_batch(ids_to_download, pdf_folder, label_key=None):
+def _download_with_retries(doc_id, pdf_folder, limiter, base_url, max_retries, pool_size):
+    session = _session(pool_size)
+    for _ in range(max_retries):
+        if download_pdf(doc_id, pdf_folder, session, limiter, base_url):
+            return (pdf_folder / f"{doc_id}.pdf").exists()
+    return None
+
+
+def download_batch(ids_to_download, pdf_folder, label_key=None, workers=DOWNLOAD_WORKERS,
+                   requests_per_second=DOWNLOAD_REQUESTS_PER_SECOND, base_url=PDF_URL, max_retries=5):
     """
-    Download a batch of PDFs with retry logic and progress.
+    Download a batch of PDFs concurrently with retry logic and progress.
 
     Args:
         ids_to_download: list of (doc_id, label) tuples or list of doc_ids
         pdf_folder: Path to save PDFs
         label_key: optional label name for display (e.g. 'subject', 'type')
+        workers: parallel downloads
+        requests_per_second: politeness limit per host, shared by all workers
+        base_url: PDF_URL by default; point it at utils/download/stub_server.py for testing
+        max_retries: attempts per file (429s and dropped connections are retried, resuming partial files)
     """
     if not ids_to_download:
         print(f"{Bcolors.OKGREEN}Nothing to download!{Bcolors.ENDC}")
@@ -64,46 +185,43 @@ def download_batch(ids_to_download, pdf_folder, label_key=None):
     failed = 0
     skipped = 0
     total = len(ids_to_download)
-
-    for i, item in enumerate(ids_to_download, 1):
-        # Support both (doc_id, label) tuples and plain doc_ids
-        if isinstance(item, tuple):
-            doc_id, label = item
-        else:
-            doc_id, label = item, None
-
-        file_path = pdf_folder / f"{doc_id}.pdf"
-        if file_path.exists():
-            skipped += 1
-            continue
-
-        display = f"[{i}/{total}] {doc_id}"
-        if label:
-            display += f" ({label})"
-        print(display, end=" ")
-
-        max_retries = 3
-        success = False
-        for attempt in range(max_retries):
-            done = download_pdf(doc_id, pdf_folder)
-            if done:
-                if file_path.exists():
-                    print(f"{Bcolors.OKGREEN}OK{Bcolors.ENDC}")
-                    downloaded += 1
-                    success = True
-                else:
-                    failed += 1
-                    success = True
-                break
-
-        if not success:
-            print(f"{Bcolors.FAIL}FAILED (max retries){Bcolors.ENDC}")
-            failed += 1
-
-        time.sleep(1)  # Be respectful to the server
-
+    limiter = HostRateLimiter(requests_per_second)
+    start = time.perf_counter()
+
+    pending = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for item in ids_to_download:
+            # Support both (doc_id, label) tuples and plain doc_ids
+            if isinstance(item, tuple):
+                doc_id, label = item
+            else:
+                doc_id, label = item, None
+
+            if (pdf_folder / f"{doc_id}.pdf").exists():
+                skipped += 1
+                continue
+            future = executor.submit(_download_with_retries, doc_id, pdf_folder, limiter, base_url, max_retries, workers)
+            pending[future] = (doc_id, label)
+
+        for i, future in enumerate(as_completed(pending), 1):
+            doc_id, label = pending[future]
+            display = f"[{i + skipped}/{total}] {doc_id}"
+            if label:
+                display += f" ({label})"
+            result = future.result()
+            if result:
+                print(f"{display} {Bcolors.OKGREEN}OK{Bcolors.ENDC}")
+                downloaded += 1
+            elif result is None:
+                print(f"{display} {Bcolors.FAIL}FAILED (max retries){Bcolors.ENDC}")
+                failed += 1
+            else:
+                print(f"{display} {Bcolors.FAIL}FAILED{Bcolors.ENDC}")
+                failed += 1
+
+    elapsed = time.perf_counter() - start
     print(f"\n{Bcolors.HEADER}=== Download Summary ==={Bcolors.ENDC}")
-    print(f"{Bcolors.OKGREEN}Downloaded: {downloaded}{Bcolors.ENDC}")
+    print(f"{Bcolors.OKGREEN}Downloaded: {downloaded} in {elapsed:.1f}s ({workers} workers){Bcolors.ENDC}")
     if skipped:
         print(f"{Bcolors.OKBLUE}Already existed: {skipped}{Bcolors.ENDC}")
     if failed:
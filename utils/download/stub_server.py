@@ -0,0 +1,97 @@
+"""
+Local HTTP stub of the SEDICI bitstream endpoint, for testing the PDF downloader.
+
+Serves a deterministic fake PDF for any path ending in /Documento_completo.pdf and
+can misbehave on purpose:
+  --size BYTES        size of every served file
+  --rate-limit-every  answer every Nth request with 429 + Retry-After
+  --drop-every        cut every Nth transfer in half (Content-Length promises the full body)
+Range requests are honoured (206 / 416), so resumed .part files can be verified.
+
+Usage:
+    python -m utils.download.stub_server --port 8090 --rate-limit-every 5 --drop-every 7
+
+    from utils.download.pdf_downloader import download_batch
+    download_batch(ids, folder, base_url="http://127.0.0.1:8090/bitstream/handle/")
+"""
+import argparse
+import hashlib
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def fake_pdf(path: str, size: int) -> bytes:
+    """Deterministic content per path, so a resumed download can be compared byte for byte."""
+    header = b"%PDF-1.4\n"
+    seed = hashlib.sha256(path.encode("utf-8")).digest()
+    body = (seed * (size // len(seed) + 1))[:max(size - len(header), 0)]
+    return header + body
+
+
+def make_handler(size=256 * 1024, rate_limit_every=0, drop_every=0, retry_after=1):
+    counter = {"requests": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if not path.endswith("/Documento_completo.pdf"):
+                return self._send(404, b"not found")
+            with lock:
+                counter["requests"] += 1
+                n = counter["requests"]
+            if rate_limit_every and n % rate_limit_every == 0:
+                return self._send(429, b"slow down", {"Retry-After": str(retry_after)})
+
+            content = fake_pdf(path, size)
+            start = 0
+            match = re.fullmatch(r"bytes=(\d+)-", self.headers.get("Range", ""))
+            if match:
+                start = int(match.group(1))
+                if start >= len(content):
+                    return self._send(416, b"", {"Content-Range": f"bytes */{len(content)}"})
+            body = content[start:]
+            status = 206 if match else 200
+            headers = {"Content-Type": "application/pdf", "Accept-Ranges": "bytes"}
+            if match:
+                headers["Content-Range"] = f"bytes {start}-{len(content) - 1}/{len(content)}"
+            if drop_every and n % drop_every == 0:
+                return self._send(status, body[:len(body) // 2], headers, length=len(body), close=True)
+            self._send(status, body, headers)
+
+        def _send(self, status, body, headers=None, length=None, close=False):
+            self.send_response(status)
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.send_header("Content-Length", str(len(body) if length is None else length))
+            if close:
+                self.send_header("Connection", "close")
+                self.close_connection = True
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(port=8090, **kwargs):
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(**kwargs))
+    print(f"PDF stub server listening on http://127.0.0.1:{server.server_port}/bitstream/handle/")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stub of the SEDICI PDF endpoint")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--size", type=int, default=256 * 1024)
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    parser.add_argument("--drop-every", type=int, default=0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+    serve(args.port, size=args.size, rate_limit_every=args.rate_limit_every,
+          drop_every=args.drop_every, retry_after=args.retry_after)
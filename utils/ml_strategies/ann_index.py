@@ -0,0 +1,182 @@
+"""
+Approximate nearest-neighbor indexes for EmbeddingsKNNTrainingStrategy.
+
+KNeighborsClassifier(metric='cosine') compares every query with every training
+embedding. These indexes return the same (cosine distance, row) pairs while only
+scanning part of the corpus:
+
+- IVFIndex (numpy only): spherical k-means splits the normalized vectors into n_lists
+  clusters; a query is compared with the n_probe clusters whose centroids are closest.
+  n_probe trades recall for latency (n_probe = n_lists is an exact search).
+- HNSWIndex (optional, needs hnswlib): a navigable small-world graph; ef_search trades
+  recall for latency.
+
+Both are saved to a single file next to the classifier and loaded with load_index().
+knn_vote() turns the neighbors into a prediction the same way KNeighborsClassifier does.
+"""
+import numpy as np
+
+INDEX_KINDS = ("ivf", "hnsw")
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class IVFIndex:
+    """Inverted-file index over L2-normalized vectors (cosine distance)."""
+
+    kind = "ivf"
+
+    def __init__(self, n_lists=None, n_probe=8, iterations=10, seed=42):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.iterations = iterations
+        self.seed = seed
+
+    def _assign(self, vectors, centroids, chunk=4096):
+        # chunked so vectors x centroids never has to fit in memory at once
+        return np.concatenate([
+            np.argmax(vectors[i:i + chunk] @ centroids.T, axis=1) for i in range(0, len(vectors), chunk)
+        ]) if len(vectors) else np.empty(0, dtype=np.int64)
+
+    def build(self, vectors):
+        vectors = _normalize(vectors)
+        n = len(vectors)
+        # ~sqrt(N) lists keeps both the centroid scan and each list scan around sqrt(N) comparisons
+        n_lists = min(self.n_lists or max(1, int(round(np.sqrt(n)))), n)
+        rng = np.random.default_rng(self.seed)
+        centroids = vectors[rng.choice(n, n_lists, replace=False)]
+        for _ in range(self.iterations):
+            assignment = self._assign(vectors, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, vectors)
+            counts = np.bincount(assignment, minlength=n_lists)
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = vectors[rng.choice(n, int(empty.sum()), replace=False)]
+            centroids = _normalize(sums)
+        assignment = self._assign(vectors, centroids)
+
+        order = np.argsort(assignment, kind="stable")
+        self.centroids = centroids
+        self.vectors = vectors[order]
+        self.ids = order
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=n_lists))])
+        self.n_lists = n_lists
+        return self
+
+    def search(self, queries, k, n_probe=None):
+        """(distances, ids), both (len(queries), k), nearest first. Missing neighbors are (inf, -1)."""
+        queries = _normalize(queries)
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        closest_lists = np.argsort(-(queries @ self.centroids.T), axis=1)[:, :n_probe]
+        distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        for q, lists in enumerate(closest_lists):
+            candidates = np.concatenate([np.arange(self.offsets[l], self.offsets[l + 1]) for l in lists])
+            # rounding can push the distance of identical vectors below 0, which would flip its 1/d vote
+            candidate_distances = np.maximum(1 - self.vectors[candidates] @ queries[q], 0)
+            top = min(k, len(candidates))
+            nearest = np.argpartition(candidate_distances, top - 1)[:top] if top < len(candidates) else np.arange(top)
+            nearest = nearest[np.argsort(candidate_distances[nearest], kind="stable")]
+            distances[q, :top] = candidate_distances[nearest]
+            ids[q, :top] = self.ids[candidates[nearest]]
+        return distances, ids
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            np.savez(f, centroids=self.centroids, vectors=self.vectors, ids=self.ids, offsets=self.offsets,
+                     n_probe=self.n_probe)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            index = cls(n_lists=len(data["centroids"]), n_probe=int(data["n_probe"]))
+            index.centroids, index.vectors = data["centroids"], data["vectors"]
+            index.ids, index.offsets = data["ids"], data["offsets"]
+        return index
+
+
+class HNSWIndex:
+    """hnswlib graph index (cosine space)."""
+
+    kind = "hnsw"
+
+    def __init__(self, m=16, ef_construction=200, ef_search=64, seed=42):
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.seed = seed
+
+    def build(self, vectors):
+        import hnswlib
+        vectors = _normalize(vectors)
+        self.index = hnswlib.Index(space="cosine", dim=vectors.shape[1])
+        self.index.init_index(max_elements=len(vectors), ef_construction=self.ef_construction, M=self.m,
+                              random_seed=self.seed)
+        self.index.add_items(vectors, np.arange(len(vectors)), num_threads=1)
+        return self
+
+    def search(self, queries, k, ef_search=None):
+        """(distances, ids), both (len(queries), k), nearest first. Missing neighbors are (inf, -1)."""
+        top = min(k, self.index.get_current_count())
+        self.index.set_ef(max(ef_search or self.ef_search, top))
+        ids, found = self.index.knn_query(_normalize(queries), k=top)
+        distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+        all_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        distances[:, :top], all_ids[:, :top] = np.maximum(found, 0), ids
+        return distances, all_ids
+
+    def save(self, path):
+        self.index.save_index(str(path))
+
+    @classmethod
+    def load(cls, path, dim, ef_search=64):
+        import hnswlib
+        index = cls(ef_search=ef_search)
+        index.index = hnswlib.Index(space="cosine", dim=dim)
+        index.index.load_index(str(path))
+        return index
+
+
+def build_index(kind, vectors, **params):
+    """Build an index of the given kind ('ivf' or 'hnsw') with its constructor params."""
+    if kind == "ivf":
+        return IVFIndex(**params).build(vectors)
+    if kind == "hnsw":
+        return HNSWIndex(**params).build(vectors)
+    raise ValueError(f"Unknown index kind: {kind} (expected one of {INDEX_KINDS})")
+
+
+def load_index(kind, path, dim, params=None):
+    params = params or {}
+    if kind == "ivf":
+        return IVFIndex.load(path)
+    if kind == "hnsw":
+        return HNSWIndex.load(path, dim, ef_search=params.get("ef_search", 64))
+    raise ValueError(f"Unknown index kind: {kind} (expected one of {INDEX_KINDS})")
+
+
+def knn_vote(distances, neighbor_labels, n_classes, weights="distance"):
+    """
+    Class per query from its neighbors, like KNeighborsClassifier.predict:
+    'uniform' counts votes, 'distance' weights them by 1/distance (exact matches win outright).
+    Neighbors with label -1 (not found) are ignored.
+    """
+    valid = neighbor_labels >= 0
+    if weights == "distance":
+        with np.errstate(divide="ignore"):
+            votes = 1 / distances
+        exact = (distances == 0) & valid
+        rows = exact.any(axis=1)
+        votes[rows] = exact[rows].astype(votes.dtype)
+    else:
+        votes = np.ones_like(distances)
+    votes = np.where(valid, votes, 0)
+    scores = np.zeros((len(distances), n_classes))
+    np.add.at(scores, (np.repeat(np.arange(len(distances)), distances.shape[1]), np.where(valid, neighbor_labels, 0).ravel()),
+              votes.ravel())
+    return np.argmax(scores, axis=1)
@@ -0,0 +1,329 @@
+"""
+Compact, memory-mappable export of the TF-IDF classifiers.
+
+A pickled TfidfVectorizer keeps its vocabulary as a Python dict with one str key per
+term: unpickling rebuilds every object, takes seconds for a 60k-term (or PMI bigram)
+vocabulary and each API worker holds its own copy. The exported folder only holds
+flat arrays, opened with np.load(mmap_mode="r") so a cold start reads no more than
+the header of each file and every worker shares the same page-cache pages:
+
+    vectorizer.json      analyzer settings (token pattern, n-grams, stop words, tf/idf/norm)
+    vocab_hashes.npy     uint64 hash of every term, sorted (looked up with searchsorted);
+                         n-gram hashes are combined from token hashes, so transform()
+                         hashes each distinct token once and builds the n-grams in numpy
+    vocab_columns.npy    feature column of each hash
+    idf.npy              idf weight per column
+    terms.bin            (optional) the terms as UTF-8, in column order, for feature names
+    term_offsets.npy     (optional) start of each term in terms.bin
+    model.json           classifier kind and label classes
+    coef_*.npy           linear models: weights as CSR arrays of coef_.T (one row per
+                         feature, a document only touches its own rows), intercept.npy
+    booster.ubj          XGBoost: the booster in its own binary format
+
+CompactVectorizer/CompactClassifier read it back and give the same features and
+predictions as the sklearn objects (export_classifier checks that on sample documents).
+The orchestrator has its own copy of the reader (api/app/orchestrator/app/service/
+compact_model.py), since the API can't import the root utils/ package.
+"""
+import hashlib
+import json
+import re
+import shutil
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+
+from utils.colors.colors_terminal import Bcolors
+
+FORMAT_VERSION = 1
+
+
+_NGRAM_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def token_hash(token):
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _mix(x):
+    # splitmix64 finalizer (uint64 arithmetic wraps around)
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def ngram_hashes(token_hashes, n):
+    """Hash of every n-gram of a token sequence, from the hashes of its tokens."""
+    count = len(token_hashes) - n + 1
+    if count <= 0:
+        return np.empty(0, dtype=np.uint64)
+    hashes = np.full(count, n, dtype=np.uint64)
+    for i in range(n):
+        hashes = _mix((hashes * _NGRAM_MULTIPLIER) ^ token_hashes[i:i + count])
+    return hashes
+
+
+def term_hashes(terms):
+    """Hash of each vocabulary term (n tokens joined by spaces), as transform() computes it."""
+    hashes = np.empty(len(terms), dtype=np.uint64)
+    by_length = {}
+    for position, term in enumerate(terms):
+        by_length.setdefault(len(term.split(" ")), []).append(position)
+    for n, positions in by_length.items():
+        tokens = np.array([[token_hash(t) for t in terms[p].split(" ")] for p in positions], dtype=np.uint64)
+        combined = np.full(len(positions), n, dtype=np.uint64)
+        for i in range(n):
+            combined = _mix((combined * _NGRAM_MULTIPLIER) ^ tokens[:, i])
+        hashes[positions] = combined
+    return hashes
+
+
+def _save(folder, name, array):
+    np.save(folder / name, np.ascontiguousarray(array))
+
+
+# ── export ────────────────────────────────────────────────────────────────────
+
+def _save_linear(folder, coef, intercept):
+    coef = sp.csr_matrix(sp.csr_matrix(coef).T)
+    _save(folder, "coef_data.npy", coef.data)
+    _save(folder, "coef_indices.npy", coef.indices)
+    _save(folder, "coef_indptr.npy", coef.indptr)
+    _save(folder, "intercept.npy", np.atleast_1d(intercept))
+    return int(coef.shape[1])
+
+
+def export_vectorizer(vectorizer, folder, include_terms=False):
+    """Write a fitted TfidfVectorizer (word analyzer, default preprocessing) as flat arrays."""
+    if vectorizer.analyzer != "word" or vectorizer.preprocessor is not None or vectorizer.tokenizer is not None \
+            or vectorizer.strip_accents is not None:
+        raise ValueError("Only word analyzers with the default preprocessor/tokenizer can be exported")
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+
+    terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+    hashes = term_hashes(terms)
+    order = np.argsort(hashes)
+    if len(hashes) and np.any(hashes[order][1:] == hashes[order][:-1]):
+        raise ValueError("Two vocabulary terms share a 64-bit hash")
+    _save(folder, "vocab_hashes.npy", hashes[order])
+    _save(folder, "vocab_columns.npy", order.astype(np.int32))
+    _save(folder, "idf.npy", vectorizer.idf_ if vectorizer.use_idf else np.ones(len(terms)))
+
+    if include_terms:
+        encoded = [t.encode("utf-8") for t in terms]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(e) for e in encoded])
+        with open(folder / "terms.bin", "wb") as f:
+            f.write(b"".join(encoded))
+        _save(folder, "term_offsets.npy", offsets)
+
+    stop_words = vectorizer.get_stop_words()
+    config = {
+        "format_version": FORMAT_VERSION,
+        "n_features": len(terms),
+        "lowercase": vectorizer.lowercase,
+        "token_pattern": vectorizer.token_pattern,
+        "ngram_range": list(vectorizer.ngram_range),
+        "stop_words": sorted(stop_words) if stop_words is not None else None,
+        "sublinear_tf": vectorizer.sublinear_tf,
+        "norm": vectorizer.norm,
+        "binary": vectorizer.binary,
+        "has_terms": include_terms,
+    }
+    with open(folder / "vectorizer.json", "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False)
+
+
+def export_classifier(clf, vectorizer, label_encoder, folder, check_documents=None):
+    """
+    Write vectorizer + classifier + classes to folder. Supported: linear-kernel SVC (one-vs-one),
+    linear one-vs-rest models with coef_ (LinearSVC, LogisticRegression) and XGBClassifier.
+    With check_documents, returns how many of them the compact model predicts differently.
+    """
+    folder = Path(folder)
+    export_vectorizer(vectorizer, folder)
+    model = {"format_version": FORMAT_VERSION, "classes": [str(c) for c in label_encoder.classes_]}
+
+    if type(clf).__name__ == "XGBClassifier":
+        clf.get_booster().save_model(str(folder / "booster.ubj"))
+        model["kind"] = "xgboost"
+    elif type(clf).__name__ == "SVC":
+        if clf.kernel != "linear":
+            raise ValueError(f"Only linear SVC can be exported as weights (kernel={clf.kernel})")
+        model["kind"] = "svc_ovo"
+        model["n_classes"] = len(clf.classes_)
+        model["n_coef_rows"] = _save_linear(folder, clf.coef_, clf.intercept_)
+    elif hasattr(clf, "coef_"):
+        model["kind"] = "linear_ovr"
+        model["n_coef_rows"] = _save_linear(folder, clf.coef_, clf.intercept_)
+    else:
+        raise ValueError(f"Cannot export {type(clf).__name__}")
+
+    with open(folder / "model.json", "w", encoding="utf-8") as f:
+        json.dump(model, f, ensure_ascii=False)
+
+    if check_documents is not None:
+        expected = label_encoder.inverse_transform(clf.predict(vectorizer.transform(check_documents)))
+        return int(np.sum(CompactClassifier(folder).predict(check_documents) != expected))
+    return None
+
+
+def export_trained_model(clf, vectorizer, label_encoder, folder, documents, sample=200):
+    """
+    export_classifier() at the end of a strategy's train(), checked on its first documents.
+    The orchestrator prefers a compact folder over the pickles, so the folder is only kept when
+    this model was exported and predicts those documents exactly like the pickled one.
+    """
+    folder = Path(folder)
+    shutil.rmtree(folder, ignore_errors=True)
+    try:
+        mismatches = export_classifier(clf, vectorizer, label_encoder, folder, check_documents=documents[:sample])
+    except ValueError as e:
+        shutil.rmtree(folder, ignore_errors=True)
+        print(f"{Bcolors.WARNING}Compact export skipped: {e}{Bcolors.ENDC}")
+        return
+    except BaseException:
+        shutil.rmtree(folder, ignore_errors=True)
+        raise
+    checked = min(sample, len(documents))
+    if mismatches:
+        shutil.rmtree(folder, ignore_errors=True)
+        print(f"{Bcolors.FAIL}Compact model discarded: {mismatches} different predictions on {checked} documents{Bcolors.ENDC}")
+        return
+    print(f"{Bcolors.OKGREEN}Compact model saved to {folder} (same predictions on {checked} documents){Bcolors.ENDC}")
+
+
+# ── runtime ───────────────────────────────────────────────────────────────────
+
+class CompactVectorizer:
+    """Same transform() as the exported TfidfVectorizer, over memory-mapped arrays."""
+
+    def __init__(self, folder):
+        folder = Path(folder)
+        with open(folder / "vectorizer.json", "r", encoding="utf-8") as f:
+            config = json.load(f)
+        self.n_features = config["n_features"]
+        self.lowercase = config["lowercase"]
+        self.token_re = re.compile(config["token_pattern"])
+        self.min_n, self.max_n = config["ngram_range"]
+        self.stop_words = frozenset(config["stop_words"]) if config["stop_words"] is not None else None
+        self.sublinear_tf = config["sublinear_tf"]
+        self.norm = config["norm"]
+        self.binary = config["binary"]
+        self.hashes = np.load(folder / "vocab_hashes.npy", mmap_mode="r")
+        self.columns = np.load(folder / "vocab_columns.npy", mmap_mode="r")
+        self.idf = np.load(folder / "idf.npy", mmap_mode="r")
+        self.terms = None
+        if config["has_terms"]:
+            self.terms = np.memmap(folder / "terms.bin", dtype=np.uint8, mode="r") if self.n_features else b""
+            self.term_offsets = np.load(folder / "term_offsets.npy", mmap_mode="r")
+
+    def _ngram_hashes(self, doc):
+        # same tokens and n-grams as sklearn's build_analyzer() for analyzer="word", hashed
+        tokens = self.token_re.findall(doc.lower() if self.lowercase else doc)
+        if self.stop_words is not None:
+            tokens = [w for w in tokens if w not in self.stop_words]
+        known = {}
+        hashes = np.fromiter(
+            (known[t] if t in known else known.setdefault(t, token_hash(t)) for t in tokens),
+            dtype=np.uint64, count=len(tokens),
+        )
+        return np.concatenate([ngram_hashes(hashes, n) for n in range(self.min_n, self.max_n + 1)])
+
+    def _lookup(self, hashes):
+        """Column of each hash, -1 when it is not in the vocabulary."""
+        if not len(self.hashes):
+            return np.full(len(hashes), -1)
+        positions = np.minimum(np.searchsorted(self.hashes, hashes), len(self.hashes) - 1)
+        return np.where(self.hashes[positions] == hashes, self.columns[positions], -1)
+
+    def transform(self, documents):
+        indptr, indices, data = [0], [], []
+        for doc in documents:
+            hashes, counts = np.unique(self._ngram_hashes(doc), return_counts=True)
+            columns = self._lookup(hashes)
+            values = counts.astype(np.float64)
+            keep = columns >= 0
+            columns, values = columns[keep], values[keep]
+            order = np.argsort(columns)
+            indices.append(columns[order])
+            data.append(values[order])
+            indptr.append(indptr[-1] + len(columns))
+        X = sp.csr_matrix(
+            (np.concatenate(data) if data else np.empty(0), np.concatenate(indices) if indices else np.empty(0, dtype=np.int64),
+             np.array(indptr)),
+            shape=(len(indptr) - 1, self.n_features),
+        )
+        if self.binary:
+            X.data[:] = 1
+        if self.sublinear_tf:
+            np.log(X.data, X.data)
+            X.data += 1
+        X.data *= self.idf[X.indices]
+        if self.norm is not None:
+            row = np.repeat(np.arange(X.shape[0]), np.diff(X.indptr))
+            norms = np.zeros(X.shape[0])
+            np.add.at(norms, row, np.abs(X.data) if self.norm == "l1" else X.data ** 2)
+            norms = norms if self.norm == "l1" else np.sqrt(norms)
+            X.data /= np.where(norms == 0, 1, norms)[row]
+        return X
+
+    def feature_names(self, columns):
+        """Terms of the given columns (needs an export with include_terms=True)."""
+        if self.terms is None:
+            raise ValueError("This vectorizer was exported without its terms")
+        return [bytes(self.terms[self.term_offsets[c]:self.term_offsets[c + 1]]).decode("utf-8") for c in columns]
+
+
+class CompactClassifier:
+    """Vectorizer + classifier exported by export_classifier; predict(documents) returns labels."""
+
+    def __init__(self, folder):
+        folder = Path(folder)
+        with open(folder / "model.json", "r", encoding="utf-8") as f:
+            model = json.load(f)
+        self.kind = model["kind"]
+        self.classes = np.array(model["classes"], dtype=object)
+        self.vectorizer = CompactVectorizer(folder)
+        if self.kind == "xgboost":
+            import xgboost as xgb
+            self.booster = xgb.Booster()
+            self.booster.load_model(str(folder / "booster.ubj"))
+        else:
+            self.coef_t = sp.csr_matrix(
+                (np.load(folder / "coef_data.npy", mmap_mode="r"), np.load(folder / "coef_indices.npy", mmap_mode="r"),
+                 np.load(folder / "coef_indptr.npy", mmap_mode="r")),
+                shape=(self.vectorizer.n_features, model["n_coef_rows"]), copy=False,
+            )
+            self.intercept = np.load(folder / "intercept.npy", mmap_mode="r")
+            if self.kind == "svc_ovo":
+                # libsvm's pair order: (0,1), (0,2), ..., (1,2), ...
+                n_classes = model["n_classes"]
+                self.pairs = np.array([(i, j) for i in range(n_classes) for j in range(i + 1, n_classes)])
+
+    def predict_encoded(self, X):
+        if self.kind == "xgboost":
+            import xgboost as xgb
+            scores = self.booster.predict(xgb.DMatrix(X))
+            if scores.ndim == 1:
+                return (scores > 0.5).astype(int)
+            return np.argmax(scores, axis=1)
+        decision = (X @ self.coef_t).toarray() + self.intercept
+        if self.kind == "svc_ovo" and len(self.classes) == 2:
+            # sklearn flips the sign of binary SVCs: libsvm's "> 0 votes class 0" becomes "< 0"
+            return (decision[:, 0] >= 0).astype(int)
+        if self.kind == "svc_ovo":
+            # decision > 0 votes for the first class of the pair; ties go to the lowest class
+            winners = np.where(decision > 0, self.pairs[:, 0], self.pairs[:, 1])
+            votes = np.stack([np.bincount(row, minlength=len(self.classes)) for row in winners])
+            return np.argmax(votes, axis=1)
+        if decision.shape[1] == 1:
+            return (decision[:, 0] > 0).astype(int)
+        return np.argmax(decision, axis=1)
+
+    def predict(self, documents):
+        return self.classes[self.predict_encoded(self.vectorizer.transform(documents))]
@@ -1,11 +1,15 @@
 """
 Shared dataset loading and creation functions.
 Generic versions that accept parameters for flexibility across modules.
+StreamingTextDataset reads the same documents lazily, for out-of-core training.
 """
+import hashlib
+import json
 import pandas as pd
 import random
 import os
 from collections import Counter
+from pathlib import Path
 from utils.colors.colors_terminal import Bcolors
 
 
@@ -21,42 +25,20 @@ def load_csv_labels(csv_path, id_column='id', label_column='subject'):
     Returns:
         dict: Mapping of document IDs to labels
     """
-    df = pd.read_csv(csv_path)
+    df = pd.read_csv(csv_path, usecols=[id_column, label_column], dtype={id_column: str})
+    labels = df[label_column]
+    df = df[labels.notna() & (labels != "") & (labels != 0)]
 
-    label_mapping = {}
-    for _, row in df.iterrows():
-        doc_id = str(row[id_column])
-        label = row[label_column]
-
-        if pd.isna(label) or not label:
-            continue
-
-        label_mapping[doc_id] = label
+    label_mapping = dict(zip(df[id_column].astype(str), df[label_column]))
 
     print(f"{Bcolors.OKGREEN}CSV loaded: {len(label_mapping)} documents with labels{Bcolors.ENDC}")
     return label_mapping
 
 
-def create_dataset(label_mapping, txt_folder, min_frequency=5, max_per_label=200, random_state=42):
-    """
-    Generic: read txt files + label mapping -> (documents, labels, doc_ids).
-
-    Args:
-        label_mapping: Dictionary mapping document IDs to labels
-        txt_folder: Path to folder with .txt files
-        min_frequency: Minimum number of documents required per label
-        max_per_label: Maximum number of documents per label (for balancing)
-        random_state: Random seed for reproducible sampling
-
-    Returns:
-        tuple: (documents, labels, document_ids)
-    """
+def _select_files(label_mapping, txt_folder, min_frequency, max_per_label, random_state):
+    """The (txt_file, label) pairs create_dataset reads, in its order and with its seeded sampling."""
     random.seed(random_state)
 
-    if not txt_folder.exists():
-        print(f"{Bcolors.FAIL}Folder not found: {txt_folder}{Bcolors.ENDC}")
-        return [], [], []
-
     txt_files = [f for f in os.listdir(txt_folder) if f.endswith('.txt')]
     print(f"{Bcolors.OKBLUE}Found {len(txt_files)} txt files{Bcolors.ENDC}")
 
@@ -90,36 +72,18 @@ def create_dataset(label_mapping, txt_folder, min_frequency=5, max_per_label=200
             label_files[label] = []
         label_files[label].append(txt_file)
 
-    # Limit files per label and create dataset
-    documents = []
-    labels = []
-    document_ids = []
-
+    # Limit files per label
+    selected = []
     for label, files in label_files.items():
-        if len(files) > max_per_label:
+        if max_per_label is not None and len(files) > max_per_label:
             files = random.sample(files, max_per_label)
             print(f"{Bcolors.WARNING}Limited {label} to {max_per_label} documents (had {len(label_files[label])}){Bcolors.ENDC}")
+        selected.extend((txt_file, label) for txt_file in files)
+    return selected
 
-        for txt_file in files:
-            doc_id = txt_file.replace('.txt', '')
 
-            txt_path = txt_folder / txt_file
-            try:
-                with open(txt_path, 'r', encoding='utf-8') as f:
-                    text_content = f.read()
-
-                processed_text = " ".join(text_content.split()).lower()
-
-                if processed_text:
-                    documents.append(processed_text)
-                    labels.append(label)
-                    document_ids.append(doc_id)
-
-            except Exception as e:
-                print(f"Error reading {txt_file}: {e}")
-                continue
-
-    print(f"{Bcolors.OKGREEN}Dataset created: {len(documents)} documents, {len(set(labels))} labels{Bcolors.ENDC}")
+def _print_distribution(labels, documents_count):
+    print(f"{Bcolors.OKGREEN}Dataset created: {documents_count} documents, {len(set(labels))} labels{Bcolors.ENDC}")
 
     # Show final distribution
     final_counts = Counter(labels)
@@ -127,4 +91,250 @@ def create_dataset(label_mapping, txt_folder, min_frequency=5, max_per_label=200
     for label, count in final_counts.most_common():
         print(f"  {label}: {count}")
 
+
+def create_dataset(label_mapping, txt_folder, min_frequency=5, max_per_label=200, random_state=42):
+    """
+    Generic: read txt files + label mapping -> (documents, labels, doc_ids).
+
+    Args:
+        label_mapping: Dictionary mapping document IDs to labels
+        txt_folder: Path to folder with .txt files
+        min_frequency: Minimum number of documents required per label
+        max_per_label: Maximum number of documents per label (for balancing), None = no limit
+        random_state: Random seed for reproducible sampling
+
+    Returns:
+        tuple: (documents, labels, document_ids)
+    """
+    if not txt_folder.exists():
+        print(f"{Bcolors.FAIL}Folder not found: {txt_folder}{Bcolors.ENDC}")
+        return [], [], []
+
+    documents = []
+    labels = []
+    document_ids = []
+
+    for txt_file, label in _select_files(label_mapping, txt_folder, min_frequency, max_per_label, random_state):
+        doc_id = txt_file.replace('.txt', '')
+
+        txt_path = txt_folder / txt_file
+        try:
+            with open(txt_path, 'r', encoding='utf-8') as f:
+                text_content = f.read()
+
+            processed_text = " ".join(text_content.split()).lower()
+
+            if processed_text:
+                documents.append(processed_text)
+                labels.append(label)
+                document_ids.append(doc_id)
+
+        except Exception as e:
+            print(f"Error reading {txt_file}: {e}")
+            continue
+
+    _print_distribution(labels, len(documents))
     return documents, labels, document_ids
+
+
+def create_dataset_ids(label_mapping, txt_folder, min_frequency=5, max_per_label=200, random_state=42,
+                       chunk_chars=1024 * 1024):
+    """
+    (labels, doc_ids) of create_dataset() with the same arguments, without keeping any text:
+    each selected file is decoded chunk by chunk only to check it is readable and not blank.
+    """
+    if not txt_folder.exists():
+        print(f"{Bcolors.FAIL}Folder not found: {txt_folder}{Bcolors.ENDC}")
+        return [], []
+
+    labels = []
+    document_ids = []
+
+    for txt_file, label in _select_files(label_mapping, txt_folder, min_frequency, max_per_label, random_state):
+        try:
+            has_text = False
+            with open(txt_folder / txt_file, 'r', encoding='utf-8') as f:
+                # decode to the end: create_dataset skips a file that fails anywhere
+                for chunk in iter(lambda: f.read(chunk_chars), ''):
+                    has_text = has_text or not chunk.isspace()
+        except Exception as e:
+            print(f"Error reading {txt_file}: {e}")
+            continue
+        if has_text:
+            labels.append(label)
+            document_ids.append(txt_file.replace('.txt', ''))
+
+    _print_distribution(labels, len(document_ids))
+    return labels, document_ids
+
+
+def read_document(txt_folder, doc_id, max_chars=None):
+    """
+    Read one txt file with the same normalization as create_dataset ("" if missing/unreadable).
+    max_chars truncates it while reading, so a huge file never has to be loaded whole.
+    """
+    try:
+        with open(txt_folder / f"{doc_id}.txt", 'r', encoding='utf-8') as f:
+            text = f.read(max_chars) if max_chars else f.read()
+        return " ".join(text.split()).lower()
+    except (OSError, UnicodeDecodeError):
+        return ""
+
+
+def _scan_labeled_files(label_mapping, txt_folder):
+    """(doc_id, label) of every txt file in txt_folder that has a label, sorted by id. Reads no file."""
+    items = []
+    with os.scandir(txt_folder) as entries:
+        for entry in entries:
+            if entry.name.endswith('.txt'):
+                doc_id = entry.name[:-len('.txt')]
+                if doc_id in label_mapping:
+                    items.append((doc_id, label_mapping[doc_id]))
+    items.sort()
+    return items
+
+
+def load_labeled_files(csv_path, txt_folder, id_column='id', label_column='subject'):
+    """
+    Generic: join the label CSV with the txt folder listing -> [(doc_id, label)], sorted by id.
+
+    The join is cached next to the CSV (.<csv>_<column>_<folder>.labels.json) and reused until
+    the CSV or the folder listing changes, so later runs skip both the CSV parse and the directory scan.
+    """
+    csv_path, txt_folder = Path(csv_path), Path(txt_folder)
+    if not txt_folder.exists():
+        print(f"{Bcolors.FAIL}Folder not found: {txt_folder}{Bcolors.ENDC}")
+        return []
+
+    csv_stat, folder_stat = csv_path.stat(), txt_folder.stat()
+    key = [csv_stat.st_mtime_ns, csv_stat.st_size, folder_stat.st_mtime_ns, id_column, label_column]
+    # not inside txt_folder: writing there would change the folder mtime the key depends on
+    cache_path = csv_path.with_name(f".{csv_path.stem}_{label_column}_{txt_folder.name}.labels.json")
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached['key'] == key:
+            print(f"{Bcolors.OKGREEN}Labeled files (cached): {len(cached['items'])} documents{Bcolors.ENDC}")
+            return [tuple(item) for item in cached['items']]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    label_mapping = load_csv_labels(csv_path, id_column=id_column, label_column=label_column)
+    items = [(doc_id, label.item() if hasattr(label, 'item') else label)
+             for doc_id, label in _scan_labeled_files(label_mapping, txt_folder)]
+    try:
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump({'key': key, 'items': items}, f, ensure_ascii=False)
+    except OSError as e:
+        print(f"{Bcolors.WARNING}Could not cache the label join: {e}{Bcolors.ENDC}")
+    print(f"{Bcolors.OKGREEN}Labeled files: {len(items)} documents{Bcolors.ENDC}")
+    return items
+
+
+def _rank(doc_id, salt):
+    """Deterministic pseudo-random rank of a document (same on every run, machine and listing order)."""
+    return hashlib.blake2b(f"{salt}:{doc_id}".encode('utf-8'), digest_size=8).digest()
+
+
+class StreamingTextDataset:
+    """
+    Labeled txt documents read lazily, for training on more documents than fit in memory.
+
+    Only the (doc_id, label) pairs are kept; the text is read (and optionally truncated to
+    max_chars) while iterating, one batch at a time. Sampling and the train/test split are
+    computed from the ids alone, so they don't depend on file contents or listing order.
+    Strategies with supports_incremental = True take it in train_incremental().
+    """
+
+    def __init__(self, items, txt_folder, max_chars=None, seed=42):
+        self.items = list(items)
+        self.txt_folder = Path(txt_folder)
+        self.max_chars = max_chars
+        self.seed = seed
+
+    @classmethod
+    def from_csv(cls, csv_path, txt_folder, id_column='id', label_column='subject', min_frequency=5,
+                 max_per_label=None, exclude_ids=(), max_chars=None, seed=42):
+        """
+        Same selection rules as create_dataset (labels with >= min_frequency files, at most
+        max_per_label each, None = all) without reading any file. exclude_ids are left out.
+        """
+        exclude_ids = set(exclude_ids)
+        items = [item for item in load_labeled_files(csv_path, txt_folder, id_column, label_column)
+                 if item[0] not in exclude_ids]
+
+        by_label = {}
+        for doc_id, label in items:
+            by_label.setdefault(label, []).append(doc_id)
+        selected = []
+        for label, doc_ids in by_label.items():
+            if len(doc_ids) < min_frequency:
+                continue
+            if max_per_label is not None and len(doc_ids) > max_per_label:
+                doc_ids = sorted(sorted(doc_ids, key=lambda d: _rank(d, f"{seed}:sample"))[:max_per_label])
+            selected.extend((doc_id, label) for doc_id in doc_ids)
+        selected.sort()
+
+        dataset = cls(selected, txt_folder, max_chars=max_chars, seed=seed)
+        print(f"{Bcolors.OKGREEN}Streaming dataset: {len(dataset)} documents, {len(dataset.label_counts())} labels{Bcolors.ENDC}")
+        return dataset
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def labels(self):
+        return [label for _, label in self.items]
+
+    def label_counts(self):
+        return Counter(self.labels)
+
+    def split(self, test_size=0.2):
+        """Stratified (train, test) datasets: per label, the test_size share of ids with the lowest rank."""
+        by_label = {}
+        for doc_id, label in self.items:
+            by_label.setdefault(label, []).append(doc_id)
+        test_ids = set()
+        for doc_ids in by_label.values():
+            ranked = sorted(doc_ids, key=lambda d: _rank(d, f"{self.seed}:split"))
+            test_ids.update(ranked[:int(round(len(ranked) * test_size))])
+        train = [item for item in self.items if item[0] not in test_ids]
+        test = [item for item in self.items if item[0] in test_ids]
+        return (StreamingTextDataset(train, self.txt_folder, self.max_chars, self.seed),
+                StreamingTextDataset(test, self.txt_folder, self.max_chars, self.seed))
+
+    def __iter__(self):
+        """(text, label, doc_id) per readable, non-empty document."""
+        for doc_id, label in self.items:
+            text = read_document(self.txt_folder, doc_id, self.max_chars)
+            if text:
+                yield text, label, doc_id
+
+    def batches(self, batch_size=1000, shuffle=False, epoch=0):
+        """Yield (documents, labels, doc_ids) lists of at most batch_size; shuffle is seeded by seed + epoch."""
+        items = self.items
+        if shuffle:
+            order = random.Random(self.seed + epoch).sample(range(len(items)), len(items))
+            items = [items[i] for i in order]
+        documents, labels, document_ids = [], [], []
+        for doc_id, label in items:
+            text = read_document(self.txt_folder, doc_id, self.max_chars)
+            if not text:
+                continue
+            documents.append(text)
+            labels.append(label)
+            document_ids.append(doc_id)
+            if len(documents) == batch_size:
+                yield documents, labels, document_ids
+                documents, labels, document_ids = [], [], []
+        if documents:
+            yield documents, labels, document_ids
+
+    def to_lists(self):
+        """(documents, labels, doc_ids) in memory, like create_dataset, for strategies that can't stream."""
+        documents, labels, document_ids = [], [], []
+        for text, label, doc_id in self:
+            documents.append(text)
+            labels.append(label)
+            document_ids.append(doc_id)
+        return documents, labels, document_ids
@@ -0,0 +1,180 @@
+"""
+Content-hashed embedding cache shared by the sentence-transformer strategies.
+
+Every strategy based on embeddings (embeddings, embeddings_knn, neural, minilm) used to
+load its own SentenceTransformer and encode the whole document set, in train() and
+again in predict() when ModelComparator tests it. EmbeddingStore encodes each text
+once per (model name, truncation) and keeps the vectors on disk:
+
+    <folder>/<model>-<key>/index.json         {text hash: [shard, row]}
+    <folder>/<model>-<key>/shard-<id>.npy     float32 rows, memory-mapped on read
+
+Only texts missing from the index are encoded (the SentenceTransformer is loaded on
+the first miss), and they are appended as a new shard. Vectors are stored as the
+model returns them; normalize=True L2-normalizes on read, like normalize_embeddings.
+
+Several processes may share a folder (parallel_runner trains strategies concurrently):
+shard names are unique and the index is re-read and merged under a file lock before
+it is rewritten, so no process drops the rows another one added.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import re
+import uuid
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import numpy as np
+
+from utils.colors.colors_terminal import Bcolors
+
+INDEX_FILENAME = "index.json"
+HASH_CHARS = 32
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:HASH_CHARS]
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """Exclusive lock shared between processes: flock on POSIX, msvcrt.locking of the first byte on Windows."""
+    with open(path, "a+") as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        else:
+            lock.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10s of contention
+                    pass
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+            else:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class EmbeddingStore:
+
+    def __init__(self, folder=None):
+        if folder is None:
+            from constants import EMBEDDING_CACHE_FOLDER
+            folder = EMBEDDING_CACHE_FOLDER
+        self.folder = Path(folder)
+        self._models = {}
+        self._indexes = {}
+        self._shards = {}
+
+    def _key_folder(self, model_name, max_seq_length):
+        key = json.dumps({"model": model_name, "max_seq_length": max_seq_length}, sort_keys=True)
+        safe_name = re.sub(r"[^\w.-]", "_", model_name)
+        return self.folder / f"{safe_name}-{hashlib.sha256(key.encode('utf-8')).hexdigest()[:12]}"
+
+    def get_model(self, model_name, max_seq_length=None):
+        """The SentenceTransformer, loaded once per process and only when something has to be encoded."""
+        key = (model_name, max_seq_length)
+        if key not in self._models:
+            from sentence_transformers import SentenceTransformer
+            print(f"{Bcolors.OKBLUE}Loading sentence transformer: {model_name}...{Bcolors.ENDC}")
+            model = SentenceTransformer(model_name)
+            if max_seq_length is not None:
+                model.max_seq_length = max_seq_length
+            self._models[key] = model
+        return self._models[key]
+
+    def _index(self, key_folder, reload=False):
+        if reload or key_folder not in self._indexes:
+            index = {"shards": [], "rows": {}}
+            if (key_folder / INDEX_FILENAME).exists():
+                with open(key_folder / INDEX_FILENAME, "r", encoding="utf-8") as f:
+                    index = json.load(f)
+            if key_folder in self._indexes:
+                self._indexes[key_folder].update(index)
+            else:
+                self._indexes[key_folder] = index
+        return self._indexes[key_folder]
+
+    def _shard(self, key_folder, shard):
+        path = key_folder / self._index(key_folder)["shards"][shard]
+        if path not in self._shards:
+            self._shards[path] = np.load(path, mmap_mode="r")
+        return self._shards[path]
+
+    def _append(self, key_folder, hashes, embeddings):
+        key_folder.mkdir(parents=True, exist_ok=True)
+        name = f"shard-{uuid.uuid4().hex[:12]}.npy"
+        tmp_path = key_folder / f"{name}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.asarray(embeddings, dtype=np.float32))
+        os.replace(tmp_path, key_folder / name)
+        with file_lock(key_folder / f"{INDEX_FILENAME}.lock"):
+            index = self._index(key_folder, reload=True)
+            index["shards"].append(name)
+            shard = len(index["shards"]) - 1
+            for row, h in enumerate(hashes):
+                index["rows"][h] = [shard, row]
+            tmp_index = key_folder / f"{INDEX_FILENAME}.{os.getpid()}.tmp"
+            with open(tmp_index, "w", encoding="utf-8") as f:
+                json.dump(index, f)
+            os.replace(tmp_index, key_folder / INDEX_FILENAME)
+
+    def encode(self, texts, model_name, batch_size=32, normalize=False, max_seq_length=None, show_progress_bar=False):
+        """Embeddings for texts (np.ndarray, one row per text), encoding only the ones not cached yet."""
+        if len(texts) == 0:
+            return np.empty((0, 0), dtype=np.float32)
+        key_folder = self._key_folder(model_name, max_seq_length)
+        hashes = [text_hash(text) for text in texts]
+        rows = self._index(key_folder)["rows"]
+
+        missing = {}
+        for text, h in zip(texts, hashes):
+            if h not in rows and h not in missing:
+                missing[h] = text
+        print(f"{Bcolors.OKBLUE}Embeddings ({model_name}): {len(set(hashes)) - len(missing)} cached, "
+              f"{len(missing)} to encode{Bcolors.ENDC}")
+        if missing:
+            model = self.get_model(model_name, max_seq_length)
+            embeddings = model.encode(list(missing.values()), batch_size=batch_size, show_progress_bar=show_progress_bar)
+            self._append(key_folder, list(missing.keys()), embeddings)
+            rows = self._index(key_folder)["rows"]
+
+        result = None
+        by_shard = {}
+        for position, h in enumerate(hashes):
+            shard, row = rows[h]
+            by_shard.setdefault(shard, ([], []))
+            by_shard[shard][0].append(position)
+            by_shard[shard][1].append(row)
+        for shard, (positions, shard_rows) in by_shard.items():
+            vectors = self._shard(key_folder, shard)[shard_rows]
+            if result is None:
+                result = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            result[positions] = vectors
+        if normalize:
+            norms = np.linalg.norm(result, axis=1, keepdims=True)
+            result /= np.where(norms == 0, 1, norms)
+        return result
+
+
+_store = None
+
+
+def get_embedding_store():
+    """Process-wide store, so every strategy shares the loaded models and the open shards."""
+    global _store
+    if _store is None:
+        _store = EmbeddingStore()
+    return _store
@@ -0,0 +1,82 @@
+"""
+TF-IDF features without a vocabulary: HashingVectorizer counts + a stored IDF vector.
+
+TfidfVectorizer has to see the whole corpus to build its vocabulary, keeps it as a
+dict of strings (pickled, loaded and looked up on every prediction) and cuts it to
+max_features. HashedTfidf maps every n-gram to one of n_features columns with a
+hash instead, so:
+
+- partial_fit() only updates a document-frequency array, one batch at a time, and
+  the corpus never has to be in memory (see HashingTrainingStrategy.train_incremental);
+- the saved state is the (stateless) HashingVectorizer and idf.npy, loaded in milliseconds;
+- transform() gives the same weighting as TfidfVectorizer(sublinear_tf=True, smooth_idf=True,
+  norm='l2') up to hash collisions (n_features = 2**19 keeps them rare for ~10^5 n-grams).
+"""
+from pathlib import Path
+
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+
+class HashedTfidf:
+    """Hashed term counts weighted by an IDF vector fitted in batches."""
+
+    def __init__(self, n_features=2 ** 19, ngram_range=(1, 2), stop_words=None, sublinear_tf=True):
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features,
+            ngram_range=ngram_range,
+            stop_words=stop_words,
+            alternate_sign=False,
+            norm=None,
+        )
+        self.sublinear_tf = sublinear_tf
+        self.document_frequency = np.zeros(n_features, dtype=np.int64)
+        self.n_documents = 0
+        self.idf_ = None
+
+    def partial_fit(self, documents):
+        """Count the documents each column appears in (call once per batch, then finalize())."""
+        X = self.vectorizer.transform(documents)
+        X.sum_duplicates()
+        self.document_frequency += np.bincount(X.indices, minlength=len(self.document_frequency))
+        self.n_documents += X.shape[0]
+        return self
+
+    def finalize(self):
+        """Turn the counts into IDF weights (smooth_idf, as TfidfVectorizer)."""
+        self.idf_ = np.log((1 + self.n_documents) / (1 + self.document_frequency)) + 1
+        return self
+
+    def fit(self, documents):
+        return self.partial_fit(documents).finalize()
+
+    def transform(self, documents):
+        X = self.vectorizer.transform(documents)
+        X.sum_duplicates()
+        if self.sublinear_tf:
+            np.log(X.data, X.data)
+            X.data += 1
+        X.data *= self.idf_[X.indices]
+        return normalize(X, norm='l2', copy=False)
+
+    def fit_transform(self, documents):
+        return self.fit(documents).transform(documents)
+
+    def save(self, vectorizer_path, idf_path):
+        joblib.dump({'vectorizer': self.vectorizer, 'sublinear_tf': self.sublinear_tf,
+                     'n_documents': self.n_documents}, vectorizer_path)
+        np.save(idf_path, self.idf_)
+
+    @classmethod
+    def load(cls, vectorizer_path, idf_path):
+        state = joblib.load(vectorizer_path)
+        features = cls.__new__(cls)
+        features.vectorizer = state['vectorizer']
+        features.sublinear_tf = state['sublinear_tf']
+        features.n_documents = state['n_documents']
+        features.document_frequency = None
+        # memory-mapped: the API/comparison only reads the weights of each document's columns
+        features.idf_ = np.load(Path(idf_path), mmap_mode='r')
+        return features
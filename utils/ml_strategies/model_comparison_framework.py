@@ -5,6 +5,7 @@ Parameterized to work across different classification tasks.
 """
 import numpy as np
 import matplotlib.pyplot as plt
+import os
 import time
 from pathlib import Path
 
@@ -23,7 +24,7 @@ class ModelResults:
     """Container for model results"""
 
     def __init__(self, model_name, accuracy, precision, recall, f1, predictions, confusion_matrix,
-                 total_test_time, avg_prediction_time, load_time):
+                 total_test_time, avg_prediction_time, load_time, model_size_mb=None, load_memory_mb=None):
         self.model_name = model_name
         self.accuracy = accuracy
         self.precision = precision
@@ -34,6 +35,113 @@ class ModelResults:
         self.total_test_time = total_test_time
         self.avg_prediction_time = avg_prediction_time
         self.load_time = load_time
+        self.model_size_mb = model_size_mb
+        self.load_memory_mb = load_memory_mb
+
+
+def _files_size_mb(paths):
+    """Size on disk of the model files (folders are summed recursively)."""
+    total = 0
+    for path in map(Path, paths):
+        if path.is_dir():
+            total += sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
+        elif path.exists():
+            total += path.stat().st_size
+    return total / 1e6
+
+
+def _rss_mb():
+    """Resident memory of this process in MB (Linux only, None elsewhere)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def split_test_data(documents, labels):
+    """The held-out split every strategy uses in train() (test_size=0.2, random_state=42, stratified)."""
+    X_train, X_test, y_train, y_test = train_test_split(
+        documents, labels, test_size=0.2, random_state=42, stratify=labels
+    )
+    return X_train, X_test, y_train, y_test
+
+
+def _format_mb(value):
+    return f"{value:.1f}MB" if value is not None else "n/a"
+
+
+def evaluate_strategy(strategy, X_test, y_test):
+    """Load a trained strategy and measure it on the test split. Returns ModelResults, or None if it can't be tested."""
+    print(f"\n{Bcolors.OKBLUE}Testing {strategy.get_model_name()}...{Bcolors.ENDC}")
+
+    missing_files = []
+    for file_path in strategy.get_model_files():
+        p = Path(file_path)
+        if not p.exists():
+            missing_files.append(str(p))
+
+    if missing_files:
+        print(f"{Bcolors.WARNING}Missing files for {strategy.get_model_name()}: {missing_files}{Bcolors.ENDC}")
+        return None
+
+    # the RSS growth is only meaningful in a fresh process (parallel runner) or for the first model
+    rss_before = _rss_mb()
+    load_start = time.time()
+    if not strategy.load_model():
+        print(f"{Bcolors.FAIL}Failed to load {strategy.get_model_name()}{Bcolors.ENDC}")
+        return None
+    load_time = time.time() - load_start
+    rss_after = _rss_mb()
+    load_memory_mb = max(rss_after - rss_before, 0) if rss_before is not None and rss_after is not None else None
+    model_size_mb = _files_size_mb(strategy.get_model_files())
+
+    try:
+        prediction_start = time.time()
+        predictions = strategy.predict(X_test)
+        total_test_time = time.time() - prediction_start
+
+        avg_prediction_time = total_test_time / len(X_test)
+
+        acc = accuracy_score(y_test, predictions)
+
+        report = classification_report(
+            y_test,
+            predictions,
+            output_dict=True,
+            zero_division=0
+        )
+
+        macro_precision = report['macro avg']['precision']
+        macro_recall = report['macro avg']['recall']
+        macro_f1 = report['macro avg']['f1-score']
+
+        cm = confusion_matrix(y_test, predictions)
+
+        result = ModelResults(
+            model_name=strategy.get_model_name(),
+            accuracy=acc,
+            precision=macro_precision,
+            recall=macro_recall,
+            f1=macro_f1,
+            predictions=predictions,
+            confusion_matrix=cm,
+            total_test_time=total_test_time,
+            avg_prediction_time=avg_prediction_time,
+            load_time=load_time,
+            model_size_mb=model_size_mb,
+            load_memory_mb=load_memory_mb
+        )
+
+        print(f"{Bcolors.OKGREEN}{strategy.get_model_name()} - Accuracy: {acc:.4f}, F1: {macro_f1:.4f}{Bcolors.ENDC}")
+        print(f"  Load time: {load_time:.3f}s, Total test time: {total_test_time:.3f}s, Avg per sample: {avg_prediction_time*1000:.2f}ms")
+        print(f"  Model size: {model_size_mb:.1f}MB, Memory after load: {_format_mb(load_memory_mb)}")
+
+        return result
+
+    except Exception as e:
+        print(f"{Bcolors.FAIL}Error testing {strategy.get_model_name()}: {e}{Bcolors.ENDC}")
+        return None
 
 
 class ModelComparator:
@@ -67,9 +175,7 @@ class ModelComparator:
             print(f"{Bcolors.FAIL}No documents found!{Bcolors.ENDC}")
             return False
 
-        X_train, X_test, y_train, y_test = train_test_split(
-            documents, labels, test_size=0.2, random_state=42, stratify=labels
-        )
+        X_train, X_test, y_train, y_test = split_test_data(documents, labels)
 
         self.test_data = {
             'X_test': X_test,
@@ -86,86 +192,40 @@ class ModelComparator:
 
     def test_model(self, model_key):
         """Test a specific model with timing"""
-        strategy = self.strategies[model_key]
-
-        print(f"\n{Bcolors.OKBLUE}Testing {strategy.get_model_name()}...{Bcolors.ENDC}")
-
-        missing_files = []
-        for file_path in strategy.get_model_files():
-            p = Path(file_path)
-            if not p.exists():
-                missing_files.append(str(p))
-
-        if missing_files:
-            print(f"{Bcolors.WARNING}Missing files for {strategy.get_model_name()}: {missing_files}{Bcolors.ENDC}")
-            return None
-
-        load_start = time.time()
-        if not strategy.load_model():
-            print(f"{Bcolors.FAIL}Failed to load {strategy.get_model_name()}{Bcolors.ENDC}")
-            return None
-        load_time = time.time() - load_start
-
-        try:
-            prediction_start = time.time()
-            predictions = strategy.predict(self.test_data['X_test'])
-            total_test_time = time.time() - prediction_start
-
-            avg_prediction_time = total_test_time / len(self.test_data['X_test'])
-
-            acc = accuracy_score(self.test_data['y_test'], predictions)
+        return evaluate_strategy(self.strategies[model_key], self.test_data['X_test'], self.test_data['y_test'])
 
-            report = classification_report(
-                self.test_data['y_test'],
-                predictions,
-                output_dict=True,
-                zero_division=0
-            )
-
-            macro_precision = report['macro avg']['precision']
-            macro_recall = report['macro avg']['recall']
-            macro_f1 = report['macro avg']['f1-score']
-
-            cm = confusion_matrix(self.test_data['y_test'], predictions)
-
-            result = ModelResults(
-                model_name=strategy.get_model_name(),
-                accuracy=acc,
-                precision=macro_precision,
-                recall=macro_recall,
-                f1=macro_f1,
-                predictions=predictions,
-                confusion_matrix=cm,
-                total_test_time=total_test_time,
-                avg_prediction_time=avg_prediction_time,
-                load_time=load_time
-            )
-
-            print(f"{Bcolors.OKGREEN}{strategy.get_model_name()} - Accuracy: {acc:.4f}, F1: {macro_f1:.4f}{Bcolors.ENDC}")
-            print(f"  Load time: {load_time:.3f}s, Total test time: {total_test_time:.3f}s, Avg per sample: {avg_prediction_time*1000:.2f}ms")
-
-            return result
-
-        except Exception as e:
-            print(f"{Bcolors.FAIL}Error testing {strategy.get_model_name()}: {e}{Bcolors.ENDC}")
-            return None
-
-    def run_comparison(self, models_to_test):
-        """Run comparison for specified models"""
+    def run_comparison(self, models_to_test, workers=1):
+        """Run comparison for specified models (workers != 1 tests them in parallel processes, None = one per model)"""
         print(f"{Bcolors.HEADER}=== Model Comparison Framework ==={Bcolors.ENDC}")
 
         if not self.load_test_data():
             return
 
-        self.results = {}
-        for model_key in models_to_test:
-            if model_key in self.strategies:
+        unknown = [model_key for model_key in models_to_test if model_key not in self.strategies]
+        for model_key in unknown:
+            print(f"{Bcolors.WARNING}Unknown model: {model_key}{Bcolors.ENDC}")
+        models_to_test = [model_key for model_key in models_to_test if model_key in self.strategies]
+
+        results = {}
+        if workers != 1:
+            from utils.ml_strategies.parallel_runner import run_strategies
+            outcomes = run_strategies(
+                {model_key: self.strategies[model_key] for model_key in models_to_test},
+                self.results_folder, workers=workers,
+                test_data=(self.test_data['X_test'], self.test_data['y_test'])
+            )
+            results = {model_key: outcome['evaluation'] for model_key, outcome in outcomes.items() if outcome.get('evaluation')}
+        else:
+            for model_key in models_to_test:
                 result = self.test_model(model_key)
                 if result:
-                    self.results[model_key] = result
-            else:
-                print(f"{Bcolors.WARNING}Unknown model: {model_key}{Bcolors.ENDC}")
+                    results[model_key] = result
+
+        self.report(results)
 
+    def report(self, results):
+        """Charts, confusion matrices and comparison table for already computed {model_key: ModelResults}"""
+        self.results = results
         if not self.results:
             print(f"{Bcolors.FAIL}No models could be tested!{Bcolors.ENDC}")
             return
@@ -351,6 +411,9 @@ class ModelComparator:
             f.write(f"Load Time:         {result.load_time:.3f} seconds\n")
             f.write(f"Total Test Time:   {result.total_test_time:.3f} seconds\n")
             f.write(f"Avg Pred Time:     {result.avg_prediction_time*1000:.2f} milliseconds/sample\n\n")
+            f.write("Memory Footprint:\n")
+            f.write(f"Model Files:       {_format_mb(result.model_size_mb)}\n")
+            f.write(f"Load Memory (RSS): {_format_mb(result.load_memory_mb)}\n\n")
             f.write(f"Test Samples:      {len(result.predictions)}\n")
 
         print(f"  - Performance summary saved in '{model_folder}'")
@@ -490,15 +553,17 @@ class ModelComparator:
         """Print comprehensive comparison table with timing"""
         print(f"\n{Bcolors.HEADER}=== Model Comparison Table ==={Bcolors.ENDC}")
 
-        print(f"{'Model':<20} {'Accuracy':<10} {'Precision':<10} {'Recall':<10} {'F1-Score':<10} {'Load(s)':<8} {'Pred(ms)':<10}")
-        print("-" * 88)
+        print(f"{'Model':<20} {'Accuracy':<10} {'Precision':<10} {'Recall':<10} {'F1-Score':<10} {'Load(s)':<8} {'Pred(ms)':<10} {'Size(MB)':<10} {'Mem(MB)':<8}")
+        print("-" * 108)
 
         sorted_results = sorted(self.results.items(),
                               key=lambda x: x[1].f1, reverse=True)
 
         for model_key, result in sorted_results:
             pred_time_ms = result.avg_prediction_time * 1000
-            print(f"{result.model_name:<20} {result.accuracy:<10.4f} {result.precision:<10.4f} {result.recall:<10.4f} {result.f1:<10.4f} {result.load_time:<8.2f} {pred_time_ms:<10.1f}")
+            size = f"{result.model_size_mb:.1f}" if result.model_size_mb is not None else "n/a"
+            memory = f"{result.load_memory_mb:.1f}" if result.load_memory_mb is not None else "n/a"
+            print(f"{result.model_name:<20} {result.accuracy:<10.4f} {result.precision:<10.4f} {result.recall:<10.4f} {result.f1:<10.4f} {result.load_time:<8.2f} {pred_time_ms:<10.1f} {size:<10} {memory:<8}")
 
         print(f"\n{Bcolors.HEADER}=== Production Performance Analysis ==={Bcolors.ENDC}")
 
@@ -509,3 +574,8 @@ class ModelComparator:
         print(f"{Bcolors.OKGREEN}Fastest to load: {fastest_load.model_name} ({fastest_load.load_time:.2f}s){Bcolors.ENDC}")
         print(f"{Bcolors.OKGREEN}Fastest prediction: {fastest_pred.model_name} ({fastest_pred.avg_prediction_time*1000:.1f}ms per sample){Bcolors.ENDC}")
         print(f"{Bcolors.OKGREEN}Best accuracy: {best_accuracy.model_name} (F1: {best_accuracy.f1:.4f}){Bcolors.ENDC}")
+
+        sized = [r for r in self.results.values() if r.model_size_mb is not None]
+        if sized:
+            smallest = min(sized, key=lambda x: x.model_size_mb)
+            print(f"{Bcolors.OKGREEN}Smallest model: {smallest.model_name} ({smallest.model_size_mb:.1f}MB on disk){Bcolors.ENDC}")
@@ -0,0 +1,226 @@
+"""
+Train and evaluate independent strategies concurrently.
+
+Each strategy runs in its own process of a spawn-based pool. The CPUs the process may
+use (its affinity mask, not every core of the machine) are split between the workers:
+every worker is pinned to its own slice and every strategy gets n_jobs = slice size,
+with BLAS/OpenMP and torch limited to the same number of threads, so SVM, XGBoost,
+RandomForest and the torch/embedding strategies don't oversubscribe each other.
+
+Strategies that share an embedding model wait until that model has encoded the
+documents once (into the EmbeddingStore); the TF-IDF strategies start right away.
+
+Every strategy writes into <results_folder>/<key>/ (train.log with its output,
+result.json with its metrics) and the merged ranking goes to
+<results_folder>/ranking.json.
+"""
+import contextlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+from utils.colors.colors_terminal import Bcolors
+
+RANKING_FILENAME = "ranking.json"
+
+_worker_cpus = None
+
+
+def available_cpus():
+    """CPUs this process is allowed to run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def cpu_slices(workers, cpus=None):
+    """Split the available CPUs into one contiguous slice per worker (the first ones get the remainder)."""
+    cpus = cpus if cpus is not None else available_cpus()
+    workers = max(1, min(workers, len(cpus)))
+    size, extra = divmod(len(cpus), workers)
+    slices, start = [], 0
+    for i in range(workers):
+        end = start + size + (1 if i < extra else 0)
+        slices.append(cpus[start:end])
+        start = end
+    return slices
+
+
+def _init_worker(slots):
+    global _worker_cpus
+    _worker_cpus = slots.get()
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, _worker_cpus)
+
+
+def _limit_threads(threads):
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(threads)
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+
+
+def _embedding_model(strategy):
+    """Sentence-transformer model the strategy encodes with, None for TF-IDF strategies."""
+    from utils.ml_strategies.strategies import (
+        EmbeddingsTrainingStrategy, EmbeddingsKNNTrainingStrategy, NeuralTorchTrainingStrategy, MiniLMTrainingStrategy
+    )
+    embedding_strategies = (EmbeddingsTrainingStrategy, EmbeddingsKNNTrainingStrategy, NeuralTorchTrainingStrategy,
+                            MiniLMTrainingStrategy)
+    if isinstance(strategy, embedding_strategies):
+        return strategy.get_default_params()['model_name']
+    return None
+
+
+def _warm_embeddings(model_name, documents, log_filename):
+    from utils.ml_strategies.embedding_store import get_embedding_store
+    _limit_threads(len(_worker_cpus))
+    start = time.time()
+    with open(log_filename, "w", encoding="utf-8") as log, contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        get_embedding_store().encode(documents, model_name)
+    return time.time() - start
+
+
+def _run_strategy(key, strategy, documents, labels, test_data, result_folder):
+    """Train (if documents is given) and/or evaluate (if test_data is given) one strategy, output to result_folder."""
+    threads = len(_worker_cpus)
+    strategy.n_jobs = threads
+    _limit_threads(threads)
+
+    result_folder = Path(result_folder)
+    result_folder.mkdir(parents=True, exist_ok=True)
+    outcome = {"key": key, "model_name": strategy.get_model_name(), "cpus": threads}
+    with open(result_folder / "train.log", "w", encoding="utf-8") as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            if documents is not None:
+                start = time.time()
+                outcome["accuracy"] = strategy.train(documents, labels)
+                outcome["train_time"] = time.time() - start
+                outcome["files"] = strategy.get_model_files()
+            if test_data is not None:
+                # the comparison framework pulls in matplotlib, which training alone does not need
+                from utils.ml_strategies.model_comparison_framework import evaluate_strategy
+                outcome["evaluation"] = evaluate_strategy(strategy, *test_data)
+                if outcome["evaluation"] is None:
+                    outcome["error"] = "could not be tested, see train.log"
+        except Exception as e:
+            outcome["error"] = f"{type(e).__name__}: {e}"
+
+    with open(result_folder / "result.json", "w", encoding="utf-8") as f:
+        json.dump(_summary(outcome), f, indent=4)
+    return outcome
+
+
+def _summary(outcome):
+    """JSON-serializable view of an outcome (ModelResults reduced to its metrics)."""
+    summary = {k: v for k, v in outcome.items() if k != "evaluation"}
+    evaluation = outcome.get("evaluation")
+    if evaluation is not None:
+        summary.update({
+            "test_accuracy": evaluation.accuracy,
+            "precision": evaluation.precision,
+            "recall": evaluation.recall,
+            "f1": evaluation.f1,
+            "load_time": evaluation.load_time,
+            "avg_prediction_ms": evaluation.avg_prediction_time * 1000,
+            "model_size_mb": evaluation.model_size_mb,
+            "load_memory_mb": evaluation.load_memory_mb,
+        })
+    return summary
+
+
+def write_ranking(outcomes, results_folder):
+    """Merge the per-strategy results, best first (test F1 when evaluated, training accuracy otherwise)."""
+    summaries = [_summary(outcome) for outcome in outcomes.values()]
+    ok = [s for s in summaries if "error" not in s and (s.get("f1") is not None or s.get("accuracy") is not None)]
+    ok.sort(key=lambda s: (s.get("f1") if s.get("f1") is not None else -1, s.get("accuracy") or 0), reverse=True)
+    ranking = {
+        "ranking": ok,
+        "failed": [s for s in summaries if s not in ok],
+    }
+    ranking_filename = Path(results_folder) / RANKING_FILENAME
+    ranking_filename.parent.mkdir(parents=True, exist_ok=True)
+    with open(ranking_filename, "w", encoding="utf-8") as f:
+        json.dump(ranking, f, indent=4)
+
+    print(f"\n{Bcolors.HEADER}RANKING:{Bcolors.ENDC}")
+    for i, s in enumerate(ok, 1):
+        f1 = f", F1 {s['f1']:.4f}" if s.get("f1") is not None else ""
+        accuracy = f"accuracy {s['accuracy']:.4f}" if s.get("accuracy") is not None else f"test accuracy {s['test_accuracy']:.4f}"
+        train_time = f", {s['train_time']:.1f}s" if s.get("train_time") is not None else ""
+        print(f"{i}. {s['model_name']}: {accuracy}{f1}{train_time}")
+    for s in ranking["failed"]:
+        print(f"{Bcolors.FAIL}{s['model_name']}: FAILED {s.get('error', '')}{Bcolors.ENDC}")
+    print(f"{Bcolors.OKGREEN}Ranking saved to {ranking_filename}{Bcolors.ENDC}")
+    return ranking
+
+
+def run_strategies(strategies, results_folder, workers=None, documents=None, labels=None, test_data=None):
+    """
+    Run {key: strategy} in parallel: train on documents/labels when given, evaluate on
+    test_data (X_test, y_test) when given. Returns {key: outcome} and writes the ranking.
+    """
+    results_folder = Path(results_folder)
+    slices = cpu_slices(workers or len(strategies))
+    print(f"{Bcolors.OKBLUE}Running {len(strategies)} strategies on {len(slices)} workers "
+          f"({', '.join(str(len(cpus)) for cpus in slices)} CPUs){Bcolors.ENDC}")
+
+    context = multiprocessing.get_context("spawn")
+    slots = context.Queue()
+    for cpus in slices:
+        slots.put(cpus)
+
+    # strategies that encode with the same sentence transformer wait until it has encoded the documents once
+    waiting = {}
+    for key, strategy in strategies.items():
+        model_name = _embedding_model(strategy) if documents is not None else None
+        waiting.setdefault(model_name, []).append(key)
+
+    outcomes = {}
+    start = time.time()
+    with ProcessPoolExecutor(max_workers=len(slices), mp_context=context, initializer=_init_worker,
+                             initargs=(slots,)) as pool:
+        futures = {}
+
+        def submit(key):
+            futures[pool.submit(_run_strategy, key, strategies[key], documents, labels, test_data,
+                                results_folder / key)] = ("strategy", key)
+
+        for key in waiting.pop(None, []):
+            submit(key)
+        for model_name in waiting:
+            log_filename = results_folder / f"embeddings_{model_name.replace('/', '_')}.log"
+            results_folder.mkdir(parents=True, exist_ok=True)
+            futures[pool.submit(_warm_embeddings, model_name, documents, log_filename)] = ("embeddings", model_name)
+
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, name = futures.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = e
+                if kind == "embeddings":
+                    if isinstance(result, Exception):
+                        print(f"{Bcolors.WARNING}Encoding with {name} failed ({result}), its strategies will retry{Bcolors.ENDC}")
+                    else:
+                        print(f"{Bcolors.OKGREEN}Encoded the documents with {name} in {result:.1f}s{Bcolors.ENDC}")
+                    for key in waiting[name]:
+                        submit(key)
+                    continue
+                if isinstance(result, Exception):
+                    result = {"key": name, "model_name": strategies[name].get_model_name(), "error": str(result)}
+                outcomes[name] = result
+                status = f"{Bcolors.FAIL}failed: {result['error']}" if "error" in result else f"{Bcolors.OKGREEN}done"
+                print(f"{status} - {result['model_name']} ({time.time() - start:.1f}s elapsed, "
+                      f"log in {results_folder / name / 'train.log'}){Bcolors.ENDC}")
+
+    print(f"{Bcolors.OKGREEN}All strategies finished in {time.time() - start:.1f}s{Bcolors.ENDC}")
+    write_ranking(outcomes, results_folder)
+    return outcomes
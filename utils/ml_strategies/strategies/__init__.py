@@ -9,6 +9,7 @@ from .embeddings_strategy import EmbeddingsTrainingStrategy
 from .embeddings_knn_strategy import EmbeddingsKNNTrainingStrategy
 from .neural_torch_strategy import NeuralTorchTrainingStrategy
 from .minilm_strategy import MiniLMTrainingStrategy
+from .hashing_strategy import HashingTrainingStrategy
 
 __all__ = [
     'SVMTrainingStrategy',
@@ -18,4 +19,5 @@ __all__ = [
     'EmbeddingsKNNTrainingStrategy',
     'NeuralTorchTrainingStrategy',
     'MiniLMTrainingStrategy',
+    'HashingTrainingStrategy',
 ]
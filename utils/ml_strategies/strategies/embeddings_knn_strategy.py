@@ -2,8 +2,11 @@
 Embeddings + KNN training strategy for text classification.
 Uses sentence transformers with KNN classifier.
 Accepts model_dir as parameter for flexibility across modules.
+
+Predictions search an approximate nearest-neighbor index (utils/ml_strategies/ann_index.py,
+saved as embeddings_knn_index.bin) instead of comparing each query with every training
+embedding. Models trained before the index existed fall back to the brute-force classifier.
 """
-from sentence_transformers import SentenceTransformer
 from sklearn.neighbors import KNeighborsClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, accuracy_score
@@ -14,11 +17,16 @@ import pickle
 from pathlib import Path
 from utils.colors.colors_terminal import Bcolors
 from utils.ml_strategies.training_strategy import TrainingStrategy
+from utils.ml_strategies.embedding_store import get_embedding_store
+from utils.ml_strategies.ann_index import build_index, load_index, knn_vote
 
 
 class EmbeddingsKNNTrainingStrategy(TrainingStrategy):
     """Embeddings + KNN training strategy"""
 
+    # overrides for index.search at prediction time, e.g. {'n_probe': 16} (ivf) or {'ef_search': 128} (hnsw)
+    search_params = {}
+
     def __init__(self, model_dir=None):
         if model_dir is not None:
             self.model_dir = Path(model_dir)
@@ -34,7 +42,8 @@ class EmbeddingsKNNTrainingStrategy(TrainingStrategy):
         return [
             str(self.model_dir / "embeddings_knn_classifier.pkl"),
             str(self.model_dir / "embeddings_knn_label_encoder.pkl"),
-            str(self.model_dir / "embeddings_knn_model_info.pkl")
+            str(self.model_dir / "embeddings_knn_model_info.pkl"),
+            str(self.model_dir / "embeddings_knn_index.bin")
         ]
 
     def get_default_params(self):
@@ -43,7 +52,10 @@ class EmbeddingsKNNTrainingStrategy(TrainingStrategy):
             'batch_size': 32,
             'n_neighbors': 5,
             'weights': 'distance',
-            'metric': 'cosine'
+            'metric': 'cosine',
+            # 'ivf' (numpy) or 'hnsw' (needs hnswlib); n_probe/ef_search raise recall at the cost of latency
+            'index': 'ivf',
+            'index_params': {'n_lists': None, 'n_probe': 8}
         }
 
     def train(self, documents, labels):
@@ -55,11 +67,9 @@ class EmbeddingsKNNTrainingStrategy(TrainingStrategy):
         print(f"{Bcolors.OKGREEN}Classes: {len(le.classes_)}{Bcolors.ENDC}")
 
         params = self.get_default_params()
-        print(f"{Bcolors.OKBLUE}Loading sentence transformer: {params['model_name']}...{Bcolors.ENDC}")
-        embedding_model = SentenceTransformer(params['model_name'])
 
         print(f"{Bcolors.OKBLUE}Generating embeddings...{Bcolors.ENDC}")
-        embeddings = embedding_model.encode(documents, batch_size=params['batch_size'], show_progress_bar=True)
+        embeddings = get_embedding_store().encode(documents, params['model_name'], batch_size=params['batch_size'], show_progress_bar=True)
 
         print(f"Embeddings shape: {embeddings.shape}")
 
@@ -72,17 +82,22 @@ class EmbeddingsKNNTrainingStrategy(TrainingStrategy):
             n_neighbors=params['n_neighbors'],
             weights=params['weights'],
             metric=params['metric'],
-            n_jobs=-1
+            n_jobs=self.n_jobs
         )
 
         knn.fit(X_train, y_train)
 
+        print(f"{Bcolors.OKBLUE}Building {params['index']} index...{Bcolors.ENDC}")
+        index = build_index(params['index'], X_train, **params['index_params'])
+
         print(f"{Bcolors.OKBLUE}Making predictions...{Bcolors.ENDC}")
-        y_pred = knn.predict(X_test)
+        distances, neighbors = index.search(X_test, params['n_neighbors'])
+        y_pred = knn_vote(distances, np.where(neighbors >= 0, y_train[neighbors], -1), len(le.classes_), params['weights'])
         accuracy = accuracy_score(y_test, y_pred)
+        brute_accuracy = accuracy_score(y_test, knn.predict(X_test))
 
         print(f"\n{Bcolors.HEADER}=== Results ==={Bcolors.ENDC}")
-        print(f"Accuracy: {accuracy:.4f}")
+        print(f"Accuracy: {accuracy:.4f} (brute force: {brute_accuracy:.4f})")
         print(f"\nComplete classification report:")
         print(classification_report(y_test, y_pred, target_names=le.classes_, zero_division=0))
 
@@ -90,6 +105,7 @@ class EmbeddingsKNNTrainingStrategy(TrainingStrategy):
         print(f"  k (neighbors): {params['n_neighbors']}")
         print(f"  Weights: {params['weights']}")
         print(f"  Metric: {params['metric']}")
+        print(f"  Index: {params['index']} {params['index_params']}")
         print(f"  Training samples: {X_train.shape[0]}")
         print(f"  Feature dimension: {X_train.shape[1]}")
 
@@ -97,6 +113,7 @@ class EmbeddingsKNNTrainingStrategy(TrainingStrategy):
 
         joblib.dump(knn, self.model_dir / "embeddings_knn_classifier.pkl")
         joblib.dump(le, self.model_dir / "embeddings_knn_label_encoder.pkl")
+        index.save(self.model_dir / "embeddings_knn_index.bin")
 
         model_info = {
             'embedding_model_name': params['model_name'],
@@ -105,6 +122,11 @@ class EmbeddingsKNNTrainingStrategy(TrainingStrategy):
                 'n_neighbors': params['n_neighbors'],
                 'weights': params['weights'],
                 'metric': params['metric']
+            },
+            'index': {
+                'kind': params['index'],
+                'params': params['index_params'],
+                'labels': y_train
             }
         }
 
@@ -119,14 +141,26 @@ class EmbeddingsKNNTrainingStrategy(TrainingStrategy):
             self.label_encoder = joblib.load(self.model_dir / "embeddings_knn_label_encoder.pkl")
             with open(self.model_dir / "embeddings_knn_model_info.pkl", 'rb') as f:
                 self.model_info = pickle.load(f)
-            self.transformer_model = SentenceTransformer(self.model_info['embedding_model_name'])
+            self.index = None
+            index_file = self.model_dir / "embeddings_knn_index.bin"
+            if 'index' in self.model_info and index_file.exists():
+                info = self.model_info['index']
+                self.index = load_index(info['kind'], index_file, self.model_info['embedding_dim'], info['params'])
+            else:
+                print(f"{Bcolors.WARNING}No nearest-neighbor index for {self.get_model_name()}, using brute force (retrain to build it){Bcolors.ENDC}")
             return True
         except (FileNotFoundError, ImportError):
             return False
 
     def predict(self, X_test):
-        test_embeddings = self.transformer_model.encode(X_test, batch_size=32, normalize_embeddings=True)
-        y_pred_encoded = self.classifier.predict(test_embeddings)
+        test_embeddings = get_embedding_store().encode(X_test, self.model_info['embedding_model_name'], batch_size=32, normalize=True)
+        if self.index is None:
+            y_pred_encoded = self.classifier.predict(test_embeddings)
+        else:
+            knn_params = self.model_info['knn_params']
+            distances, neighbors = self.index.search(test_embeddings, knn_params['n_neighbors'], **self.search_params)
+            neighbor_labels = np.where(neighbors >= 0, self.model_info['index']['labels'][neighbors], -1)
+            y_pred_encoded = knn_vote(distances, neighbor_labels, len(self.label_encoder.classes_), knn_params['weights'])
         return self.label_encoder.inverse_transform(y_pred_encoded)
 
 
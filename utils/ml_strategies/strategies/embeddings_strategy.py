@@ -3,7 +3,6 @@ Embeddings training strategy for text classification.
 Uses sentence transformers with centroid similarity.
 Accepts model_dir as parameter for flexibility across modules.
 """
-from sentence_transformers import SentenceTransformer
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, accuracy_score
 from sklearn.preprocessing import LabelEncoder
@@ -14,6 +13,7 @@ from pathlib import Path
 from collections import defaultdict
 from utils.colors.colors_terminal import Bcolors
 from utils.ml_strategies.training_strategy import TrainingStrategy
+from utils.ml_strategies.embedding_store import get_embedding_store
 
 
 class EmbeddingsTrainingStrategy(TrainingStrategy):
@@ -51,15 +51,14 @@ class EmbeddingsTrainingStrategy(TrainingStrategy):
         print(f"{Bcolors.OKGREEN}Classes: {len(le.classes_)}{Bcolors.ENDC}")
 
         params = self.get_default_params()
-        print(f"{Bcolors.OKBLUE}Loading sentence transformer: {params['model_name']}...{Bcolors.ENDC}")
-        model = SentenceTransformer(params['model_name'])
+        store = get_embedding_store()
 
         X_train_docs, X_test_docs, y_train, y_test = train_test_split(
             documents, y, test_size=0.2, random_state=42, stratify=y
         )
 
         print(f"{Bcolors.OKBLUE}Generating embeddings for training set...{Bcolors.ENDC}")
-        train_embeddings = model.encode(X_train_docs, batch_size=params['batch_size'], show_progress_bar=True)
+        train_embeddings = store.encode(X_train_docs, params['model_name'], batch_size=params['batch_size'], show_progress_bar=True)
 
         print(f"{Bcolors.OKBLUE}Calculating class centroids...{Bcolors.ENDC}")
         centroids = {}
@@ -73,7 +72,7 @@ class EmbeddingsTrainingStrategy(TrainingStrategy):
             print(f"Class {le.classes_[class_label]}: {len(embeddings_list)} samples")
 
         print(f"{Bcolors.OKBLUE}Generating embeddings for test set...{Bcolors.ENDC}")
-        test_embeddings = model.encode(X_test_docs, batch_size=params['batch_size'], show_progress_bar=True)
+        test_embeddings = store.encode(X_test_docs, params['model_name'], batch_size=params['batch_size'], show_progress_bar=True)
 
         print(f"{Bcolors.OKBLUE}Making predictions...{Bcolors.ENDC}")
         y_pred = []
@@ -117,13 +116,12 @@ class EmbeddingsTrainingStrategy(TrainingStrategy):
             with open(self.model_dir / "embeddings_centroids.pkl", 'rb') as f:
                 self.model_data = pickle.load(f)
             self.label_encoder = joblib.load(self.model_dir / "embeddings_label_encoder.pkl")
-            self.embedding_model = SentenceTransformer(self.model_data['model_name'])
             return True
         except (FileNotFoundError, ImportError):
             return False
 
     def predict(self, X_test):
-        test_embeddings = self.embedding_model.encode(X_test, batch_size=32, show_progress_bar=False)
+        test_embeddings = get_embedding_store().encode(X_test, self.model_data['model_name'], batch_size=32)
         centroids = self.model_data['centroids']
         y_pred = []
         for emb in test_embeddings:
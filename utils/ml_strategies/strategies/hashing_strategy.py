@@ -0,0 +1,177 @@
+"""
+Hashing + SGD training strategy for text classification.
+Accepts model_dir as parameter for flexibility across modules.
+
+Features come from HashedTfidf (utils/ml_strategies/hashing_features.py): no vocabulary
+to fit, store or look up. The classifier is a linear SVM (SGDClassifier, hinge loss),
+so both can be trained in batches: train() fits the usual in-memory dataset like the
+other strategies, train_incremental() streams a StreamingTextDataset from disk.
+"""
+import joblib
+import numpy as np
+from pathlib import Path
+from sklearn.linear_model import SGDClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import classification_report, accuracy_score
+from sklearn.preprocessing import LabelEncoder
+from utils.colors.colors_terminal import Bcolors
+from utils.ml_strategies.training_strategy import TrainingStrategy
+from utils.ml_strategies.hashing_features import HashedTfidf
+from utils.ml_strategies.strategies.svm_strategy import SPANISH_STOP_WORDS
+
+
+class HashingTrainingStrategy(TrainingStrategy):
+    """HashingVectorizer + IDF + linear SVM (SGD), trainable out of core"""
+
+    supports_incremental = True
+
+    def __init__(self, model_dir=None):
+        if model_dir is not None:
+            self.model_dir = Path(model_dir)
+        else:
+            from constants import SUBJECT_MODEL_FOLDERS
+            self.model_dir = SUBJECT_MODEL_FOLDERS["hashing"]
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+
+    def get_model_name(self):
+        return "Hashing + SGD"
+
+    def get_model_files(self):
+        return [
+            str(self.model_dir / "hashing_classifier.pkl"),
+            str(self.model_dir / "hashing_vectorizer.pkl"),
+            str(self.model_dir / "hashing_idf.npy"),
+            str(self.model_dir / "hashing_label_encoder.pkl")
+        ]
+
+    def get_default_params(self):
+        return {
+            'n_features': 2 ** 19,
+            'ngram_range': (1, 2),
+            'stop_words': SPANISH_STOP_WORDS,
+            'alpha': 1e-5,
+            'max_iter': 50,     # train(): passes over the in-memory training set
+            'epochs': 5,        # train_incremental(): passes over the files
+            'batch_size': 1000,
+            'random_state': 42
+        }
+
+    def _new_features(self, params):
+        return HashedTfidf(n_features=params['n_features'], ngram_range=params['ngram_range'],
+                           stop_words=params['stop_words'])
+
+    def _new_classifier(self, params, class_weight):
+        return SGDClassifier(loss='hinge', alpha=params['alpha'], class_weight=class_weight,
+                             max_iter=params['max_iter'], tol=1e-4,
+                             random_state=params['random_state'], n_jobs=self.n_jobs)
+
+    def train(self, documents, labels):
+        """Train on an in-memory dataset (same split as the other strategies)"""
+        print(f"{Bcolors.HEADER}=== Training {self.get_model_name()} ==={Bcolors.ENDC}")
+
+        le = LabelEncoder()
+        y = le.fit_transform(labels)
+        print(f"{Bcolors.OKGREEN}Classes: {len(le.classes_)}{Bcolors.ENDC}")
+
+        params = self.get_default_params()
+        features = self._new_features(params)
+        X = features.fit_transform(documents)
+        print(f"Feature matrix: {X.shape} ({X.nnz} non-zero)")
+
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=42, stratify=y
+        )
+
+        print(f"{Bcolors.OKBLUE}Training...{Bcolors.ENDC}")
+        clf = self._new_classifier(params, 'balanced')
+        clf.fit(X_train, y_train)
+
+        y_pred = clf.predict(X_test)
+        accuracy = accuracy_score(y_test, y_pred)
+
+        print(f"\n{Bcolors.HEADER}=== Results ==={Bcolors.ENDC}")
+        print(f"Accuracy: {accuracy:.4f}")
+        print(f"\nComplete classification report:")
+        print(classification_report(y_test, y_pred, target_names=le.classes_, zero_division=0))
+
+        self._save(clf, features, le)
+        return accuracy
+
+    def train_incremental(self, dataset):
+        """
+        Train on a StreamingTextDataset without loading it: one pass to count document
+        frequencies, then `epochs` shuffled passes of partial_fit over its train split.
+        The accuracy is measured on its stratified test split.
+        """
+        print(f"{Bcolors.HEADER}=== Training {self.get_model_name()} (out of core) ==={Bcolors.ENDC}")
+
+        if len(dataset) == 0:
+            print(f"{Bcolors.FAIL}No documents found!{Bcolors.ENDC}")
+            return None
+        train_set, test_set = dataset.split(test_size=0.2)
+        print(f"  Training set: {len(train_set)} documents, test set: {len(test_set)} documents")
+
+        le = LabelEncoder()
+        le.fit(dataset.labels)
+        classes = np.arange(len(le.classes_))
+        print(f"{Bcolors.OKGREEN}Classes: {len(le.classes_)}{Bcolors.ENDC}")
+
+        params = self.get_default_params()
+        features = self._new_features(params)
+        print(f"{Bcolors.OKBLUE}Counting document frequencies...{Bcolors.ENDC}")
+        for documents, _, _ in train_set.batches(params['batch_size']):
+            features.partial_fit(documents)
+        features.finalize()
+        print(f"  {features.n_documents} documents, {int(np.count_nonzero(features.document_frequency))} used columns")
+
+        # 'balanced' weights, computed from the labels up front (partial_fit can't do it per batch)
+        counts = np.bincount(le.transform(train_set.labels), minlength=len(classes))
+        class_weight = {c: len(train_set) / (len(classes) * n) for c, n in zip(classes, counts) if n}
+        clf = self._new_classifier(params, class_weight)
+
+        for epoch in range(params['epochs']):
+            print(f"{Bcolors.OKBLUE}Epoch {epoch + 1}/{params['epochs']}...{Bcolors.ENDC}")
+            for documents, labels, _ in train_set.batches(params['batch_size'], shuffle=True, epoch=epoch):
+                clf.partial_fit(features.transform(documents), le.transform(labels), classes=classes)
+
+        y_test, y_pred = [], []
+        for documents, labels, _ in test_set.batches(params['batch_size']):
+            y_test.extend(le.transform(labels))
+            y_pred.extend(clf.predict(features.transform(documents)))
+        accuracy = accuracy_score(y_test, y_pred) if y_test else None
+
+        print(f"\n{Bcolors.HEADER}=== Results ==={Bcolors.ENDC}")
+        if accuracy is not None:
+            print(f"Accuracy: {accuracy:.4f}")
+            print(f"\nComplete classification report:")
+            print(classification_report(y_test, y_pred, labels=classes, target_names=le.classes_, zero_division=0))
+
+        self._save(clf, features, le)
+        return accuracy
+
+    def _save(self, clf, features, le):
+        print(f"\n{Bcolors.OKGREEN}Saving models...{Bcolors.ENDC}")
+        # columns no training document hashed into keep a weight of exactly 0
+        clf.sparsify()
+        joblib.dump(clf, self.model_dir / "hashing_classifier.pkl")
+        features.save(self.model_dir / "hashing_vectorizer.pkl", self.model_dir / "hashing_idf.npy")
+        joblib.dump(le, self.model_dir / "hashing_label_encoder.pkl")
+
+    def load_model(self):
+        try:
+            self.clf = joblib.load(self.model_dir / "hashing_classifier.pkl")
+            self.features = HashedTfidf.load(self.model_dir / "hashing_vectorizer.pkl", self.model_dir / "hashing_idf.npy")
+            self.label_encoder = joblib.load(self.model_dir / "hashing_label_encoder.pkl")
+            return True
+        except FileNotFoundError:
+            return False
+
+    def predict(self, X_test):
+        y_pred_encoded = self.clf.predict(self.features.transform(X_test))
+        return self.label_encoder.inverse_transform(y_pred_encoded)
+
+
+def train_hashing_model(documents, labels):
+    """Convenience function for backward compatibility"""
+    strategy = HashingTrainingStrategy()
+    return strategy.train(documents, labels)
@@ -3,7 +3,6 @@ all-MiniLM-L6-v2 / LaBSE training strategy for text classification.
 Dedicated strategy using SVM classification with optimized parameters.
 Accepts model_dir as parameter for flexibility across modules.
 """
-from sentence_transformers import SentenceTransformer
 from sklearn.model_selection import train_test_split, GridSearchCV
 from sklearn.metrics import classification_report, accuracy_score
 from sklearn.preprocessing import LabelEncoder
@@ -14,6 +13,7 @@ import pickle
 from pathlib import Path
 from utils.colors.colors_terminal import Bcolors
 from utils.ml_strategies.training_strategy import TrainingStrategy
+from utils.ml_strategies.embedding_store import get_embedding_store
 
 
 class MiniLMTrainingStrategy(TrainingStrategy):
@@ -58,27 +58,28 @@ class MiniLMTrainingStrategy(TrainingStrategy):
         print(f"{Bcolors.OKGREEN}Classes: {len(le.classes_)}{Bcolors.ENDC}")
 
         params = self.get_default_params()
-        print(f"{Bcolors.OKBLUE}Loading sentence transformer: {params['model_name']}...{Bcolors.ENDC}")
-        model = SentenceTransformer(params['model_name'])
+        store = get_embedding_store()
 
         X_train_docs, X_test_docs, y_train, y_test = train_test_split(
             documents, y, test_size=0.2, random_state=42, stratify=y
         )
 
         print(f"{Bcolors.OKBLUE}Generating embeddings for training set ({len(X_train_docs)} samples)...{Bcolors.ENDC}")
-        train_embeddings = model.encode(
+        train_embeddings = store.encode(
             X_train_docs,
+            params['model_name'],
             batch_size=params['batch_size'],
             show_progress_bar=True,
-            normalize_embeddings=True
+            normalize=True
         )
 
         print(f"{Bcolors.OKBLUE}Generating embeddings for test set ({len(X_test_docs)} samples)...{Bcolors.ENDC}")
-        test_embeddings = model.encode(
+        test_embeddings = store.encode(
             X_test_docs,
+            params['model_name'],
             batch_size=params['batch_size'],
             show_progress_bar=True,
-            normalize_embeddings=True
+            normalize=True
         )
 
         if params.get('tune_hyperparams', True):
@@ -97,7 +98,7 @@ class MiniLMTrainingStrategy(TrainingStrategy):
                 param_grid,
                 cv=3,
                 scoring='accuracy',
-                n_jobs=-1,
+                n_jobs=self.n_jobs,
                 verbose=1
             )
 
@@ -174,13 +175,12 @@ class MiniLMTrainingStrategy(TrainingStrategy):
             self.label_encoder = joblib.load(self.model_dir / "minilm_label_encoder.pkl")
             with open(self.model_dir / "minilm_model_info.pkl", 'rb') as f:
                 self.model_info = pickle.load(f)
-            self.transformer_model = SentenceTransformer(self.model_info['model_name'])
             return True
         except (FileNotFoundError, ImportError):
             return False
 
     def predict(self, X_test):
-        test_embeddings = self.transformer_model.encode(X_test, batch_size=32, normalize_embeddings=True)
+        test_embeddings = get_embedding_store().encode(X_test, self.model_info['model_name'], batch_size=32, normalize=True)
         y_pred_encoded = self.classifier.predict(test_embeddings)
         return self.label_encoder.inverse_transform(y_pred_encoded)
 
@@ -7,7 +7,6 @@ import torch
 import torch.nn as nn
 import torch.optim as optim
 from torch.utils.data import DataLoader, TensorDataset
-from sentence_transformers import SentenceTransformer
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, accuracy_score
 from sklearn.preprocessing import LabelEncoder
@@ -16,6 +15,7 @@ import joblib
 from pathlib import Path
 from utils.colors.colors_terminal import Bcolors
 from utils.ml_strategies.training_strategy import TrainingStrategy
+from utils.ml_strategies.embedding_store import get_embedding_store
 
 
 class TextClassifier(nn.Module):
@@ -81,11 +81,9 @@ class NeuralTorchTrainingStrategy(TrainingStrategy):
         print(f"{Bcolors.OKGREEN}Classes: {num_classes}{Bcolors.ENDC}")
 
         params = self.get_default_params()
-        print(f"{Bcolors.OKBLUE}Loading sentence transformer: {params['model_name']}...{Bcolors.ENDC}")
-        embedding_model = SentenceTransformer(params['model_name'])
 
         print(f"{Bcolors.OKBLUE}Generating embeddings...{Bcolors.ENDC}")
-        embeddings = embedding_model.encode(documents, batch_size=params['batch_size'], show_progress_bar=True)
+        embeddings = get_embedding_store().encode(documents, params['model_name'], batch_size=params['batch_size'], show_progress_bar=True)
 
         X_train, X_test, y_train, y_test = train_test_split(
             embeddings, y, test_size=0.2, random_state=42, stratify=y
@@ -185,13 +183,13 @@ class NeuralTorchTrainingStrategy(TrainingStrategy):
             self.nn_model.load_state_dict(checkpoint['model_state_dict'])
             self.nn_model.eval()
             self.label_encoder = joblib.load(self.model_dir / "neural_torch_label_encoder.pkl")
-            self.transformer_model = SentenceTransformer(checkpoint['embedding_model_name'])
+            self.embedding_model_name = checkpoint['embedding_model_name']
             return True
         except (FileNotFoundError, ImportError):
             return False
 
     def predict(self, X_test):
-        test_embeddings = self.transformer_model.encode(X_test, batch_size=32, normalize_embeddings=True)
+        test_embeddings = get_embedding_store().encode(X_test, self.embedding_model_name, batch_size=32, normalize=True)
         X_tensor = torch.FloatTensor(test_embeddings).to(self.device)
         with torch.no_grad():
             outputs = self.nn_model(X_tensor)
@@ -39,7 +39,7 @@ class RandomForestTrainingStrategy(TrainingStrategy):
         return {
             'n_estimators': 100,
             'random_state': 42,
-            'n_jobs': -1,
+            'n_jobs': self.n_jobs,
             'max_features': 15000,
             'ngram_range': (1, 2),
             'min_df': 2,
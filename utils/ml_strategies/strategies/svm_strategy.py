@@ -13,6 +13,7 @@ import numpy as np
 from pathlib import Path
 from utils.colors.colors_terminal import Bcolors
 from utils.ml_strategies.training_strategy import TrainingStrategy
+from utils.ml_strategies.compact_artifacts import export_trained_model
 
 # Spanish stop words list for academic text
 SPANISH_STOP_WORDS = [
@@ -109,7 +110,7 @@ class SVMTrainingStrategy(TrainingStrategy):
                 'svm__class_weight': ['balanced', None]
             }
             print(f"{Bcolors.WARNING}Running Grid Search (this may take a while)...{Bcolors.ENDC}")
-            clf = GridSearchCV(pipeline, param_grid, cv=3, scoring='accuracy', n_jobs=-1)
+            clf = GridSearchCV(pipeline, param_grid, cv=3, scoring='accuracy', n_jobs=self.n_jobs)
             clf.fit(X_train, y_train)
             print(f"{Bcolors.OKGREEN}Best parameters: {clf.best_params_}{Bcolors.ENDC}")
             best_clf = clf.best_estimator_
@@ -138,6 +139,9 @@ class SVMTrainingStrategy(TrainingStrategy):
         joblib.dump(best_clf, self.model_dir / "svm_classifier.pkl")
         joblib.dump(vectorizer, self.model_dir / "svm_vectorizer.pkl")
         joblib.dump(le, self.model_dir / "svm_label_encoder.pkl")
+        # the grid search keeps the SVC inside its Pipeline; only linear kernels can be exported
+        svc = best_clf.steps[-1][1] if isinstance(best_clf, Pipeline) else best_clf
+        export_trained_model(svc, vectorizer, le, self.model_dir / "svm_compact", documents)
 
         return accuracy
 
@@ -13,6 +13,7 @@ import numpy as np
 from pathlib import Path
 from utils.colors.colors_terminal import Bcolors
 from utils.ml_strategies.training_strategy import TrainingStrategy
+from utils.ml_strategies.compact_artifacts import export_trained_model
 
 
 class XGBoostTrainingStrategy(TrainingStrategy):
@@ -42,7 +43,7 @@ class XGBoostTrainingStrategy(TrainingStrategy):
             'max_depth': 6,
             'learning_rate': 0.1,
             'random_state': 42,
-            'n_jobs': -1,
+            'n_jobs': self.n_jobs,
             'max_features': 15000,
             'ngram_range': (1, 2),
             'min_df': 2,
@@ -109,6 +110,7 @@ class XGBoostTrainingStrategy(TrainingStrategy):
         joblib.dump(clf, self.model_dir / "xgboost_classifier.pkl")
         joblib.dump(vectorizer, self.model_dir / "xgboost_vectorizer.pkl")
         joblib.dump(le, self.model_dir / "xgboost_label_encoder.pkl")
+        export_trained_model(clf, vectorizer, le, self.model_dir / "xgboost_compact", documents)
 
         return accuracy
 
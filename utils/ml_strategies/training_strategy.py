@@ -8,6 +8,13 @@ from abc import ABC, abstractmethod
 class TrainingStrategy(ABC):
     """Abstract base class for training strategies"""
 
+    # Threads/processes for the strategy's own parallelism (-1 = all CPUs).
+    # The parallel runner lowers it so concurrent strategies share the CPUs.
+    n_jobs = -1
+
+    # True for strategies that implement train_incremental() (batches from a StreamingTextDataset)
+    supports_incremental = False
+
     @abstractmethod
     def train(self, documents, labels):
         """
@@ -42,6 +49,13 @@ class TrainingStrategy(ABC):
         """Make predictions on test data. Returns list of predicted labels."""
         pass
 
+    def train_incremental(self, dataset):
+        """
+        Train from a StreamingTextDataset (utils/ml_strategies/data_loader.py) one batch at a
+        time, holding out its stratified test split. Returns the test accuracy.
+        """
+        raise NotImplementedError(f"{self.get_model_name()} can't be trained incrementally")
+
     def get_default_params(self):
         """Get default parameters for this strategy"""
         return {}
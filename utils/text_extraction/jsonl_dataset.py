@@ -0,0 +1,293 @@
+"""
+Streaming dataset I/O.
+
+The dataset JSONs ({id: record}, every record carrying the full original_text) are
+hundreds of MB, and read_data_json / write_to_json hold all of it in memory at once.
+This module offers the same data one record at a time:
+
+- iter_json_records / write_json_records: stream an existing {id: record} JSON file,
+  reading or writing the same indent=4 layout as write_to_json.
+- JsonlDataset: a folder of JSONL shards (part-00000.jsonl, ...) plus index.json with
+  the shard/offset/length of every id, so records can be iterated lazily or looked up
+  by id with a single seek.
+- convert_json_to_jsonl / convert_jsonl_to_json: converters between both formats.
+
+Usage:
+    python -m utils.text_extraction.jsonl_dataset to-jsonl data/sedici/jsons/metadata_sedici_and_text_with_ocr.json
+    python -m utils.text_extraction.jsonl_dataset to-json data/sedici/jsons/metadata_sedici_and_text_with_ocr.jsonl out.json
+"""
+import argparse
+import json
+import os
+import shutil
+from collections.abc import Mapping
+from pathlib import Path
+
+READ_CHUNK_SIZE = 1024 * 1024
+SHARD_RECORDS = 1000
+INDEX_FILENAME = "index.json"
+WHITESPACE = " \t\n\r"
+
+_decoder = json.JSONDecoder()
+
+
+class _JsonReader:
+    """Incremental tokenizer over a text file: only the value being decoded is kept in memory."""
+
+    def __init__(self, file, chunk_size):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def _read_more(self):
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return
+        self.text = self.text[self.pos:] + chunk
+        self.pos = 0
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text) or self.eof:
+                return self.text[self.pos:self.pos + 1]
+            self._read_more()
+
+    def next_char(self):
+        char = self.peek()
+        self.pos += 1
+        return char
+
+    def expect(self, char):
+        found = self.next_char()
+        if found != char:
+            raise ValueError(f"Invalid dataset JSON: expected '{char}', found '{found}'")
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self._read_more()
+                continue
+            # a number or literal may continue in the next chunk: "12" | "3", or "12." | "5" and
+            # "1e" | "-5", which raw_decode reads as 12 and 1 with the "." / "e-" left over
+            near_end = end == len(self.text) or (self.text[self.pos] not in '{["' and len(self.text) - end <= 2)
+            if near_end and not self.eof:
+                self._read_more()
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_records(json_filename, enc="utf-8", chunk_size=READ_CHUNK_SIZE):
+    """Yield (id, record) from a {id: record} JSON file without loading the whole file."""
+    json_filename = Path(json_filename)
+    if not json_filename.exists():
+        return
+    with open(json_filename, "r", encoding=enc) as file:
+        reader = _JsonReader(file, chunk_size)
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+        while True:
+            key = reader.value()
+            reader.expect(":")
+            yield key, reader.value()
+            separator = reader.next_char()
+            if separator == "}":
+                return
+            if separator != ",":
+                raise ValueError(f"Invalid dataset JSON: expected ',' or '}}', found '{separator}'")
+
+
+def iter_json_keys(json_filename, enc="utf-8"):
+    for key, _ in iter_json_records(json_filename, enc):
+        yield key
+
+
+def write_json_records(json_filename, records, enc="utf-8"):
+    """Write (id, record) pairs as a {id: record} JSON file, one record at a time, in write_to_json's layout."""
+    with open(json_filename, "w", encoding=enc) as jsonfile:
+        jsonfile.write("{")
+        first = True
+        for key, record in records:
+            body = json.dumps(record, indent=4).replace("\n", "\n    ")
+            jsonfile.write(f"{'' if first else ','}\n    {json.dumps(key)}: {body}")
+            first = False
+        jsonfile.write("}" if first else "\n}")
+
+
+class JsonlDataset(Mapping):
+    """
+    Read-only {id: record} view over a sharded JSONL dataset folder.
+    Only the index is loaded; records are read from disk on access.
+    """
+
+    def __init__(self, folder):
+        self.folder = Path(folder)
+        with open(self.folder / INDEX_FILENAME, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        self.shards = index["shards"]
+        self.index = index["records"]
+        self._handles = {}
+
+    def _shard(self, shard):
+        handle = self._handles.get(shard)
+        if handle is None:
+            handle = open(self.folder / self.shards[shard], "rb")
+            self._handles[shard] = handle
+        return handle
+
+    def __getitem__(self, id):
+        shard, offset, length = self.index[id]
+        handle = self._shard(shard)
+        handle.seek(offset)
+        return json.loads(handle.read(length))["data"]
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, id):
+        return id in self.index
+
+    def records(self):
+        """Yield (id, record) in storage order, reading each shard sequentially."""
+        for shard, name in enumerate(self.shards):
+            offset = 0
+            with open(self.folder / name, "rb") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    location = self.index.get(entry["id"])
+                    if location and location[0] == shard and location[1] == offset:  # skip overwritten duplicates
+                        yield entry["id"], entry["data"]
+                    offset += len(line)
+
+    def close(self):
+        for handle in self._handles.values():
+            handle.close()
+        self._handles = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JsonlDatasetWriter:
+    """
+    Write a JsonlDataset folder record by record. The shards are written to <folder>.tmp
+    and swapped in on close, so readers never see a half-written dataset.
+    """
+
+    def __init__(self, folder, shard_records=SHARD_RECORDS):
+        self.folder = Path(folder)
+        self.shard_records = shard_records
+        self._tmp_folder = self.folder.with_name(self.folder.name + ".tmp")
+        shutil.rmtree(self._tmp_folder, ignore_errors=True)
+        self._tmp_folder.mkdir(parents=True)
+        self._shards = []
+        self._index = {}
+        self._file = None
+        self._count = 0
+
+    def _next_shard(self):
+        if self._file:
+            self._file.close()
+        self._shards.append(f"part-{len(self._shards):05d}.jsonl")
+        self._file = open(self._tmp_folder / self._shards[-1], "wb")
+        self._count = 0
+
+    def write(self, id, record):
+        if self._file is None or self._count == self.shard_records:
+            self._next_shard()
+        line = (json.dumps({"id": id, "data": record}, ensure_ascii=False) + "\n").encode("utf-8")
+        self._index[id] = [len(self._shards) - 1, self._file.tell(), len(line)]
+        self._file.write(line)
+        self._count += 1
+
+    def close(self):
+        if self._file:
+            self._file.close()
+        with open(self._tmp_folder / INDEX_FILENAME, "w", encoding="utf-8") as f:
+            json.dump({"shards": self._shards, "records": self._index}, f)
+        shutil.rmtree(self.folder, ignore_errors=True)
+        os.replace(self._tmp_folder, self.folder)
+
+    def abort(self):
+        if self._file:
+            self._file.close()
+        shutil.rmtree(self._tmp_folder, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_jsonl_dataset(folder, records, shard_records=SHARD_RECORDS):
+    with JsonlDatasetWriter(folder, shard_records) as writer:
+        for id, record in records:
+            writer.write(id, record)
+
+
+def convert_json_to_jsonl(json_filename, folder=None, enc="utf-8", shard_records=SHARD_RECORDS):
+    """Convert a {id: record} JSON file into a JsonlDataset folder (default: <stem>.jsonl next to it)."""
+    json_filename = Path(json_filename)
+    folder = Path(folder) if folder else json_filename.with_suffix(".jsonl")
+    write_jsonl_dataset(folder, iter_json_records(json_filename, enc), shard_records)
+    return folder
+
+
+def convert_jsonl_to_json(folder, json_filename, enc="utf-8"):
+    """Convert a JsonlDataset folder back into a {id: record} JSON file (same layout as write_to_json)."""
+    with JsonlDataset(folder) as dataset:
+        write_json_records(json_filename, dataset.records(), enc)
+
+
+def open_dataset(path, enc="utf-8"):
+    """
+    JsonlDataset for a dataset folder or a {id: record} JSON file. A JSON file is converted
+    to <stem>.jsonl next to it the first time (and again whenever the JSON is newer).
+    """
+    path = Path(path)
+    if path.is_dir():
+        return JsonlDataset(path)
+    folder = path.with_suffix(".jsonl")
+    index_filename = folder / INDEX_FILENAME
+    if not index_filename.exists() or index_filename.stat().st_mtime < path.stat().st_mtime:
+        convert_json_to_jsonl(path, folder, enc)
+    return JsonlDataset(folder)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert dataset JSON files to/from sharded JSONL")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    to_jsonl = subparsers.add_parser("to-jsonl", help="JSON file -> JSONL dataset folder")
+    to_jsonl.add_argument("json_filename", type=Path)
+    to_jsonl.add_argument("folder", type=Path, nargs="?")
+    to_jsonl.add_argument("--shard-records", type=int, default=SHARD_RECORDS)
+    to_json = subparsers.add_parser("to-json", help="JSONL dataset folder -> JSON file")
+    to_json.add_argument("folder", type=Path)
+    to_json.add_argument("json_filename", type=Path)
+    args = parser.parse_args()
+    if args.command == "to-jsonl":
+        print(f"Written {convert_json_to_jsonl(args.json_filename, args.folder, shard_records=args.shard_records)}")
+    else:
+        convert_jsonl_to_json(args.folder, args.json_filename)
+        print(f"Written {args.json_filename}")
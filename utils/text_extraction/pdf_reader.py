@@ -9,6 +9,22 @@ import numpy as np
 import re
 
 
+_OCR_READER = None
+
+
+def get_ocr_reader():
+    """EasyOCR reader shared by every call in this process (loading the models takes seconds). None if not installed."""
+    global _OCR_READER
+    if _OCR_READER is None:
+        try:
+            import easyocr
+        except ImportError:
+            print("❌ EasyOCR not available. Install with: pip install easyocr")
+            return None
+        print("🔧 Initializing EasyOCR...")
+        _OCR_READER = easyocr.Reader(['en', 'es'])
+    return _OCR_READER
+
 
 class PdfReader:
     def __new__(cls):
@@ -39,18 +55,9 @@ class PdfReader:
         sizes_dict = self.get_fontsizes(pdf_path)
         print(sizes_dict)
 
-        ocr_reader = None
+        ocr_reader = get_ocr_reader() if ocr else None
         processed_image_sizes = set()
 
-        if ocr:
-            try:
-                import easyocr
-                print("🔧 Initializing EasyOCR for image text extraction...")
-                ocr_reader = easyocr.Reader(['en', 'es'])
-            except ImportError:
-                print("❌ EasyOCR not available. Install with: pip install easyocr")
-                ocr = False
-
         with pdfplumber.open(pdf_path) as pdf:
             try:
                 first_word = pdf.pages[0].extract_words()[0]
@@ -290,14 +297,7 @@ class PdfReader:
         """Extract plain text. If max_words is set, stops after that many words (per-page boundary)."""
         print("Extracting text from PDF...")
 
-        ocr_reader = None
-        if ocr:
-            try:
-                import easyocr
-                print("🔧 Initializing EasyOCR...")
-                ocr_reader = easyocr.Reader(['en', 'es'])
-            except ImportError:
-                print("❌ EasyOCR not installed. Run: pip install easyocr")
+        ocr_reader = get_ocr_reader() if ocr else None
 
         with pdfplumber.open(pdf_path) as pdf:
             all_chunks = []
@@ -1,14 +1,62 @@
 import pandas as pd
+import codecs
 import json
+import os
 import pdfplumber
 import chardet
 
+ENCODING_READ_BLOCK = 1024 * 1024
+ENCODING_SAMPLE_BYTES = 64 * 1024  # bounded prefix fed to chardet when the file is not UTF-8
+_BOMS = [
+    (codecs.BOM_UTF32_LE, "UTF-32"),
+    (codecs.BOM_UTF32_BE, "UTF-32"),
+    (codecs.BOM_UTF8, "UTF-8-SIG"),
+    (codecs.BOM_UTF16_LE, "UTF-16"),
+    (codecs.BOM_UTF16_BE, "UTF-16"),
+]
+_encoding_cache = {}
 
-def detect_encoding(file_path):
+
+def _is_utf8(file):
+    decoder = codecs.getincrementaldecoder("utf-8")("strict")
+    try:
+        for block in iter(lambda: file.read(ENCODING_READ_BLOCK), b""):
+            decoder.decode(block)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def detect_encoding(file_path, sample_bytes=ENCODING_SAMPLE_BYTES):
+    """
+    Same result shape as chardet.detect ({'encoding', 'confidence', 'language'}), but:
+    a BOM decides first, then a strict streaming UTF-8 decode (what write_to_text/write_to_json produce),
+    and only files that are not valid UTF-8 go to chardet, on their first sample_bytes.
+    Results are cached per (path, size, mtime), so unchanged files are never read twice.
+    """
+    stat = os.stat(file_path)
+    key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    if key in _encoding_cache:
+        return _encoding_cache[key]
     with open(file_path, 'rb') as file:
-        raw_data = file.read()
-        result = chardet.detect(raw_data)
-        return result
+        head = file.read(4)
+        result = next(({"encoding": enc, "confidence": 1.0, "language": ""} for bom, enc in _BOMS if head.startswith(bom)), None)
+        if result is None:
+            file.seek(0)
+            if _is_utf8(file):
+                result = {"encoding": "utf-8", "confidence": 1.0, "language": ""}
+            else:
+                file.seek(0)
+                detector = chardet.UniversalDetector()
+                for block in iter(lambda: file.read(min(ENCODING_READ_BLOCK, sample_bytes)), b""):
+                    detector.feed(block)
+                    sample_bytes -= len(block)
+                    if detector.done or sample_bytes <= 0:
+                        break
+                result = detector.close()
+    _encoding_cache[key] = result
+    return result
 
 
 def read_data_json(json_filename,enc):
@@ -0,0 +1,92 @@
+"""
+Compare encoding detection on the extracted texts: chardet over the whole file
+(the previous detect_encoding) vs the current detect_encoding (BOM, strict UTF-8,
+bounded chardet sample, per-file cache).
+
+Reports total time for both, the speedup, the time of a second detect_encoding
+pass (served from the cache) and the files where both disagree. Disagreements
+between "ascii" and "utf-8" are not counted: UTF-8 is a superset of ASCII.
+
+Usage:
+    python validation/benchmark_encoding_detection.py [--limit N]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import chardet
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from constants import TXT_FOLDER
+from utils.text_extraction.read_and_write_files import detect_encoding
+
+OUTPUT_JSON = Path(__file__).parent / "result" / "encoding_detection_benchmark.json"
+
+
+def _full_chardet(path: Path) -> dict:
+    with open(path, "rb") as file:
+        return chardet.detect(file.read())
+
+
+def _normalize(encoding):
+    encoding = (encoding or "").lower()
+    return "utf-8" if encoding == "ascii" else encoding
+
+
+def _timed(function, files):
+    start = time.perf_counter()
+    results = [function(path) for path in files]
+    return results, time.perf_counter() - start
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=None, help="only the first N text files")
+    args = parser.parse_args()
+
+    files = sorted(TXT_FOLDER.glob("*.txt"))[:args.limit]
+    if not files:
+        print(f"❌ No text files found in {TXT_FOLDER}")
+        return
+    total_mb = sum(path.stat().st_size for path in files) / 1024 / 1024
+    print(f"📋 Detecting the encoding of {len(files)} files ({total_mb:.1f} MB)")
+    print("=" * 70)
+
+    chardet_results, chardet_time = _timed(_full_chardet, files)
+    fast_results, fast_time = _timed(detect_encoding, files)
+    _, cached_time = _timed(detect_encoding, files)
+
+    mismatches = {
+        path.stem: {"chardet": slow["encoding"], "detect_encoding": fast["encoding"]}
+        for path, slow, fast in zip(files, chardet_results, fast_results)
+        if _normalize(slow["encoding"]) != _normalize(fast["encoding"])
+    }
+
+    summary = {
+        "files": len(files),
+        "megabytes": round(total_mb, 2),
+        "chardet_full_s": round(chardet_time, 3),
+        "detect_encoding_s": round(fast_time, 3),
+        "detect_encoding_cached_s": round(cached_time, 4),
+        "speedup": round(chardet_time / fast_time, 1) if fast_time else None,
+        "mismatches": len(mismatches),
+    }
+    print(f"⏱️  chardet (full file):  {chardet_time:.2f}s")
+    print(f"⚡ detect_encoding:       {fast_time:.2f}s  ({summary['speedup']}x)")
+    print(f"♻️  detect_encoding cached: {cached_time:.4f}s")
+    print(f"{'✅' if not mismatches else '⚠️ '} {len(mismatches)} files with a different encoding")
+    for doc_id, encodings in list(mismatches.items())[:10]:
+        print(f"   {doc_id}: {encodings}")
+
+    OUTPUT_JSON.parent.mkdir(parents=True, exist_ok=True)
+    with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
+        json.dump({"summary": summary, "mismatches": mismatches}, f, indent=4)
+    print(f"💾 Results saved to {OUTPUT_JSON}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,150 @@
+"""
+Compare the nearest-neighbor indexes of EmbeddingsKNNTrainingStrategy with the
+brute-force KNeighborsClassifier(metric='cosine') it replaced at prediction time.
+
+Uses the subject dataset embeddings (same split as the strategy) and, to see how
+each backend behaves as the corpus grows, a training set grown --scale times with
+noisy copies of the real embeddings. For brute force, IVF at several n_probe and
+HNSW at several ef_search (when hnswlib is installed) it reports:
+  build s      -- time to fit the classifier / build the index
+  ms/query     -- latency of one document at a time, as the API predicts
+  recall@k     -- share of the exact k nearest neighbors the index returns
+  accuracy     -- test accuracy of the kNN vote
+  agreement    -- share of predictions equal to the brute-force prediction
+
+Usage:
+    python validation/benchmark_knn_index.py [--scale 1 10 50] [--queries 200] [--k 5]
+
+Falls back to synthetic clustered 384-d embeddings when the dataset or
+sentence-transformers is not available.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from utils.ml_strategies.ann_index import build_index, knn_vote
+
+OUTPUT_JSON = Path(__file__).parent / "result" / "knn_index_benchmark.json"
+N_PROBES = [1, 2, 4, 8, 16, 32]
+EF_SEARCHES = [16, 32, 64, 128]
+
+
+def _load_embeddings():
+    try:
+        from fine_tune_subject.model_comparison_framework import _load_subject_data
+        from utils.ml_strategies.embedding_store import get_embedding_store
+        documents, labels, _ = _load_subject_data()
+        if len(documents) > 0:
+            embeddings = get_embedding_store().encode(documents, "all-MiniLM-L6-v2", show_progress_bar=True)
+            return embeddings, np.unique(labels, return_inverse=True)[1], "subject dataset"
+    except (ImportError, FileNotFoundError) as e:
+        print(f"⚠️ Using synthetic embeddings: {e}")
+    rng = np.random.default_rng(0)
+    n_classes, n = 40, 2000
+    centers = rng.normal(size=(n_classes, 384))
+    labels = rng.integers(0, n_classes, n)
+    embeddings = centers[labels] + rng.normal(scale=1.5, size=(n, 384))
+    return embeddings.astype(np.float32), labels, "synthetic"
+
+
+def _grow(X, y, scale, rng):
+    """Training set scale times larger: the real rows plus noisy copies of them."""
+    if scale == 1:
+        return X, y
+    copies = np.repeat(X, scale - 1, axis=0)
+    noise = rng.normal(scale=0.3 * X.std(), size=copies.shape).astype(np.float32)
+    return np.vstack([X, copies + noise]), np.concatenate([y, np.repeat(y, scale - 1)])
+
+
+def _single_query_ms(search, queries):
+    start = time.perf_counter()
+    for query in queries:
+        search(query[None, :])
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def _run_scale(X_train, y_train, X_test, y_test, args):
+    from sklearn.neighbors import KNeighborsClassifier
+
+    n_classes = int(max(y_train.max(), y_test.max())) + 1
+    queries = X_test[:args.queries]
+    rows = []
+
+    start = time.perf_counter()
+    brute = KNeighborsClassifier(n_neighbors=args.k, weights="distance", metric="cosine", n_jobs=1).fit(X_train, y_train)
+    build = time.perf_counter() - start
+    exact = brute.kneighbors(X_test, return_distance=False)
+    brute_pred = brute.predict(X_test)
+    rows.append({
+        "backend": "brute", "setting": "-", "build_s": round(build, 3),
+        "ms_per_query": round(_single_query_ms(brute.predict, queries), 3),
+        "recall": 1.0, "accuracy": round(float(np.mean(brute_pred == y_test)), 4), "agreement": 1.0,
+    })
+
+    backends = [("ivf", {}, "n_probe", N_PROBES)]
+    try:
+        import hnswlib  # noqa: F401
+        backends.append(("hnsw", {}, "ef_search", EF_SEARCHES))
+    except ImportError:
+        print("⚠️ hnswlib not installed, skipping HNSW")
+
+    for kind, params, knob, values in backends:
+        start = time.perf_counter()
+        index = build_index(kind, X_train, **params)
+        build = time.perf_counter() - start
+        for value in values:
+            if kind == "ivf" and value > index.n_lists:
+                continue
+            search = lambda q: index.search(q, args.k, **{knob: value})
+            distances, neighbors = search(X_test)
+            pred = knn_vote(distances, np.where(neighbors >= 0, y_train[neighbors], -1), n_classes)
+            recall = np.mean([len(set(found) & set(true)) / args.k for found, true in zip(neighbors, exact)])
+            rows.append({
+                "backend": kind, "setting": f"{knob}={value}", "build_s": round(build, 3),
+                "ms_per_query": round(_single_query_ms(search, queries), 3),
+                "recall": round(float(recall), 4), "accuracy": round(float(np.mean(pred == y_test)), 4),
+                "agreement": round(float(np.mean(pred == brute_pred)), 4),
+            })
+    return rows
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10, 50], help="training set growth factors")
+    parser.add_argument("--queries", type=int, default=200, help="test documents timed one at a time")
+    parser.add_argument("--k", type=int, default=5, help="neighbors")
+    args = parser.parse_args()
+
+    from sklearn.model_selection import train_test_split
+
+    embeddings, labels, source = _load_embeddings()
+    X_train, X_test, y_train, y_test = train_test_split(embeddings, labels, test_size=0.2, random_state=42, stratify=labels)
+    print(f"📋 {source}: {len(X_train)} training / {len(X_test)} test embeddings of {embeddings.shape[1]} dims")
+
+    rng = np.random.default_rng(0)
+    results = {}
+    for scale in args.scale:
+        X_grown, y_grown = _grow(X_train, y_train, scale, rng)
+        print(f"\n📋 {len(X_grown)} training embeddings (x{scale})")
+        print(f"   {'backend':<8}{'setting':<14}{'build s':>9}{'ms/query':>10}{'recall@k':>10}{'accuracy':>10}{'agreement':>11}")
+        rows = _run_scale(X_grown, y_grown, X_test, y_test, args)
+        for r in rows:
+            print(f"   {r['backend']:<8}{r['setting']:<14}{r['build_s']:>9}{r['ms_per_query']:>10}{r['recall']:>10}"
+                  f"{r['accuracy']:>10}{r['agreement']:>11}")
+        results[str(len(X_grown))] = rows
+
+    OUTPUT_JSON.parent.mkdir(parents=True, exist_ok=True)
+    with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
+        json.dump({"args": vars(args), "source": source, "results": results}, f, indent=4)
+    print(f"\n💾 Results saved to {OUTPUT_JSON}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,100 @@
+"""
+Benchmark the logging overhead of the extractor on a large PDF.
+
+Runs the extractor's PdfReader in-process (no HTTP) and compares, per request:
+  legacy      -- the old pattern: full text formatted into an INFO line with an f-string
+  info        -- current code at LOG_LEVEL=INFO (payload logging gated off)
+  debug       -- current code at LOG_LEVEL=DEBUG (payloads sampled to LOG_PAYLOAD_CHARS)
+
+Log output goes to a byte-counting sink, so the numbers are formatting cost
+and volume, not terminal speed.
+
+Usage:
+    python validation/benchmark_logging.py path/to/large.pdf [--runs 5] [--tags]
+
+Requires the extractor service requirements (pdfplumber, prometheus-client, ...).
+"""
+
+import argparse
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "api" / "app" / "extractor_service"))
+
+from app.logging_config import logging, payload
+from app.service.strategies.pdf_reader_strategy import PdfReader
+
+OUTPUT_JSON = Path(__file__).parent / "result" / "logging_benchmark.json"
+
+
+class CountingSink(io.TextIOBase):
+    def __init__(self):
+        self.chars = 0
+
+    def write(self, s):
+        self.chars += len(s)
+        return len(s)
+
+
+def _extract(reader, pdf_path: str, tags: bool) -> str:
+    if tags:
+        return reader.extract_text_with_xml_tags(pdf_path, ocr=False)
+    text, _ = reader.extract_text(pdf_path, ocr=False)
+    return text
+
+
+def _run(mode: str, pdf_path: str, runs: int, tags: bool) -> dict:
+    logger = logging.getLogger("app.service.reader_strategy")
+    sink = CountingSink()
+    logging.getLogger().handlers[0].setStream(sink)
+    logging.getLogger("app").setLevel(logging.DEBUG if mode == "debug" else logging.INFO)
+
+    reader = PdfReader()
+    extract_times, log_times = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        text = _extract(reader, pdf_path, tags)
+        extract_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        if mode == "legacy":
+            logger.info(f"Extracted text: {text}")
+        else:
+            logger.debug("Extracted text: %s", payload(text))
+        log_times.append(time.perf_counter() - start)
+
+    return {
+        "text_chars": len(text),
+        "extract_avg_s": round(sum(extract_times) / runs, 3),
+        "log_avg_ms": round(sum(log_times) / runs * 1000, 3),
+        "log_chars_per_request": sink.chars // runs,
+    }
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf", help="PDF to extract (the larger the better)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--tags", action="store_true", help="benchmark extract_text_with_xml_tags instead of extract_text")
+    args = parser.parse_args()
+
+    stdout = sys.stdout
+    results = {mode: _run(mode, args.pdf, args.runs, args.tags) for mode in ("legacy", "info", "debug")}
+    logging.getLogger().handlers[0].setStream(stdout)
+
+    print(f"\n📄 {args.pdf}  ({results['legacy']['text_chars']:,} chars extracted, {args.runs} runs)\n")
+    print(f"  {'mode':<8} {'extract (s)':>12} {'logging (ms)':>14} {'logged chars':>14}")
+    for mode, r in results.items():
+        print(f"  {mode:<8} {r['extract_avg_s']:>12} {r['log_avg_ms']:>14} {r['log_chars_per_request']:>14,}")
+
+    OUTPUT_JSON.parent.mkdir(parents=True, exist_ok=True)
+    with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
+        json.dump({"pdf": args.pdf, "runs": args.runs, "tags": args.tags, "results": results}, f, indent=2)
+    print(f"\n✅ Results saved to {OUTPUT_JSON}")
+
+
+if __name__ == "__main__":
+    run()
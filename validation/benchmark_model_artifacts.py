@@ -0,0 +1,138 @@
+"""
+Compare the pickled TF-IDF classifiers (joblib .pkl, as the orchestrator loads them)
+with their compact export (utils/ml_strategies/compact_artifacts.py).
+
+Trains a linear SVC on the subject dataset (or synthetic documents when it is not
+available), saves both formats to a temporary folder and reports for each:
+  size MB      -- bytes on disk
+  load s       -- cold load in a fresh interpreter (imports excluded)
+  RSS MB       -- resident memory added by the load (Linux)
+  ms/doc       -- vectorize + predict of one document at a time, as the API does
+  agreement    -- share of predictions equal to the pickled model's
+
+Usage:
+    python validation/benchmark_model_artifacts.py [--documents 2000] [--max-features 60000] [--queries 200]
+"""
+
+import argparse
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from utils.ml_strategies.compact_artifacts import CompactClassifier, export_classifier
+
+OUTPUT_JSON = Path(__file__).parent / "result" / "model_artifacts_benchmark.json"
+
+# Run in a fresh interpreter so the load is really cold (no cached objects, page cache aside)
+_LOAD_SCRIPT = """
+import json, os, sys, time
+sys.path.insert(0, {root!r})
+import joblib, numpy, scipy.sparse, sklearn.svm, sklearn.feature_extraction.text
+from utils.ml_strategies.compact_artifacts import CompactClassifier
+rss = lambda: int(open("/proc/self/statm").read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+before = rss()
+start = time.perf_counter()
+if {compact!r}:
+    model = CompactClassifier({folder!r})
+else:
+    model = [joblib.load({folder!r} + "/" + name) for name in ("classifier.pkl", "vectorizer.pkl", "label_encoder.pkl")]
+elapsed = time.perf_counter() - start
+print(json.dumps({{"load_s": elapsed, "rss_mb": rss() - before}}))
+"""
+
+
+def _load_documents(n):
+    try:
+        from fine_tune_subject.model_comparison_framework import _load_subject_data
+        documents, labels, _ = _load_subject_data()
+        if len(documents) > 0:
+            return list(documents[:n]), list(labels[:n]), "subject dataset"
+    except (ImportError, FileNotFoundError) as e:
+        print(f"⚠️ Using synthetic documents: {e}")
+    rng = random.Random(0)
+    words = [f"w{i}" for i in range(20000)]
+    topics = [rng.sample(words, 300) for _ in range(20)]
+    labels = [rng.randrange(20) for _ in range(n)]
+    documents = [" ".join(rng.choices(topics[l], k=150) + rng.choices(words, k=350)) for l in labels]
+    return documents, [f"subject_{l}" for l in labels], "synthetic"
+
+
+def _folder_mb(folder):
+    return sum(f.stat().st_size for f in Path(folder).iterdir()) / 1e6
+
+
+def _cold_load(folder, compact):
+    script = _LOAD_SCRIPT.format(root=str(Path(__file__).resolve().parents[1]), folder=str(folder), compact=compact)
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _ms_per_doc(predict, documents):
+    start = time.perf_counter()
+    predictions = [predict([doc])[0] for doc in documents]
+    return (time.perf_counter() - start) / len(documents) * 1000, np.array(predictions, dtype=object)
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=2000, help="training documents")
+    parser.add_argument("--max-features", type=int, default=60000, help="TF-IDF vocabulary size")
+    parser.add_argument("--queries", type=int, default=200, help="documents predicted one at a time")
+    args = parser.parse_args()
+
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.preprocessing import LabelEncoder
+    from sklearn.svm import SVC
+
+    documents, labels, source = _load_documents(args.documents)
+    print(f"📋 {source}: {len(documents)} documents, {len(set(labels))} classes")
+
+    le = LabelEncoder()
+    y = le.fit_transform(labels)
+    vectorizer = TfidfVectorizer(max_features=args.max_features, ngram_range=(1, 3), min_df=2, max_df=0.8, sublinear_tf=True)
+    X = vectorizer.fit_transform(documents)
+    clf = SVC(kernel="linear", class_weight="balanced", random_state=42).fit(X, y)
+    print(f"📋 {X.shape[1]} features")
+
+    queries = documents[:args.queries]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        pickled, compact = Path(tmp) / "pickle", Path(tmp) / "compact"
+        pickled.mkdir()
+        joblib.dump(clf, pickled / "classifier.pkl")
+        joblib.dump(vectorizer, pickled / "vectorizer.pkl")
+        joblib.dump(le, pickled / "label_encoder.pkl")
+        export_classifier(clf, vectorizer, le, compact)
+
+        pickle_ms, expected = _ms_per_doc(lambda d: le.inverse_transform(clf.predict(vectorizer.transform(d))), queries)
+        compact_ms, predicted = _ms_per_doc(CompactClassifier(compact).predict, queries)
+
+        for name, folder, ms, predictions in (("pickle", pickled, pickle_ms, expected), ("compact", compact, compact_ms, predicted)):
+            load = _cold_load(folder, name == "compact")
+            results[name] = {
+                "size_mb": round(_folder_mb(folder), 2), "load_s": round(load["load_s"], 4),
+                "rss_mb": round(load["rss_mb"], 1), "ms_per_doc": round(ms, 3),
+                "agreement": round(float(np.mean(predictions == expected)), 4),
+            }
+
+    print(f"\n   {'format':<10}{'size MB':>9}{'load s':>9}{'RSS MB':>9}{'ms/doc':>9}{'agreement':>11}")
+    for name, r in results.items():
+        print(f"   {name:<10}{r['size_mb']:>9}{r['load_s']:>9}{r['rss_mb']:>9}{r['ms_per_doc']:>9}{r['agreement']:>11}")
+
+    OUTPUT_JSON.parent.mkdir(parents=True, exist_ok=True)
+    with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
+        json.dump({"args": vars(args), "source": source, "n_features": X.shape[1], "results": results}, f, indent=4)
+    print(f"\n💾 Results saved to {OUTPUT_JSON}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,134 @@
+"""
+Compare fixed max_length padding, dynamic length-grouped padding and sequence
+packing for fine-tuning.
+
+Tokenizes the training split with fine_tunning.generate_tokens.get_tokens in each
+mode and runs one epoch of a tiny randomly initialized GPT-2 on CPU with each
+(one process per mode, so peak memory is measured separately):
+  epoch seconds   -- time for one pass over the training split
+  tokens/s        -- real (non-pad) tokens trained on per second
+  padded tokens/s -- tokens the model actually processed per second (incl. padding)
+  padding ratio   -- share of processed tokens that were padding
+  peak RSS        -- maximum resident memory of the mode's process
+
+Usage:
+    python validation/benchmark_padding.py [--examples 64] [--batch-size 4] [--tokenizer gpt2]
+
+Uses the split dataset (DATASET_WITH_METADATA_AND_TEXT_DOC_CHECKED) when present,
+synthetic documents with SEDICI-like lengths otherwise.
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import resource
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+OUTPUT_JSON = Path(__file__).parent / "result" / "padding_benchmark.json"
+MODES = ["max_length", "dynamic", "packed"]
+
+
+def _load_examples(count):
+    from constants import JSON_FOLDER, DATASET_WITH_METADATA_AND_TEXT_DOC_CHECKED
+    from utils.text_extraction.read_and_write_files import read_data_json
+
+    data = read_data_json(JSON_FOLDER / DATASET_WITH_METADATA_AND_TEXT_DOC_CHECKED, "utf-8")
+    if data.get("training"):
+        return {"training": data["training"][:count]}, "dataset"
+    random.seed(0)
+    words = "universidad nacional de la plata tesis facultad informe resultados análisis".split()
+    items = [
+        {"type": random.choice(["Tesis", "Articulo", "Libro"]), "title": f"Documento {i}", "language": "es",
+         "original_text": " ".join(random.choices(words, k=random.randint(80, 1500)))}
+        for i in range(count)
+    ]
+    return {"training": items}, "synthetic"
+
+
+def _run_mode(mode, args, queue):
+    import torch
+    from torch.utils.data import DataLoader
+    from transformers import AutoTokenizer, GPT2Config, GPT2LMHeadModel
+    from transformers.trainer_pt_utils import LengthGroupedSampler
+    from constants import MAX_TOKENS_INPUT, MAX_TOKENS_OUTPUT
+    from fine_tunning.generate_tokens import get_tokens, get_data_collator
+    from fine_tunning.packing import PackedDataCollator
+
+    torch.manual_seed(0)
+    torch.set_num_threads(args.threads)
+    tokenizer = AutoTokenizer.from_pretrained(args.tokenizer)
+    collator = PackedDataCollator(tokenizer) if mode == "packed" else get_data_collator(tokenizer)
+    dict_dataset, source = _load_examples(args.examples)
+    dataset = get_tokens(dict_dataset, tokenizer, model_type="causal", pad_to_max_length=mode == "max_length",
+                         packing=mode == "packed")["training"]
+
+    config = GPT2Config(vocab_size=len(tokenizer), n_positions=MAX_TOKENS_INPUT + MAX_TOKENS_OUTPUT,
+                        n_embd=64, n_layer=2, n_head=2,
+                        bos_token_id=tokenizer.eos_token_id, eos_token_id=tokenizer.eos_token_id)
+    model = GPT2LMHeadModel(config)
+    optimizer = torch.optim.AdamW(model.parameters(), lr=1e-4)
+    sampler = LengthGroupedSampler(args.batch_size, lengths=dataset["length"]) if mode == "dynamic" else None
+    loader = DataLoader(dataset.remove_columns(["length"]), batch_size=args.batch_size, sampler=sampler, collate_fn=collator)
+
+    real_tokens, processed_tokens = sum(dataset["length"]), 0  # "length" counts real tokens per row in every mode
+    start = time.perf_counter()
+    model.train()
+    for batch in loader:
+        loss = model(**batch).loss
+        loss.backward()
+        optimizer.step()
+        optimizer.zero_grad()
+        processed_tokens += batch["input_ids"].numel()
+    elapsed = time.perf_counter() - start
+
+    queue.put({
+        "source": source,
+        "rows": len(dataset),
+        "epoch_seconds": round(elapsed, 2),
+        "tokens_per_s": round(real_tokens / elapsed, 1),
+        "padded_tokens_per_s": round(processed_tokens / elapsed, 1),
+        "padding_ratio": round(1 - real_tokens / processed_tokens, 3),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    })
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--examples", type=int, default=64, help="training items to use (2 examples each)")
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4, help="torch CPU threads")
+    parser.add_argument("--tokenizer", default="gpt2")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for mode in MODES:
+        print(f"📋 Running {mode} padding...")
+        queue = context.Queue()
+        process = context.Process(target=_run_mode, args=(mode, args, queue))
+        process.start()
+        results[mode] = queue.get()
+        process.join()
+        r = results[mode]
+        print(f"   {r['epoch_seconds']}s  {r['tokens_per_s']} tokens/s  padding {r['padding_ratio']:.0%}  peak {r['peak_rss_mb']} MB")
+
+    baseline = results["max_length"]
+    speedup = {mode: round(baseline["epoch_seconds"] / results[mode]["epoch_seconds"], 2) for mode in MODES}
+    print("=" * 70)
+    for mode in MODES[1:]:
+        print(f"⚡ {mode}: {speedup[mode]:.1f}x faster epoch than max_length padding, "
+              f"peak memory {results[mode]['peak_rss_mb']} MB vs {baseline['peak_rss_mb']} MB")
+
+    OUTPUT_JSON.parent.mkdir(parents=True, exist_ok=True)
+    with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
+        json.dump({"args": vars(args), "results": results, "speedup": speedup}, f, indent=4)
+    print(f"💾 Results saved to {OUTPUT_JSON}")
+
+
+if __name__ == "__main__":
+    run()
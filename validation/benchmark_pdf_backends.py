@@ -0,0 +1,166 @@
+"""
+Compare the extractor's PDF backends (pdfplumber vs PyMuPDF) on the validation documents.
+
+Runs both PdfReader strategies in-process (no HTTP, OCR off) and reports:
+  throughput     -- pages/s for extract_text and extract_text_with_xml_tags
+  text parity    -- difflib similarity and word-count ratio of the plain text
+  tag parity     -- agreement of the h1/h2/p tag sequence from extract_text_with_xml_tags
+  multicolumn    -- agreement of the document-level is_multicolumn flag
+
+The default backend (PDF_BACKEND) should only move to pymupdf if the parity
+numbers hold on this set.
+
+Usage:
+    python validation/benchmark_pdf_backends.py [--limit N]
+
+Requires the extractor service requirements, including PyMuPDF.
+"""
+
+import argparse
+import difflib
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "api" / "app" / "extractor_service"))
+
+from constants import PDF_FOLDER, RESULT_FOLDER_VALIDATION
+from utils.text_extraction.read_and_write_files import read_data_json
+from app.service.strategies.pdf_reader_strategy import PdfReader
+from app.service.strategies.pymupdf_reader_strategy import PyMuPdfReader, FitzDocument, PYMUPDF_AVAILABLE
+
+OUTPUT_JSON = Path(__file__).parent / "result" / "pdf_backend_benchmark.json"
+SIMILARITY_CHARS = 20000   # difflib is quadratic; compare the first N chars of each text
+_TAG_RE = re.compile(r"<(h1|h2|p)>")
+
+
+def _page_count(pdf_path: str) -> int:
+    with FitzDocument(pdf_path) as doc:
+        return len(doc.pages)
+
+
+def _run_backend(reader, pdf_path: str) -> dict:
+    start = time.perf_counter()
+    text, is_multicolumn = reader.extract_text(pdf_path, ocr=False)
+    text_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tagged = reader.extract_text_with_xml_tags(pdf_path, ocr=False)
+    tags_time = time.perf_counter() - start
+
+    return {
+        "text": text,
+        "tags": _TAG_RE.findall(tagged),
+        "is_multicolumn": is_multicolumn,
+        "text_time": text_time,
+        "tags_time": tags_time,
+    }
+
+
+def _compare(base: dict, other: dict) -> dict:
+    base_words, other_words = len(base["text"].split()), len(other["text"].split())
+    similarity = difflib.SequenceMatcher(
+        None, base["text"][:SIMILARITY_CHARS], other["text"][:SIMILARITY_CHARS], autojunk=False
+    ).ratio()
+    tag_matcher = difflib.SequenceMatcher(None, base["tags"], other["tags"], autojunk=False)
+    return {
+        "text_similarity": round(similarity, 4),
+        "word_ratio": round(other_words / base_words, 4) if base_words else None,
+        "tag_agreement": round(tag_matcher.ratio(), 4),
+        "multicolumn_match": base["is_multicolumn"] == other["is_multicolumn"],
+    }
+
+
+def _avg(values: list):
+    values = [v for v in values if v is not None]
+    return round(sum(values) / len(values), 4) if values else None
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=None, help="only the first N documents")
+    args = parser.parse_args()
+
+    if not PYMUPDF_AVAILABLE:
+        print("❌ PyMuPDF not installed. Install with: pip install PyMuPDF")
+        return
+
+    data = read_data_json(RESULT_FOLDER_VALIDATION / "final_to_compare_original.json", "utf-8")
+    if not data:
+        print("❌ No data found")
+        return
+
+    ids = list(data.keys())[:args.limit]
+    backends = {"pdfplumber": PdfReader(), "pymupdf": PyMuPdfReader()}
+    print(f"📋 Comparing PDF backends on {len(ids)} documents")
+    print("=" * 70)
+
+    documents = {}
+    totals = {name: {"pages": 0, "text_time": 0.0, "tags_time": 0.0} for name in backends}
+    for i, doc_id in enumerate(ids, 1):
+        pdf_path = str(PDF_FOLDER / f"{doc_id}.pdf")
+        if not Path(pdf_path).exists():
+            print(f"⚠️  [{i}/{len(ids)}] {doc_id}: PDF not found")
+            continue
+        try:
+            pages = _page_count(pdf_path)
+            runs = {name: _run_backend(reader, pdf_path) for name, reader in backends.items()}
+        except Exception as e:
+            print(f"❌ [{i}/{len(ids)}] {doc_id}: {e}")
+            continue
+
+        for name, r in runs.items():
+            totals[name]["pages"] += pages
+            totals[name]["text_time"] += r["text_time"]
+            totals[name]["tags_time"] += r["tags_time"]
+
+        parity = _compare(runs["pdfplumber"], runs["pymupdf"])
+        documents[doc_id] = {
+            "pages": pages,
+            **{f"{name}_text_s": round(r["text_time"], 3) for name, r in runs.items()},
+            **{f"{name}_tags_s": round(r["tags_time"], 3) for name, r in runs.items()},
+            **parity,
+        }
+        flag = "✅" if parity["text_similarity"] >= 0.95 and parity["multicolumn_match"] else "⚠️ "
+        print(f"{flag} [{i}/{len(ids)}] {doc_id}: {pages}p  "
+              f"pdfplumber={runs['pdfplumber']['text_time']:.2f}s  pymupdf={runs['pymupdf']['text_time']:.2f}s  "
+              f"sim={parity['text_similarity']:.3f}  tags={parity['tag_agreement']:.3f}")
+
+    if not documents:
+        print("❌ No documents processed")
+        return
+
+    summary = {}
+    for name, t in totals.items():
+        summary[name] = {
+            "pages": t["pages"],
+            "text_pages_per_s": round(t["pages"] / t["text_time"], 2) if t["text_time"] else None,
+            "tags_pages_per_s": round(t["pages"] / t["tags_time"], 2) if t["tags_time"] else None,
+        }
+    docs = list(documents.values())
+    summary["parity"] = {
+        "text_similarity_avg": _avg([d["text_similarity"] for d in docs]),
+        "word_ratio_avg": _avg([d["word_ratio"] for d in docs]),
+        "tag_agreement_avg": _avg([d["tag_agreement"] for d in docs]),
+        "multicolumn_agreement": round(sum(d["multicolumn_match"] for d in docs) / len(docs), 4),
+    }
+
+    print("\n" + "=" * 70)
+    print(f"{'backend':<12} {'text pages/s':>14} {'tags pages/s':>14}")
+    for name in backends:
+        print(f"{name:<12} {summary[name]['text_pages_per_s']:>14} {summary[name]['tags_pages_per_s']:>14}")
+    print("\nParity (pymupdf vs pdfplumber):")
+    for key, value in summary["parity"].items():
+        print(f"   {key}: {value}")
+
+    OUTPUT_JSON.parent.mkdir(parents=True, exist_ok=True)
+    with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
+        json.dump({"summary": summary, "documents": documents}, f, indent=2, ensure_ascii=False)
+    print(f"\n✅ Results saved to {OUTPUT_JSON}")
+
+
+if __name__ == "__main__":
+    run()
@@ -13,7 +13,8 @@ from constants import (
     PDF_FOLDER,
     ROOT_DIR
 )
-from utils.text_extraction.read_and_write_files import read_data_json, write_to_json
+from utils.text_extraction.read_and_write_files import write_to_json
+from utils.text_extraction.jsonl_dataset import open_dataset
 from utils.consume_apis.consume_orchestrator import upload_file
 
 
@@ -149,7 +150,7 @@ def main():
         json_file_path = RESULT_FOLDER_VALIDATION / "final_to_compare_original.json"
 
         try:
-            data = read_data_json(json_file_path, 'utf-8')
+            data = open_dataset(json_file_path)  # records are read from disk one at a time
         except Exception as e:
             print(f"❌ Error reading JSON file: {str(e)}")
             return
@@ -10,7 +10,8 @@ from bs4 import BeautifulSoup
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from constants import RESULT_FOLDER_VALIDATION, PDF_FOLDER, GROBID_SERVICE, GROBID_FOLDER
-from utils.text_extraction.read_and_write_files import read_data_json, write_to_json
+from utils.text_extraction.read_and_write_files import write_to_json
+from utils.text_extraction.jsonl_dataset import open_dataset
 
 def create_grobid_folder():
     """Create GROBID folder if it doesn't exist"""
@@ -422,7 +423,7 @@ def main():
     json_file_path = RESULT_FOLDER_VALIDATION / "final_to_compare_original.json"
     
     try:
-        data = read_data_json(json_file_path, 'utf-8')
+        data = open_dataset(json_file_path)  # records are read from disk one at a time
     except Exception as e:
         print(f"Error reading JSON file: {str(e)}")
         return
@@ -13,7 +13,8 @@ from constants import (
     PDF_FOLDER, 
     PROMPT_CLOUD_LLM_VALIDATOR
 )
-from utils.text_extraction.read_and_write_files import read_data_json, write_to_json
+from utils.text_extraction.read_and_write_files import write_to_json
+from utils.text_extraction.jsonl_dataset import open_dataset
 from utils.text_extraction.pdf_reader import PdfReader
 
 class CloudLLMValidator:
@@ -282,7 +283,7 @@ def main():
         print(json_file_path)
         
         try:
-            data = read_data_json(json_file_path, 'utf-8')
+            data = open_dataset(json_file_path)  # records are read from disk one at a time
         except Exception as e:
             print(f"❌ Error reading JSON file: {str(e)}")
             return